@@ -0,0 +1,69 @@
+# Alternative-route timing per map, against a UCS query and two one-to-all searches.
+#
+#   python benchmarks/alternatives.py [--alternatives 2] [problem.json | problem_dir ...]
+#
+# "2x SPT" is the time of two full Dijkstra trees (SPT.ShortestPathTree) on the same map,
+# the budget the via-node method aims for. Each alternative is listed with its stretch
+# (cost over the optimal cost). The optimal route must cost exactly what UCS finds.
+
+import os
+import sys
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from Alternatives import AlternativeRoutes
+from SPT import ShortestPathTree
+from UCS import UCS
+
+REPEAT = 3
+
+
+def best_time(run):
+    """Best-of-REPEAT time of a call, with its last result."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start_time = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start_time)
+    return result, best
+
+
+def best_time_once(run):
+    """Time of a single call, with its result."""
+    start_time = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    parser = problem_parser("Alternative-route timing per map", problem_dirs())
+    parser.add_argument("--alternatives", type=int, default=2)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<44} {'nodes':>7} {'UCS':>8} {'2x SPT':>8} {'alts':>8} {'ratio':>6}  stretch of each alternative")
+    for json_file_path in problem_files(args.paths):
+        ucs = UCS(json_file_path)
+        ucs_solution, ucs_time = best_time(ucs.search)
+        graph = ucs.problem.graph
+        start = graph.index[ucs.problem.initial_state.id]
+        _, tree_time = best_time(lambda: ShortestPathTree(graph, start))
+
+        # A fresh search each time, so the backward tree is not reused from the previous run
+        alternatives_time = float('inf')
+        for _ in range(REPEAT):
+            search = AlternativeRoutes(json_file_path, args.alternatives)
+            solution, seconds = best_time_once(search.search)
+            alternatives_time = min(alternatives_time, seconds)
+
+        if (solution is None) != (ucs_solution is None) or \
+                (solution and solution[-1].path_cost != ucs_solution[-1].path_cost):
+            failures += 1
+            print("  optimal route differs from UCS")
+        stretches = " ".join(f"{path[-1].path_cost / solution[-1].path_cost:.3f}" for path in search.paths[1:]) \
+            if solution else "no route"
+        print(f"{os.path.basename(json_file_path)[:-5][:44]:<44} {len(graph):>7} {ucs_time:>7.4f}s "
+              f"{2 * tree_time:>7.4f}s {alternatives_time:>7.4f}s {alternatives_time / (2 * tree_time):>5.2f}x  {stretches}")
+    if failures:
+        sys.exit(1)
@@ -0,0 +1,45 @@
+# Set-up shared by the benchmark scripts: the import paths of the source tree, the problem
+# files a run covers and the command line every script starts from.
+#
+#   from common import SRC_DIR, problem_dirs, problem_files, problem_parser
+
+import argparse
+import glob
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBLEMS_DIR = os.path.join(SRC_DIR, 'input', 'problems')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.join(SRC_DIR, 'search_algorthims'))
+
+
+def problem_files(paths):
+    """Expand the command-line paths into problem JSON files."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, '**', '*.json'), recursive=True))
+        else:
+            yield path
+
+
+def problem_dirs(*names):
+    """Bundled problem directories by size, e.g. problem_dirs('huge'); the whole set if no size is given."""
+    return [os.path.join(PROBLEMS_DIR, name) for name in names] or [PROBLEMS_DIR]
+
+
+def problem_parser(description: str, default_paths, help: str = "problem JSON files or directories of them"):
+    """
+    Command line with the problems to run on as positional paths; scripts add their own options.
+
+    Args:
+        description (str): What the script measures.
+        default_paths (List[str]): Paths used when none are given.
+        help (str): Help text of the paths.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("paths", nargs="*", default=default_paths, help=help)
+    return parser
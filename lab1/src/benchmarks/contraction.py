@@ -0,0 +1,66 @@
+# Graph reduction and query speedup from degree-2 chain contraction, per problem.
+#
+#   python benchmarks/contraction.py [problem_dir ...]
+#
+# For every problem the nodes and edges of the full and contracted graphs are reported,
+# together with the search time of each algorithm on both. UCS and A* (geodesic) must
+# find equally cheap paths on both graphs; BFS, DFS and greedy search count hops, so
+# their paths can legitimately change.
+
+import glob
+import os
+import sys
+import time
+
+from common import PROBLEMS_DIR
+
+from AStar_geodesic import AStarGeodesic
+from BFS import BFS
+from DFS import DFS
+from GBS import GreedyBestGeodesic
+from UCS import UCS
+
+ALGORITHMS = (('bfs', BFS), ('dfs', DFS), ('ucs', UCS), ('gbs', GreedyBestGeodesic), ('astar', AStarGeodesic))
+OPTIMAL = ('ucs', 'astar')
+REPEAT = 5
+
+
+def timed(search_class, json_file_path, contract):
+    """Best-of-REPEAT search time, and the solution of the last run."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        search = search_class(json_file_path)
+        if contract:
+            search.use_contraction()
+        start_time = time.perf_counter()
+        result = search.search()
+        best = min(best, time.perf_counter() - start_time)
+    solution = result[0] if isinstance(result, tuple) else result
+    return search, solution, best
+
+
+if __name__ == "__main__":
+    problem_dirs = sys.argv[1:] or sorted(glob.glob(os.path.join(PROBLEMS_DIR, '*')))
+    failures = 0
+    print(f"{'problem':<50} {'nodes':>13} {'edges':>13}  " + "  ".join(f"{name:>13}" for name, _ in ALGORITHMS))
+    for problem_dir in problem_dirs:
+        for json_file_path in sorted(glob.glob(os.path.join(problem_dir, '*.json'))):
+            speedups = []
+            for name, search_class in ALGORITHMS:
+                full, full_solution, full_time = timed(search_class, json_file_path, contract=False)
+                reduced, reduced_solution, reduced_time = timed(search_class, json_file_path, contract=True)
+                speedups.append(f"{full_time / reduced_time:>12.2f}x")
+                if name in OPTIMAL and (full_solution is None) != (reduced_solution is None):
+                    failures += 1
+                    print(f"  {name}: solution found on only one of the graphs")
+                elif name in OPTIMAL and full_solution and \
+                        abs(full_solution[-1].path_cost - reduced_solution[-1].path_cost) > 1e-6:
+                    failures += 1
+                    print(f"  {name}: cost {full_solution[-1].path_cost} -> {reduced_solution[-1].path_cost}")
+            graph, contracted = full.problem.full_graph, reduced.problem.graph
+            nodes = f"{len(graph)}->{len(contracted)}"
+            edges = f"{graph.num_edges()}->{contracted.num_edges()}"
+            print(f"{os.path.basename(json_file_path)[:-5]:<50} {nodes:>13} {edges:>13}  " + "  ".join(speedups))
+    if failures:
+        print(f"{failures} optimal searches changed cost on the contracted graph")
+        sys.exit(1)
@@ -0,0 +1,77 @@
+# Scaling report for delta-stepping: search time against worker count and bucket width,
+# with every cost checked against UCS.
+#
+#   python benchmarks/delta_stepping.py [--workers 1 2 4] [--delta-scale 1 10] [problem.json | problem_dir ...]
+#
+# The bucket width is given as a multiple of the map's mean step cost. Wider buckets give
+# larger phases (more work to split across workers) but re-relax more nodes. By default
+# the huge problems run, plus the synthetic maps if benchmarks/generate_maps.py wrote them.
+
+import os
+import sys
+import time
+
+from common import SRC_DIR, problem_dirs, problem_files, problem_parser
+
+from DeltaStepping import DeltaStepping
+from UCS import UCS
+
+REPEAT = 3
+SYNTHETIC_DIR = os.path.join(SRC_DIR, 'input', 'synthetic')  # Not committed; see generate_maps.py
+
+
+def timed(make_search):
+    """Best-of-REPEAT search time, with the last search and its solution."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        search = make_search()
+        start_time = time.perf_counter()
+        solution = search.search()
+        best = min(best, time.perf_counter() - start_time)
+    return search, solution, best
+
+
+def timed_delta(json_file_path, delta, workers):
+    """Best-of-REPEAT time of one DeltaStepping searched repeatedly, so its pool is started once."""
+    with DeltaStepping(json_file_path, delta, workers) as search:
+        best = float('inf')
+        for _ in range(REPEAT):
+            phases = search.phases
+            start_time = time.perf_counter()
+            solution = search.search()
+            best = min(best, time.perf_counter() - start_time)
+    return solution, best, search.phases - phases
+
+
+if __name__ == "__main__":
+    parser = problem_parser(__doc__, problem_dirs('huge') + [SYNTHETIC_DIR])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--delta-scale", type=float, nargs="+", default=[1.0, 10.0])
+    args = parser.parse_args()
+    if SYNTHETIC_DIR in args.paths and not os.path.isdir(SYNTHETIC_DIR):
+        print(f"Skipping {SYNTHETIC_DIR}: no synthetic maps yet, run benchmarks/generate_maps.py first")
+        args.paths.remove(SYNTHETIC_DIR)
+
+    print(f"CPUs available: {os.cpu_count()}")
+    print(f"{'problem':<44} {'nodes':>7} {'delta':>8} {'UCS':>8}  " +
+          "  ".join(f"{f'{w} worker' + ('s' if w > 1 else ''):>10}" for w in args.workers) + "  phases")
+    mismatches = 0
+    for json_file_path in problem_files(args.paths):
+        ucs, ucs_solution, ucs_time = timed(lambda: UCS(json_file_path))
+        graph = ucs.problem.graph
+        mean_cost = sum(graph.step_costs) / len(graph.step_costs) if graph.num_edges() else 1.0
+        for scale in args.delta_scale:
+            times = []
+            for workers in args.workers:
+                solution, seconds, phases = timed_delta(json_file_path, scale * mean_cost, workers)
+                times.append(f"{seconds:>9.4f}s")
+                # Exact comparison: delta-stepping must find the very same cost as UCS
+                if (solution and solution[-1].path_cost) != (ucs_solution and ucs_solution[-1].path_cost):
+                    mismatches += 1
+                    print(f"  cost mismatch with {workers} workers: {solution and solution[-1].path_cost} "
+                          f"vs UCS {ucs_solution and ucs_solution[-1].path_cost}")
+            print(f"{os.path.basename(json_file_path)[:-5][:44]:<44} {len(graph):>7} {scale * mean_cost:>8.2f} "
+                  f"{ucs_time:>7.4f}s  " + "  ".join(times) + f"  {phases:>6}")
+    if mismatches:
+        print(f"{mismatches} delta-stepping costs differ from UCS")
+        sys.exit(1)
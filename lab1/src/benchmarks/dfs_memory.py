@@ -0,0 +1,52 @@
+# DFS with one successor iterator per stack frame, and iterative deepening, against BFS.
+#
+#   python benchmarks/dfs_memory.py [problem.json | problem_dir ...]
+#
+# For every problem: the time, node counts and peak stack size (frames) of DFS, the same
+# for iterative deepening with the limit it stopped at, and the peak queue of BFS. The
+# iterative deepening path must have as many segments as the BFS path, since both find
+# the fewest segments to the goal.
+
+import os
+import sys
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from BFS import BFS
+from DFS import DFS, IterativeDeepeningDFS
+
+
+def run(search):
+    """Time one search; returns its solution, the time and its peak frontier."""
+    start_time = time.perf_counter()
+    result = search.search()
+    elapsed = time.perf_counter() - start_time
+    solution = result[0] if isinstance(result, tuple) else result
+    return solution, elapsed, search.metrics.gauges.get("peak_frontier", 0)
+
+
+if __name__ == "__main__":
+    parser = problem_parser("DFS stack size and iterative deepening against BFS", problem_dirs('small', 'medium', 'large'))
+    parser.add_argument("--max-depth", type=int, help="largest limit for iterative deepening")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<40} {'DFS time':>9} {'exp':>6} {'frames':>6}   {'IDDFS time':>10} {'exp':>8} "
+          f"{'frames':>6} {'limit':>5}   {'BFS queue':>9}")
+    for json_file_path in problem_files(args.paths):
+        dfs = DFS(json_file_path)
+        _, dfs_time, dfs_frames = run(dfs)
+        iddfs = IterativeDeepeningDFS(json_file_path, args.max_depth)
+        iddfs_solution, iddfs_time, iddfs_frames = run(iddfs)
+        bfs_solution, _, bfs_queue = run(BFS(json_file_path))
+
+        print(f"{os.path.basename(json_file_path)[:-5][:40]:<40} {dfs_time:>8.4f}s {dfs.expanded_nodes:>6} "
+              f"{dfs_frames:>6}   {iddfs_time:>9.4f}s {iddfs.expanded_nodes:>8} {iddfs_frames:>6} "
+              f"{iddfs.depth_limit if iddfs.depth_limit is not None else '-':>5}   {bfs_queue:>9}")
+        segments = [len(solution) if solution else None for solution in (iddfs_solution, bfs_solution)]
+        if args.max_depth is None and segments[0] != segments[1]:
+            failures += 1
+            print("  iterative deepening and BFS paths have different lengths")
+    if failures:
+        sys.exit(1)
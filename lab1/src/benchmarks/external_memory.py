@@ -0,0 +1,61 @@
+# External-memory BFS and UCS against the in-memory engines: time and I/O volume per memory budget.
+#
+#   python benchmarks/external_memory.py [--memory 1024 65536] [problem.json | problem_dir ...]
+#
+# For every problem the graph is written out once with build_external. Each external run
+# reports its time and the bytes it read and wrote, for each memory budget (records per
+# sort, frontier or visited set). Paths and costs must match BFS and UCS, and the BFS
+# generated/expanded counts must match too.
+
+import os
+import sys
+import tempfile
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from BFS import BFS
+from ExternalSearch import ExternalSearch
+from UCS import UCS
+from utilities.ExternalMemory import build_external
+
+
+def timed(search):
+    """Time of a single search, with its solution."""
+    start_time = time.perf_counter()
+    solution = search.search()
+    return solution, time.perf_counter() - start_time
+
+
+def summary(solution):
+    return ([node.state.id for node in solution], solution[-1].path_cost) if solution else None
+
+
+if __name__ == "__main__":
+    parser = problem_parser("External-memory BFS and UCS: time and I/O volume", problem_dirs('huge'))
+    parser.add_argument("--memory", type=int, nargs="+", default=[1024, 65536],
+                        help="memory budgets, in records")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<40} {'algorithm':<13} {'memory':>7} {'in-memory':>10} {'external':>9} "
+          f"{'read MB':>8} {'written MB':>10}")
+    for json_file_path in problem_files(args.paths):
+        name = os.path.basename(json_file_path)[:-5][:40]
+        with tempfile.TemporaryDirectory() as data_dir:
+            build_external(json_file_path, data_dir)
+            for algorithm, engine in (("breadth", BFS), ("uniform_cost", UCS)):
+                search = engine(json_file_path)
+                solution, memory_time = timed(search)
+                for memory in args.memory:
+                    external = ExternalSearch(data_dir, algorithm, memory)
+                    external_solution, external_time = timed(external)
+                    print(f"{name:<40} {algorithm:<13} {memory:>7} {memory_time:>9.4f}s {external_time:>8.4f}s "
+                          f"{external.io.bytes_read / 1e6:>8.2f} {external.io.bytes_written / 1e6:>10.2f}")
+                    counts = (search.generated_nodes, search.expanded_nodes)
+                    if summary(external_solution) != summary(solution) or \
+                            (algorithm == "breadth" and (external.generated_nodes, external.expanded_nodes) != counts):
+                        failures += 1
+                        print("  external result differs from the in-memory search")
+    if failures:
+        sys.exit(1)
@@ -0,0 +1,41 @@
+# Generate synthetic road-network problems for scaling benchmarks.
+#
+#   python benchmarks/generate_maps.py --nodes 10000,100000,1000000 --problems 3
+#   python benchmarks/suite.py --problems input/synthetic --sizes 10000,100000 --algorithms breadth,a_geodesic
+#
+# Problems are written as <out>/<nodes>/synthetic_<nodes>_<seed>_<n>.json, so each node
+# count works as a size for the benchmark suite (there are no anchors for them).
+
+import argparse
+import os
+import time
+
+from common import SRC_DIR
+
+from utilities.SyntheticMap import SyntheticMap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded, road-like synthetic problems.")
+    parser.add_argument('--nodes', default='10000,100000,1000000', help="comma-separated node counts")
+    parser.add_argument('--problems', type=int, default=3, help="problems (initial/final pairs) per map")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--one-way', type=float, default=0.5, help="fraction of local streets that are one-way")
+    parser.add_argument('--arterial-every', type=int, default=8, help="blocks between arterial streets")
+    parser.add_argument('--out', default=os.path.join(SRC_DIR, 'input', 'synthetic'))
+    args = parser.parse_args()
+
+    for nodes in (int(n) for n in args.nodes.split(',')):
+        start = time.perf_counter()
+        road_map = SyntheticMap(nodes, seed=args.seed, one_way=args.one_way, arterial_every=args.arterial_every)
+        directory = os.path.join(args.out, str(nodes))
+        os.makedirs(directory, exist_ok=True)
+        for problem in range(args.problems):
+            initial, final = road_map.endpoints(problem)
+            road_map.write(os.path.join(directory, f'synthetic_{nodes}_{args.seed}_{problem}.json'), initial, final)
+        print(f"{nodes:>9} nodes requested: {len(road_map.ids)} intersections, {len(road_map.segments)} segments, "
+              f"{args.problems} problems in {time.perf_counter() - start:.1f}s -> {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# How k-shortest-paths runtime grows with k, per problem, next to a single UCS query.
+#
+#   python benchmarks/k_shortest.py [--k 1 2 4 8 16 32] [problem.json | problem_dir ...]
+#
+# For every k the table shows the best-of-REPEAT time, the number of spur searches and the
+# nodes expanded (including the reverse Dijkstra pass). The cheapest route must cost
+# exactly what UCS finds, and costs must never decrease from one route to the next.
+
+import os
+import sys
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from KShortest import KShortestPaths
+from UCS import UCS
+
+REPEAT = 3
+
+
+def timed(make_search):
+    """Best-of-REPEAT search time, with the last search and its solution."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        search = make_search()
+        start_time = time.perf_counter()
+        solution = search.search()
+        best = min(best, time.perf_counter() - start_time)
+    return search, solution, best
+
+
+if __name__ == "__main__":
+    parser = problem_parser("k-shortest-paths scaling report", problem_dirs('huge'))
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<44} {'UCS':>8}  " + "  ".join(f"{f'k={k}':>22}" for k in args.k))
+    for json_file_path in problem_files(args.paths):
+        _, ucs_solution, ucs_time = timed(lambda: UCS(json_file_path))
+        cells = []
+        for k in args.k:
+            search, solution, seconds = timed(lambda: KShortestPaths(json_file_path, k))
+            cells.append(f"{seconds:>8.4f}s {search.spur_searches:>5}sp {search.expanded_nodes:>6}")
+            costs = [path[-1].path_cost for path in search.paths]
+            if (solution is None) != (ucs_solution is None) or \
+                    (solution and costs[0] != ucs_solution[-1].path_cost) or costs != sorted(costs):
+                failures += 1
+                print(f"  k={k}: route costs {costs[:3]}... do not start at the UCS cost or decrease")
+        print(f"{os.path.basename(json_file_path)[:-5][:44]:<44} {ucs_time:>7.4f}s  " + "  ".join(cells))
+    if failures:
+        sys.exit(1)
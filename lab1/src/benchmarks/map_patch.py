@@ -0,0 +1,220 @@
+# Map patches (utilities.MapPatch) applied in place, against rebuilding everything from the patched map.
+#
+#   python benchmarks/map_patch.py [--fraction 0.001] [--nodes 100000] [problem.json | problem_dir ...]
+#
+# For every map: a random patch touching --fraction of its segments (speed changes, removed
+# and new segments, a new and a moved intersection, a removed one) is applied to a loaded
+# search with its graph, components, spatial index and speed profiles built, and to a tile
+# directory. Its time is shown next to rebuilding all of those from the patched map. The
+# patched structures must answer like the rebuilt ones: same edges and costs per
+# intersection id, same reachability, same speed profiles, same tiles and the same UCS
+# cost; nearest intersections and snapped segments must match a scan of the whole map.
+# --nodes adds synthetic maps of those sizes (utilities.SyntheticMap).
+
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from UCS import UCS
+from utilities.Graph import Graph
+from utilities.MapPatch import MapPatch
+from utilities.RouteData import RouteData
+from utilities.SpatialIndex import SpatialIndex
+from utilities.SpeedProfiles import SpeedProfiles
+from utilities.SyntheticMap import SyntheticMap
+from utilities.TiledGraph import TiledGraph, build_tiles, patch_tiles
+
+
+def random_patch(route_data: RouteData, fraction: float, rng: random.Random) -> MapPatch:
+    """A patch touching about fraction of the segments, never the problem's endpoints."""
+    segments = route_data.segments
+    count = max(3, round(len(segments) * fraction))
+    endpoints = set(route_data.get_initial_final().values())
+    ids = [i for i in route_data.intersections if i not in endpoints]
+    chosen = rng.sample(segments, count)
+    third = count // 3
+    updated, removed = chosen[:third], chosen[third:2 * third]
+
+    # A removed intersection, a moved one and a new one joined both ways to a neighbour
+    gone, moved = rng.sample(ids, 2)
+    busy = {gone} | {s["origin"] for s in removed} | {s["destination"] for s in removed}
+    removed = [s for s in removed if s["origin"] != gone and s["destination"] != gone]
+    near = route_data.intersections[moved]
+    new_id = max(route_data.intersections) + 1
+    anchor = rng.choice([i for i in ids if i not in busy and i != moved])
+    position = route_data.intersections[anchor]
+    added = [{"origin": new_id, "destination": anchor, "distance": 25.0, "speed": 30},
+             {"origin": anchor, "destination": new_id, "distance": 25.0, "speed": 30}]
+    # New segments are shortcuts to an intersection two segments away
+    by_origin = {}
+    for s in segments:
+        by_origin.setdefault(s["origin"], []).append(s["destination"])
+    for _ in range(count - 2 * third - 2):
+        first = rng.choice(segments)
+        origin, destination = first["origin"], rng.choice(by_origin.get(first["destination"], [first["destination"]]))
+        if gone not in (origin, destination) and origin != destination:
+            added.append({"origin": origin, "destination": destination,
+                          "distance": round(rng.uniform(20, 400), 1), "speed": rng.choice((30, 50, 80))})
+    return MapPatch({
+        "intersections": {
+            "add": [{"identifier": new_id, "latitude": position["latitude"] + 0.0002,
+                     "longitude": position["longitude"] + 0.0002}],
+            "update": [{"identifier": moved, "latitude": near["latitude"] + 0.003,
+                        "longitude": near["longitude"] - 0.003}],
+            "remove": [gone]},
+        "segments": {
+            "add": added,
+            "update": [{"origin": s["origin"], "destination": s["destination"],
+                        "speed": max(10, s["speed"] - 20)} for s in updated
+                       if s["origin"] != gone and s["destination"] != gone],
+            "remove": [{"origin": s["origin"], "destination": s["destination"]} for s in removed]}})
+
+
+def rebuild(route_data: RouteData, tile_dir: str, json_file_path: str):
+    """Everything apply_patch updates, built from scratch; returns the structures and the time."""
+    start_time = time.perf_counter()
+    graph = Graph(route_data)
+    graph.components
+    SpatialIndex(graph)
+    profiles = SpeedProfiles(graph, route_data)
+    elapsed = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    build_tiles(json_file_path, tile_dir)
+    return graph, profiles, elapsed, time.perf_counter() - start_time
+
+
+def edges_by_id(graph):
+    """Outgoing edges of every live intersection, by id: (target id, cost, step cost, distance)."""
+    return {graph.ids[u]: [(graph.ids[graph.targets[k]], graph.costs[k], graph.step_costs[k], graph.distances[k])
+                           for k in range(graph.offsets[u], graph.offsets[u + 1])]
+            for u in range(len(graph)) if graph.index.get(graph.ids[u]) == u}
+
+
+def tiles_by_id(tile_dir, graph):
+    """Outgoing edges of every intersection as the tiles hold them, by id; targets and nodes must be in the tile recorded."""
+    tiled = TiledGraph(tile_dir)
+    keys = [tuple(int(part) for part in name.split("_")) for name in tiled.manifest["tiles"]]
+    edges = {}
+    for key in keys:
+        tile = tiled.tile(key)
+        for i in range(len(tile.nodes)):
+            if tiled.tile_of(tile.nodes[i]) != key:
+                edges["misindexed"] = True
+            edges[tile.ids[i]] = [(graph.ids[tile.targets[k]], tile.costs[k], tile.step_costs[k])
+                                  for k in range(tile.offsets[i], tile.offsets[i + 1])]
+    for key in keys:
+        tile = tiled.tile(key)
+        for k in range(len(tile.targets)):
+            if tile.targets[k] not in tiled.tile((tile.columns[k], tile.rows[k])).local:
+                edges["misplaced"] = True
+    return edges, tiled.manifest["edges"]
+
+
+def differences(search, graph, profiles, patched_dir, rebuilt_dir, rng) -> list:
+    """What the patched structures of a search answer differently from the rebuilt ones."""
+    problem = search.problem
+    patched = problem.full_graph
+    failures = []
+    if edges_by_id(patched) != edges_by_id(graph):
+        failures.append("graph edges")
+    live = [u for u in range(len(patched)) if patched.index.get(patched.ids[u]) == u]
+    pairs = [(rng.choice(live), rng.choice(live)) for _ in range(500)]
+    if any(patched.components.reachable(u, v) != graph.components.reachable(
+            graph.index[patched.ids[u]], graph.index[patched.ids[v]]) for u, v in pairs):
+        failures.append("components")
+    # The patched index keeps the projection it was built with, so it is checked against
+    # a scan of every intersection and segment in that projection
+    index = problem.spatial_index
+    for _ in range(100):
+        u = rng.choice(live)
+        latitude = patched.latitudes[u] + rng.uniform(-0.002, 0.002)
+        longitude = patched.longitudes[u] + rng.uniform(-0.002, 0.002)
+        x, y = index.project(latitude, longitude)
+        scan = sorted((math.hypot(index.xs[v] - x, index.ys[v] - y), v) for v in live)
+        if index.nearest(latitude, longitude, 3) != scan[:3]:
+            failures.append("nearest")
+            break
+        k, _, d = index.snap(latitude, longitude)
+        if (d, k) != min((index._segment_distance(e, x, y)[0], e) for e in range(patched.num_edges())):
+            failures.append("snap")
+            break
+    ours = {patched.ids[u]: profile_row(problem.speed_profiles, patched, u) for u in live}
+    if ours != {graph.ids[u]: profile_row(profiles, graph, u) for u in range(len(graph))}:
+        failures.append("speed profiles")
+    (patched_tiles, patched_edges), (rebuilt_tiles, _) = tiles_by_id(patched_dir, patched), tiles_by_id(rebuilt_dir, graph)
+    if patched_tiles != rebuilt_tiles or patched_edges != patched.num_edges():
+        failures.append("tiles")
+    return failures
+
+
+def profile_row(profiles, graph, u):
+    """Speed profiles of the outgoing edges of a node, in edge order."""
+    return list(profiles.profile[graph.offsets[u]:graph.offsets[u + 1]])
+
+
+if __name__ == "__main__":
+    parser = problem_parser("Map patches applied in place against a full rebuild", [],
+                            help="problems to patch (default: the huge ones, unless --nodes is given)")
+    parser.add_argument("--fraction", type=float, default=0.001, help="fraction of the segments to touch")
+    parser.add_argument("--nodes", type=int, nargs="*", default=[], help="also patch synthetic maps of these sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="map_patch_")
+    paths = args.paths or ([] if args.nodes else problem_dirs('huge'))
+    files = list(problem_files(paths))
+    for nodes in args.nodes:
+        road_map = SyntheticMap(nodes, seed=args.seed)
+        files.append(os.path.join(work_dir, f"synthetic_{nodes}.json"))
+        road_map.write(files[-1], *road_map.endpoints(0))
+
+    failures = 0
+    print(f"{'problem':<40} {'segments':>8} {'changes':>7} {'patch':>9} {'tiles':>9} {'rebuilt':>6}   "
+          f"{'rebuild':>9} {'tiles':>9} {'speed-up':>8}")
+    try:
+        for json_file_path in files:
+            rng = random.Random(args.seed)
+            tile_dir = os.path.join(work_dir, "tiles")
+            shutil.rmtree(tile_dir, ignore_errors=True)
+            build_tiles(json_file_path, tile_dir)
+            search = UCS(json_file_path)
+            search.problem.spatial_index, search.problem.speed_profiles  # Build what a patch has to update
+            segments = len(search.route_data.segments)
+            patch = random_patch(search.route_data, args.fraction, rng)
+
+            start_time = time.perf_counter()
+            result = search.apply_patch(patch)
+            patch_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            rewritten = patch_tiles(tile_dir, search.problem.full_graph, result)
+            tiles_time = time.perf_counter() - start_time
+
+            patched_file = os.path.join(work_dir, "patched.json")
+            with open(patched_file, 'w') as f:
+                json.dump(search.route_data.data, f)
+            rebuilt_dir = os.path.join(work_dir, "rebuilt")
+            shutil.rmtree(rebuilt_dir, ignore_errors=True)
+            with open(patched_file, 'r') as f:
+                graph, profiles, rebuild_time, build_time = rebuild(RouteData(f.read()), rebuilt_dir, patched_file)
+            print(f"{os.path.basename(json_file_path)[:-5][:40]:<40} {segments:>8} {len(patch):>7} "
+                  f"{patch_time * 1e3:>7.2f}ms {tiles_time * 1e3:>7.2f}ms {len(rewritten):>6}   "
+                  f"{rebuild_time * 1e3:>7.1f}ms {build_time * 1e3:>7.1f}ms {rebuild_time / patch_time:>7.1f}x")
+
+            failed = differences(search, graph, profiles, tile_dir, rebuilt_dir, rng)
+            rebuilt = UCS(patched_file)
+            if search.search() and abs(search.solution_cost - (rebuilt.search() and rebuilt.solution_cost)) > 1e-9:
+                failed.append("UCS cost")
+            if failed:
+                failures += 1
+                print(f"  patched and rebuilt differ: {', '.join(failed)}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if failures:
+        sys.exit(1)
@@ -0,0 +1,31 @@
+# Connectivity report for map exports: strongly connected components per problem, and
+# whether each problem's final intersection can be reached from its initial one.
+#
+#   python benchmarks/map_quality.py [problem.json | problem_dir ...]
+
+import os
+import sys
+
+from common import problem_dirs, problem_files
+
+from utilities.Graph import Graph
+from utilities.RouteData import RouteData
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or problem_dirs()
+    print(f"{'problem':<52} {'nodes':>6} {'SCCs':>5} {'largest':>8} {'single':>6} {'sources':>7} {'sinks':>5}  solvable")
+    for json_file_path in problem_files(paths):
+        with open(json_file_path, 'r') as f:
+            route_data = RouteData(f.read())
+        graph = Graph(route_data)
+        stats = graph.components.stats()
+        endpoints = route_data.get_initial_final()
+        start, goal = graph.index.get(endpoints["initial"]), graph.index.get(endpoints["final"])
+        if start is None or goal is None:
+            solvable = "endpoint missing"
+        else:
+            solvable = "yes" if graph.components.reachable(start, goal) else "NO"
+        print(f"{os.path.basename(json_file_path)[:-5]:<52} {stats['nodes']:>6} {stats['components']:>5} "
+              f"{stats['largest_share']:>7.1%} {stats['singletons']:>6} {stats['source_components']:>7} "
+              f"{stats['sink_components']:>5}  {solvable}")
@@ -0,0 +1,129 @@
+# Node renumbering (utilities/NodeOrder.py): locality, simulated cache misses and search time per order.
+#
+#   python benchmarks/node_order.py [--cache-kb 32] [problem.json | problem_dir ...]
+#
+# For every problem and node order: the time to build the graph, how far apart the two
+# ends of an edge are in the numbering (mean gap and share of edges inside one 64-node
+# block), and the best-of-REPEAT time of BFS, UCS and A* (geodesic). The cache column
+# replays the memory accesses of the UCS search (CSR offsets and edges of every expanded
+# node, g and stamp of every successor) through an LRU cache of 64-byte lines and reports
+# misses per expanded node. Every order must give the same UCS and A* costs.
+
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from common import problem_dirs, problem_files, problem_parser
+
+from AStar_geodesic import AStarGeodesic
+from BFS import BFS
+from UCS import UCS
+from utilities.Graph import Graph
+from utilities.NodeOrder import ORDERS, locality
+from utilities.Tracing import EXPAND, Tracer
+
+REPEAT = 3
+LINE = 64  # Bytes per cache line; every array the replay touches has 8-byte entries
+
+
+def timed(search):
+    """Best-of-REPEAT time of a search instance, and its solution."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start_time = time.perf_counter()
+        result = search.search()
+        best = min(best, time.perf_counter() - start_time)
+    solution = result[0] if isinstance(result, tuple) else result
+    return solution, best
+
+
+class ExpandSink:
+    """Tracing sink that keeps the intersections a search expands, in order."""
+
+    def __init__(self):
+        self.expanded = []
+
+    def record(self, event, node, parent, cost):
+        if event == EXPAND:
+            self.expanded.append(node)
+
+    def close(self):
+        pass
+
+
+def cache_misses(graph, expanded, cache_kb: int) -> int:
+    """Misses of an LRU cache of cache_kb KB while replaying the array accesses of UCS expansions."""
+    cache, capacity, misses = OrderedDict(), cache_kb * 1024 // LINE, 0
+    per_line = LINE // 8
+
+    def touch(name, i):
+        nonlocal misses
+        key = (name, i // per_line)
+        if key in cache:
+            cache.move_to_end(key)
+        else:
+            misses += 1
+            cache[key] = True
+            if len(cache) > capacity:
+                cache.popitem(last=False)
+
+    for u in expanded:
+        touch("offsets", u)
+        touch("offsets", u + 1)
+        for k in range(graph.offsets[u], graph.offsets[u + 1]):
+            v = graph.targets[k]
+            touch("targets", k)
+            touch("step_costs", k)
+            touch("stamp", v)
+            touch("g", v)
+    return misses
+
+
+def cost(solution):
+    return solution[-1].path_cost if solution else None
+
+
+if __name__ == "__main__":
+    parser = problem_parser("Node renumbering: locality and search time per order", problem_dirs('huge'))
+    parser.add_argument("--cache-kb", type=int, default=32, help="size of the simulated cache")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<34} {'order':<8} {'build':>7} {'mean gap':>9} {'in block':>8} {'misses/exp':>10} "
+          f"{'BFS':>8} {'UCS':>8} {'A*':>8}")
+    for json_file_path in problem_files(args.paths):
+        name = os.path.basename(json_file_path)[:-5][:34]
+        expected = None
+        for order in ORDERS:
+            bfs, ucs, astar = BFS(json_file_path), UCS(json_file_path), AStarGeodesic(json_file_path)
+            for search in (bfs, ucs, astar):
+                search.use_node_order(order)
+            start_time = time.perf_counter()
+            Graph(ucs.route_data, order)
+            build_time = time.perf_counter() - start_time
+            graph = ucs.problem.graph
+            stats = locality(graph)
+
+            _, bfs_time = timed(bfs)
+            ucs_solution, ucs_time = timed(ucs)
+            astar_solution, astar_time = timed(astar)
+
+            # One traced UCS run gives the expansion order to replay
+            sink = ExpandSink()
+            ucs.tracer = Tracer(sink)
+            ucs.search()
+            expanded = [graph.index[state_id] for state_id in sink.expanded]
+            misses = cache_misses(graph, expanded, args.cache_kb) / max(1, len(expanded))
+
+            print(f"{name:<34} {order:<8} {build_time:>6.3f}s {stats['mean_gap']:>9.1f} {stats['same_block']:>8.1%} "
+                  f"{misses:>10.2f} {bfs_time:>7.4f}s {ucs_time:>7.4f}s {astar_time:>7.4f}s")
+            costs = (cost(ucs_solution), cost(astar_solution))
+            if expected is None:
+                expected = costs
+            elif any((a is None) != (b is None) or (a is not None and abs(a - b) > 1e-9 * a)
+                     for a, b in zip(costs, expected)):
+                failures += 1
+                print("  costs differ from the input order")
+    if failures:
+        sys.exit(1)
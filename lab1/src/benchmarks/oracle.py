@@ -0,0 +1,76 @@
+# All-pairs distance oracle: build cost, size on disk and query time against UCS.
+#
+#   python benchmarks/oracle.py [--queries 200] [problem.json | problem_dir ...]
+#
+# For every map small enough for an oracle: the time to build it (one Dijkstra per
+# intersection), its size on disk and the time to read it back, then the mean time of
+# random queries answered by UCS, by an oracle lookup and by A* with the oracle as its
+# heuristic, with the nodes each expands. Every query must cost exactly what UCS finds.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from Oracle import MAX_NODES, DistanceOracle, OracleSearch, PerfectAStar
+from UCS import UCS
+
+
+def cost(solution):
+    return solution[-1].path_cost if solution else None
+
+
+if __name__ == "__main__":
+    parser = problem_parser("All-pairs distance oracle against UCS", problem_dirs('small', 'medium', 'large'))
+    parser.add_argument("--queries", type=int, default=200, help="random queries per map")
+    parser.add_argument("--max-nodes", type=int, default=MAX_NODES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<40} {'nodes':>5} {'build':>7} {'size':>9} {'load':>7}   per query: "
+          f"{'UCS':>8} {'lookup':>8} {'A*':>8}   expanded: {'UCS':>5} {'A*':>5}")
+    with tempfile.TemporaryDirectory() as directory:
+        for json_file_path in problem_files(args.paths):
+            ucs = UCS(json_file_path)
+            graph = ucs.problem.graph
+            if len(graph) > args.max_nodes:
+                continue
+            oracle_file = os.path.join(directory, os.path.basename(json_file_path) + ".oracle")
+            start_time = time.perf_counter()
+            DistanceOracle(graph).save(oracle_file)
+            build_time = time.perf_counter() - start_time
+            lookup = OracleSearch(json_file_path, args.max_nodes, oracle_file)
+            start_time = time.perf_counter()
+            lookup.oracle  # Read back from the file
+            load_time = time.perf_counter() - start_time
+            astar = PerfectAStar(json_file_path, args.max_nodes, oracle_file)
+            astar.oracle
+
+            rng = random.Random(args.seed)
+            pairs = [(rng.choice(graph.ids), rng.choice(graph.ids)) for _ in range(args.queries)]
+            times = {"ucs": 0.0, "lookup": 0.0, "astar": 0.0}
+            expanded = {"ucs": 0, "astar": 0}
+            for initial_id, goal_id in pairs:
+                results = {}
+                for name, search in (("ucs", ucs), ("lookup", lookup), ("astar", astar)):
+                    search.set_endpoints(initial_id, goal_id)
+                    search.expanded_nodes = 0
+                    start_time = time.perf_counter()
+                    results[name] = cost(search.search())
+                    times[name] += time.perf_counter() - start_time
+                    if name in expanded:
+                        expanded[name] += search.expanded_nodes
+                if results["lookup"] != results["ucs"] or results["astar"] != results["ucs"]:
+                    failures += 1
+                    print(f"  {initial_id} -> {goal_id}: costs differ {results}")
+            q = len(pairs)
+            print(f"{os.path.basename(json_file_path)[:-5][:40]:<40} {len(graph):>5} {build_time:>6.2f}s "
+                  f"{os.path.getsize(oracle_file) / 1e6:>7.2f}MB {load_time:>6.3f}s   per query: "
+                  f"{times['ucs'] / q * 1e3:>6.3f}ms {times['lookup'] / q * 1e3:>6.3f}ms {times['astar'] / q * 1e3:>6.3f}ms"
+                  f"   expanded: {expanded['ucs'] // q:>5} {expanded['astar'] // q:>5}")
+    if failures:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+# Pareto routes on travel time and distance: front size, labels and runtime per problem.
+#
+#   python benchmarks/pareto.py [--queries 20] [problem.json | problem_dir ...]
+#
+# For every problem: the problem's own query and random queries on the same map, with the
+# mean and largest front, the labels created, the best-of-REPEAT time of the problem query
+# and the mean time per random query, next to a UCS query. The fastest route of every front
+# must take exactly the fastest travel time (Dijkstra over segment times), and the shortest
+# route the shortest distance.
+
+import os
+import random
+import sys
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from Pareto import ParetoRoutes, cost_to_goal
+from UCS import UCS
+
+REPEAT = 3
+
+
+def timed(search):
+    """Best-of-REPEAT time of a search instance, and its solution."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start_time = time.perf_counter()
+        solution = search.search()
+        best = min(best, time.perf_counter() - start_time)
+    return solution, best
+
+
+def front_is_exact(search) -> bool:
+    """Whether the ends of the front are the single-criterion optima."""
+    if not search.front:
+        return True
+    graph = search.problem.graph
+    start = graph.index[search.problem.initial_state.id]
+    goal = graph.index[search.problem.goal_state.id]
+    incoming = graph.incoming_edges()
+    fastest = cost_to_goal(graph, incoming, goal, graph.costs)[start]
+    shortest = cost_to_goal(graph, incoming, goal, graph.distances)[start]
+    return abs(search.front[0][0] - fastest) <= 1e-9 * fastest and abs(search.front[-1][1] - shortest) <= 1e-9 * shortest
+
+
+if __name__ == "__main__":
+    parser = problem_parser("Pareto routes on travel time and distance", problem_dirs('large', 'huge'))
+    parser.add_argument("--queries", type=int, default=20, help="random queries per map")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<40} {'front':>5} {'labels':>7} {'time':>8} {'UCS':>8}   random: {'mean':>5} {'max':>4} "
+          f"{'labels':>7} {'per query':>10}")
+    for json_file_path in problem_files(args.paths):
+        pareto, ucs = ParetoRoutes(json_file_path), UCS(json_file_path)
+        _, pareto_time = timed(pareto)
+        _, ucs_time = timed(ucs)
+        front, labels = len(pareto.front), pareto.labels_created
+        failures += not front_is_exact(pareto)
+
+        rng = random.Random(args.seed)
+        ids = pareto.problem.graph.ids
+        sizes, created, elapsed = [], 0, 0.0
+        for _ in range(args.queries):
+            pareto.set_endpoints(rng.choice(ids), rng.choice(ids))
+            start_time = time.perf_counter()
+            pareto.search()
+            elapsed += time.perf_counter() - start_time
+            sizes.append(len(pareto.front))
+            created += pareto.labels_created
+            if not front_is_exact(pareto):
+                failures += 1
+                print(f"  {pareto.problem.initial_state.id} -> {pareto.problem.goal_state.id}: front ends are not optimal")
+        q = max(1, args.queries)
+        print(f"{os.path.basename(json_file_path)[:-5][:40]:<40} {front:>5} {labels:>7} {pareto_time:>7.4f}s "
+              f"{ucs_time:>7.4f}s   random: {sum(sizes) / q:>5.2f} {max(sizes, default=0):>4} {created // q:>7} "
+              f"{elapsed / q * 1e3:>8.2f}ms")
+    if failures:
+        sys.exit(1)
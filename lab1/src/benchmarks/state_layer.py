@@ -0,0 +1,68 @@
+# Memory and allocation comparison between Node-chain search bookkeeping and the
+# array-based SearchState, run with UCS on the huge problems.
+#
+#   python benchmarks/state_layer.py [problem_dir]
+
+import contextlib
+import glob
+import heapq
+import os
+import sys
+import time
+import tracemalloc
+
+from common import problem_dirs
+
+from UCS import UCS
+from utilities.Node import Node
+
+
+def node_chain_ucs(problem):
+    """UCS as it was written before SearchState: one Node per generated successor."""
+    frontier = [(0, Node(problem.initial_state))]
+    cost_so_far = {problem.initial_state: 0}
+    checked = set()
+    while frontier:
+        current_cost, node = heapq.heappop(frontier)
+        if problem.is_goal(node.state):
+            return node.path()
+        checked.add(node.state)
+        for child in node.expand(problem):
+            new_cost = current_cost + problem.step_cost(node.state, child.action, child.state)
+            if child.state not in cost_so_far or new_cost < cost_so_far[child.state]:
+                cost_so_far[child.state] = new_cost
+                heapq.heappush(frontier, (new_cost, child))
+    return None
+
+
+def measure(run):
+    """Run a search and return (result, seconds, peak traced bytes)."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start_time
+
+        # Second run under tracemalloc, so tracing overhead does not skew the timing
+        tracemalloc.start()
+        result = run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+if __name__ == "__main__":
+    problem_dir = sys.argv[1] if len(sys.argv) > 1 else problem_dirs('huge')[0]
+
+    print(f"{'problem':<52} {'layer':<11} {'time (s)':>9} {'peak KiB':>9}")
+    for json_file_path in sorted(glob.glob(os.path.join(problem_dir, '*.json'))):
+        ucs = UCS(json_file_path)
+        ucs.problem.graph  # Build the graph outside the measured region for both layers
+
+        legacy, legacy_time, legacy_peak = measure(lambda: node_chain_ucs(ucs.problem))
+        arrays, arrays_time, arrays_peak = measure(ucs.search)
+
+        same = [n.state.id for n in legacy or []] == [n.state.id for n in arrays or []]
+        name = os.path.basename(json_file_path)[:-5]
+        print(f"{name:<52} {'Node chain':<11} {legacy_time:>9.4f} {legacy_peak / 1024:>9.1f}")
+        print(f"{'':<52} {'SearchState':<11} {arrays_time:>9.4f} {arrays_peak / 1024:>9.1f}"
+              f"{'' if same else '  PATH MISMATCH'}")
@@ -0,0 +1,88 @@
+# Stepped searches (Search.steps): pause overhead and many queries interleaved in one thread.
+#
+#   python benchmarks/stepping.py [--queries 1000] [--batch 1 10 100 1000] [problem.json | problem_dir ...]
+#
+# For every map and algorithm: the time of the random queries run one after the other
+# with search(), then the same queries as forks stepped round-robin (utilities.Stepping)
+# with each batch size, the pauses that took and the time to first answer. Every stepped
+# query must find the same path and counts as its plain run.
+
+import os
+import random
+import sys
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from AStar_geodesic import AStarGeodesic
+from BFS import BFS
+from DFS import DFS
+from UCS import UCS
+from utilities.Stepping import RoundRobin, SearchTask
+
+ALGORITHMS = {"bfs": BFS, "dfs": DFS, "ucs": UCS, "astar": AStarGeodesic}
+
+
+def outcome(search, result):
+    """Path ids and node counts of a finished search."""
+    solution = result[0] if isinstance(result, tuple) else result
+    return [node.state.id for node in solution] if solution else None, search.generated_nodes, search.expanded_nodes
+
+
+if __name__ == "__main__":
+    parser = problem_parser("Stepped searches: pause overhead and interleaved throughput", problem_dirs('huge'))
+    parser.add_argument("--queries", type=int, default=200, help="random queries per map")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 100, 1000], help="expansions per step")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'problem':<34} {'algorithm':<6} {'batch':>6} {'total':>8} {'per query':>10} {'pauses':>8} {'first':>8}")
+    for json_file_path in problem_files(args.paths):
+        name = os.path.basename(json_file_path)[:-5][:34]
+        for algorithm in args.algorithms:
+            base = ALGORITHMS[algorithm](json_file_path)
+            rng = random.Random(args.seed)
+            ids = base.problem.graph.ids
+            pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(args.queries)]
+
+            # One query after the other, each on its own fork so counts start from zero
+            expected = []
+            start_time = time.perf_counter()
+            for initial_id, goal_id in pairs:
+                search = base.fork()
+                search.set_endpoints(initial_id, goal_id)
+                expected.append(outcome(search, search.search()))
+            total = time.perf_counter() - start_time
+            print(f"{name:<34} {algorithm:<6} {'-':>6} {total:>7.3f}s {total / len(pairs) * 1e3:>8.3f}ms "
+                  f"{0:>8} {'-':>8}")
+
+            for batch in args.batch:
+                scheduler, tasks = RoundRobin(), []
+                for initial_id, goal_id in pairs:
+                    search = base.fork()
+                    search.set_endpoints(initial_id, goal_id)
+                    tasks.append(scheduler.add(SearchTask(search, batch)))
+                pauses, first = 0, None
+
+                def on_progress(task, progress):
+                    global pauses
+                    pauses += 1
+
+                def on_done(task):
+                    global first
+                    if first is None:
+                        first = time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                scheduler.run(on_progress, on_done)
+                total = time.perf_counter() - start_time
+                print(f"{name:<34} {algorithm:<6} {batch:>6} {total:>7.3f}s {total / len(pairs) * 1e3:>8.3f}ms "
+                      f"{pauses:>8} {first * 1e3:>6.1f}ms")
+                mismatches = sum(1 for task, result in zip(tasks, expected) if outcome(task.search, task.result) != result)
+                if mismatches:
+                    failures += 1
+                    print(f"  {mismatches} stepped queries differ from search()")
+    if failures:
+        sys.exit(1)
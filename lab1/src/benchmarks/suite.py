@@ -0,0 +1,239 @@
+# End-to-end benchmark: every algorithm on every problem, verified against the anchor
+# solutions and recorded in a results database, with regression gates against a baseline.
+#
+#   python benchmarks/suite.py --sizes small,medium --repeat 5
+#   python benchmarks/suite.py --save-baseline          # record the current tree as baseline
+#   python benchmarks/suite.py --threshold 0.15         # fail if >15% slower than baseline
+
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import SRC_DIR
+
+from AStar_geodesic import AStarGeodesic
+from BFS import BFS
+from DFS import DFS
+from GBS import GreedyBestGeodesic
+from UCS import UCS
+
+# Algorithm name (as used for the anchor solution files) -> Search class
+ALGORITHMS = {
+    'breadth': BFS,
+    'depth': DFS,
+    'greedy_geodesic': GreedyBestGeodesic,
+    'a_geodesic': AStarGeodesic,
+    'uniform_cost': UCS,
+}
+SIZES = ('small', 'medium', 'large', 'huge')
+CHECKS = ('path', 'cost', 'generated', 'expanded')
+
+
+def parse_solution_file(file_path):
+    """
+    Read a solution file written by any of the search classes.
+
+    Returns:
+        dict: generated, expanded, cost (as written) and path (list of ids), or None if the
+        file records that no solution was found.
+    """
+    with open(file_path) as f:
+        text = f.read()
+    if 'Solution cost' not in text:
+        return None
+    steps = re.findall(r'(\d+) → (\d+)', text)
+    path = [int(steps[0][0])] + [int(b) for _, b in steps] if steps else []
+    return {
+        'generated': int(re.search(r'Generated nodes: (\d+)', text).group(1)),
+        'expanded': int(re.search(r'Expanded nodes: (\d+)', text).group(1)),
+        'cost': re.search(r'Solution cost: (.+)', text).group(1).strip(),
+        'path': path,
+    }
+
+
+def run_once(search_class, json_file_path, output_path=None, trace_memory=False):
+    """
+    Build and run one search, optionally writing its solution file.
+
+    Returns:
+        Tuple[Search, dict]: The search object and its timings / peak memory for this run.
+    """
+    total_start = time.perf_counter()
+    search = search_class(json_file_path)
+    if trace_memory:
+        tracemalloc.start()
+    result = search.search()
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    total = time.perf_counter() - total_start
+
+    solution = result[0] if isinstance(result, tuple) else result
+    if output_path is not None:
+        if isinstance(result, tuple):
+            search.write_solution_to_file(solution, result[1], output_path)
+        else:
+            search.write_solution_to_file(solution, output_path)
+    return search, {'search': search.metrics.wall['search'], 'total': total, 'peak_bytes': peak}
+
+
+def verify(output_path, anchor_path):
+    """
+    Compare a solution file with its anchor.
+
+    Returns:
+        dict: check name -> True/False, or None for every check when there is no anchor.
+    """
+    if not os.path.exists(anchor_path):
+        return {check: None for check in CHECKS}
+    ours, anchor = parse_solution_file(output_path), parse_solution_file(anchor_path)
+    if ours is None or anchor is None:
+        return {check: ours is None and anchor is None for check in CHECKS}
+    return {check: ours[check] == anchor[check] for check in CHECKS}
+
+
+def open_database(db_path):
+    """Open (and create if needed) the results database."""
+    db = sqlite3.connect(db_path)
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY, started TEXT, label TEXT, git_commit TEXT,
+            warmup INTEGER, repeat INTEGER, is_baseline INTEGER DEFAULT 0);
+        CREATE TABLE IF NOT EXISTS results (
+            run_id INTEGER REFERENCES runs(id), size TEXT, problem TEXT, algorithm TEXT,
+            search_min REAL, search_median REAL, search_mean REAL, search_stdev REAL,
+            total_median REAL, peak_bytes INTEGER, generated INTEGER, expanded INTEGER,
+            path_ok INTEGER, cost_ok INTEGER, generated_ok INTEGER, expanded_ok INTEGER);
+    """)
+    return db
+
+
+def git_commit():
+    """Current git commit of the tree, if available."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def baseline_results(db):
+    """Results of the most recent baseline run, keyed by (size, problem, algorithm)."""
+    row = db.execute("SELECT id FROM runs WHERE is_baseline = 1 ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        return {}
+    db.row_factory = sqlite3.Row
+    rows = db.execute("SELECT * FROM results WHERE run_id = ?", (row[0],)).fetchall()
+    db.row_factory = None
+    return {(r['size'], r['problem'], r['algorithm']): dict(r) for r in rows}
+
+
+def regressions(current, baseline, threshold):
+    """
+    Compare one benchmark case with its baseline.
+
+    A case regresses when its median search time grows by more than the threshold, when
+    its generated/expanded counts change, or when an anchor check that passed in the
+    baseline now fails.
+
+    Returns:
+        List[str]: Descriptions of the regressions found (empty if none).
+    """
+    found = []
+    if baseline['search_median'] > 0 and current['search_median'] > baseline['search_median'] * (1 + threshold):
+        change = current['search_median'] / baseline['search_median'] - 1
+        found.append(f"search time +{change:.0%}")
+    for name in ('generated', 'expanded'):
+        if current[name] != baseline[name]:
+            found.append(f"{name} {baseline[name]} -> {current[name]}")
+    for check in CHECKS:
+        if baseline[f'{check}_ok'] == 1 and current[f'{check}_ok'] == 0:
+            found.append(f"{check} no longer matches anchor")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every algorithm on every problem.")
+    parser.add_argument('--problems', default=os.path.join(SRC_DIR, 'input', 'problems'),
+                        help="root with one sub-directory of problem JSON files per size")
+    parser.add_argument('--anchors', default=os.path.join(SRC_DIR, 'ResultsAnchor', 'solutions'),
+                        help="root of the anchor solutions (<size>/<problem>/<algorithm>.txt)")
+    parser.add_argument('--sizes', default=','.join(SIZES))
+    parser.add_argument('--algorithms', default=','.join(ALGORITHMS))
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', default=os.path.join(SRC_DIR, 'benchmarks', 'results.sqlite'))
+    parser.add_argument('--label', default='')
+    parser.add_argument('--save-baseline', action='store_true', help="mark this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed relative slowdown of the median search time")
+    args = parser.parse_args()
+
+    db = open_database(args.db)
+    baseline = baseline_results(db)
+    run_id = db.execute(
+        "INSERT INTO runs (started, label, git_commit, warmup, repeat, is_baseline) VALUES (?, ?, ?, ?, ?, ?)",
+        (time.strftime('%Y-%m-%d %H:%M:%S'), args.label, git_commit(), args.warmup, args.repeat,
+         int(args.save_baseline))).lastrowid
+
+    failures = []
+    output_dir = tempfile.mkdtemp(prefix='bench_')
+    print(f"{'case':<72} {'median (ms)':>11} {'stdev':>8} {'peak KiB':>9}  anchor")
+    for size in args.sizes.split(','):
+        for json_file_path in sorted(glob.glob(os.path.join(args.problems, size, '*.json'))):
+            problem = os.path.basename(json_file_path)[:-5]
+            for algorithm in args.algorithms.split(','):
+                search_class = ALGORITHMS[algorithm]
+                for _ in range(args.warmup):
+                    run_once(search_class, json_file_path)
+                timings = [run_once(search_class, json_file_path)[1] for _ in range(args.repeat)]
+
+                # One more run under tracemalloc for the memory peak, writing the solution
+                output_path = os.path.join(output_dir, f'{size}_{problem}_{algorithm}.txt')
+                search, traced = run_once(search_class, json_file_path, output_path, trace_memory=True)
+                checks = verify(output_path, os.path.join(args.anchors, size, problem, f'{algorithm}.txt'))
+
+                times = [t['search'] for t in timings]
+                current = {
+                    'search_min': min(times), 'search_median': statistics.median(times),
+                    'search_mean': statistics.mean(times),
+                    'search_stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+                    'total_median': statistics.median(t['total'] for t in timings),
+                    'peak_bytes': traced['peak_bytes'],
+                    'generated': search.generated_nodes, 'expanded': search.expanded_nodes,
+                    **{f'{check}_ok': None if ok is None else int(ok) for check, ok in checks.items()},
+                }
+                db.execute(
+                    f"INSERT INTO results (run_id, size, problem, algorithm, {', '.join(current)}) "
+                    f"VALUES (?, ?, ?, ?, {', '.join('?' * len(current))})",
+                    (run_id, size, problem, algorithm, *current.values()))
+
+                anchor = ' '.join(check if ok else f'!{check}' for check, ok in checks.items() if ok is not None) or 'n/a'
+                case = f'{size}/{problem}/{algorithm}'
+                print(f"{case:<72} {current['search_median'] * 1000:>11.3f} {current['search_stdev'] * 1000:>8.3f} "
+                      f"{current['peak_bytes'] / 1024:>9.1f}  {anchor}")
+
+                key = (size, problem, algorithm)
+                if key in baseline and not args.save_baseline:
+                    for message in regressions(current, baseline[key], args.threshold):
+                        failures.append(f"{case}: {message}")
+    db.commit()
+
+    if failures:
+        print(f"\n{len(failures)} regression(s) against the baseline:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nRun {run_id} recorded in {args.db}" + (" as the new baseline" if args.save_baseline else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Memory and query-time overhead of time-dependent search against the static engines.
+#
+#   python benchmarks/time_dependent.py [--departures 03:00 08:15 18:30] [problem.json | problem_dir ...]
+#
+# For every problem: bytes used by the speed profiles next to the graph arrays, the static
+# UCS and A* (geodesic) times, and the time-dependent UCS and A* times and solution costs at
+# each departure time. Time-dependent UCS and A* must agree on the cost.
+
+import os
+import sys
+import time
+
+from common import problem_dirs, problem_files, problem_parser
+
+from AStar_geodesic import AStarGeodesic
+from TimeDependent import TimeDependentAStar, TimeDependentUCS, parse_departure
+from UCS import UCS
+
+REPEAT = 3
+
+
+def timed(search):
+    """Best-of-REPEAT time of a search instance, and its solution."""
+    best = float('inf')
+    for _ in range(REPEAT):
+        start_time = time.perf_counter()
+        result = search.search()
+        best = min(best, time.perf_counter() - start_time)
+    solution = result[0] if isinstance(result, tuple) else result
+    return solution, best
+
+
+def cost(solution):
+    return solution[-1].path_cost if solution else float('nan')
+
+
+if __name__ == "__main__":
+    parser = problem_parser("Time-dependent search overhead", problem_dirs('huge'))
+    parser.add_argument("--departures", nargs="+", default=["03:00", "08:15", "18:30"])
+    args = parser.parse_args()
+
+    failures = 0
+    for json_file_path in problem_files(args.paths):
+        ucs, astar = UCS(json_file_path), AStarGeodesic(json_file_path)
+        static_ucs, ucs_time = timed(ucs)
+        static_astar, astar_time = timed(astar)
+        graph = ucs.problem.full_graph
+        start_time = time.perf_counter()
+        profiles = ucs.problem.speed_profiles  # Built and FIFO-checked here
+        load_time = time.perf_counter() - start_time
+        print(f"{os.path.basename(json_file_path)[:-5]}: {len(graph)} nodes, {graph.num_edges()} edges; "
+              f"profiles {profiles.nbytes()} B (graph arrays {graph.nbytes()} B), built and checked in {load_time:.4f}s")
+        print(f"  {'static':>8}  UCS {ucs_time:.4f}s cost {cost(static_ucs):9.2f}   A* {astar_time:.4f}s cost {cost(static_astar):9.2f}")
+        for departure in args.departures:
+            seconds = parse_departure(departure)
+            td_ucs, td_ucs_time = timed(TimeDependentUCS(json_file_path, seconds))
+            td_astar, td_astar_time = timed(TimeDependentAStar(json_file_path, seconds))
+            print(f"  {departure:>8}  UCS {td_ucs_time:.4f}s cost {cost(td_ucs):9.2f} ({td_ucs_time / ucs_time:.2f}x)"
+                  f"   A* {td_astar_time:.4f}s cost {cost(td_astar):9.2f} ({td_astar_time / astar_time:.2f}x)")
+            if td_ucs and abs(cost(td_ucs) - cost(td_astar)) > 1e-6 * cost(td_ucs) + 1e-6:
+                failures += 1
+                print("  time-dependent UCS and A* disagree")
+    if failures:
+        sys.exit(1)
@@ -1,8 +1,7 @@
 import heapq
-import time  
 from typing import Dict, List
 from Search import Search
-from utilities.Node import Node
+from utilities.CommandLine import parse_arguments, run_search
 from utilities.State import State
 from utilities.RouteData import RouteData
 from datetime import timedelta
@@ -15,58 +14,97 @@ class AStar(Search):
 
     def search(self):
         """Performs the A* search algorithm."""
+        return self.run_steps(self.search_steps(None))
+
+    def search_steps(self, batch: int = None):
+        """Generator form of search(): pause every batch expansions (never if None), then return the result."""
         # Start tracking execution time
-        start_time = time.time()
+        self.metrics.begin("search")
+
+        # Per-node bookkeeping lives in preallocated arrays indexed by dense node index
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, costs = graph.offsets, graph.targets, graph.costs
+        g, parent, stamp, closed = state.g, state.parent, state.stamp, state.closed
+        generation = state.generation
+        # Goals in a component the start cannot reach are rejected without exploring
+        if not self.goal_reachable():
+            execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None, execution_time
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
 
-       
-        frontier = []
-        start_node = Node(self.problem.initial_state)
-        heapq.heappush(frontier, (self.f(start_node), start_node))
-        cost_so_far = {self.problem.initial_state: 0}
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frontier = [(self.heuristic(self.problem.initial_state), 0.0, start)]
+        peak_frontier = 1
+        pause_at = self.expanded_nodes + batch if batch else float('inf')
 
         while frontier:
-            f_cost, node = heapq.heappop(frontier)
-            print(f"Exploring: {node.state}")
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            f_cost, _, u = heapq.heappop(frontier)
+            closed[u] = 1
             self.expanded_nodes += 1  # Track expanded nodes
+            if trace:
+                trace.on_expand(u, parent[u], g[u])
 
-            if self.problem.is_goal(node.state):
-                end_time = time.time()
-                print("Goal found!")
-                return node.path(), end_time - start_time
+            if goals[u] and self.goal_reached(u):
+                u = self.goals_reached[0]  # The nearest goal reached is the solution
+                execution_time = self.metrics.end("search")
+                if trace:
+                    trace.on_goal(u, parent[u], g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u), execution_time
 
-            for action, successor, cost in self.problem.get_successors(node.state, include_cost=True):
-                new_cost = cost_so_far[node.state] + cost
-                if successor not in cost_so_far or new_cost < cost_so_far[successor]:
-                    cost_so_far[successor] = new_cost
-                    priority = new_cost + self.heuristic(successor)
-                    heapq.heappush(frontier, (priority, Node(successor, node, action, new_cost)))
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = g[u] + costs[k]
+                if stamp[v] != generation or new_cost < g[v]:
+                    state.update(v, new_cost, u, costs[k])
+                    priority = new_cost + self.heuristic(graph.state(v))
+                    heapq.heappush(frontier, (priority, new_cost, v))
                     self.generated_nodes += 1  # Track generated nodes
-                    print(f"Adding to frontier: {successor}")
-        end_time = time.time()
-        print("No solution found.")
-        return None, end_time - start_time
+                    if trace:
+                        trace.on_generate(v, u, new_cost)
+                elif trace:
+                    trace.on_prune(v, u, new_cost)
+
+            # Pause here every batch expansions when stepped (see Search.steps)
+            if self.expanded_nodes >= pause_at:
+                yield self.pause(len(frontier), peak_frontier, g[u])
+                self.resume_search()
+                pause_at = self.expanded_nodes + batch
+        execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None, execution_time
 
     def f(self, node):
         """f(n) = g(n) + h(n): Path cost + heuristic."""
         return node.path_cost + self.heuristic(node.state)
 
+    def format_solution_text(self, record):
+        """Render the solution as a numbered list of states with their coordinates."""
+        if not record.found:
+            return "No solution found.\n"
+        graph = self.problem.full_graph
+        lines = [f"Generated nodes: {record.generated}\n",
+                 f"Expanded nodes: {record.expanded}\n",
+                 f"Execution time: {record.execution_time}\n",
+                 f"Solution length: {len(record.ids) - 1}\n",
+                 f"Solution cost: {timedelta(seconds=record.cost)}\n",
+                 "Solution Path:\n"]
+        for i, state_id in enumerate(record.ids):
+            u = graph.index[state_id]
+            lines.append(f"{i + 1}: State ID {state_id} (lat: {graph.latitudes[u]}, lon: {graph.longitudes[u]})\n")
+        return "".join(lines)
+
     def write_solution_to_file(self, solution, execution_time, file_path):
         """Write the solution path and additional information to a text file."""
-        with open(file_path, 'w') as f:
-            if solution:
-                f.write(f"Generated nodes: {self.generated_nodes}\n")
-                f.write(f"Expanded nodes: {self.expanded_nodes}\n")
-                f.write(f"Execution time: {execution_time}\n")
-                f.write(f"Solution length: {len(solution) - 1}\n")
-                solution_cost = solution[-1].path_cost
-                formatted_cost = str(timedelta(seconds=solution_cost))
-                f.write(f"Solution cost: {formatted_cost}\n")
-                f.write("Solution Path:\n")
-                
-                for i, node in enumerate(solution):
-                    f.write(f"{i + 1}: State ID {node.state.id} (lat: {node.state.latitude}, lon: {node.state.longitude})\n")
-            else:
-                f.write("No solution found.\n")
+        self.write_solution(solution, execution_time, file_path)
+
 
 if __name__ == "__main__":
     def manhattan_heuristic(state, goal_state):
@@ -76,11 +114,7 @@ if __name__ == "__main__":
         
         return abs(state.latitude - goal_state.latitude) + abs(state.longitude - goal_state.longitude)
 
-    json_file_path = '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json'
-    astar = AStar(json_file_path, lambda state: manhattan_heuristic(state, astar.problem.goal_state))
-    solution, execution_time = astar.search()
-
-    if solution:
-        astar.write_solution_to_file(solution, execution_time, '/home/gabri/Inteilligent Systems/src/output/huge/astar/plaza_isabel_ii_albacete_250_0.txt')
-    else:
-        print("No solution found.")
+    args = parse_arguments("A* Search (Manhattan)", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/astar/plaza_isabel_ii_albacete_250_0.txt')
+    astar = AStar(args.problem, lambda state: manhattan_heuristic(state, astar.problem.goal_state))
+    run_search(astar, args)
@@ -2,11 +2,9 @@
 
 import heapq
 import math
-import time
 from decimal import Decimal
-from datetime import timedelta
 from Search import Search
-from utilities.Node import Node
+from utilities.CommandLine import parse_arguments, run_search
 from utilities.State import State
 
 # This class implements the A* algorithm using a geodesic (Haversine) heuristic to calculate 
@@ -16,72 +14,130 @@ class AStarGeodesic(Search):
         super().__init__(json_file_path)
         self.generated_nodes = 0  # Tracks nodes added to the frontier
         self.expanded_nodes = 0   # Tracks nodes that have been expanded
-        self.visited = {}         # Dictionary to store visited nodes and their costs
+        with self.metrics.phase("heuristic"):
+            self.prepare_heuristic()
 
     def search(self):
+        """Perform A* with the geodesic heuristic; returns (solution, execution time)."""
+        return self.run_steps(self.search_steps(None))
+
+    def search_steps(self, batch: int = None):
+        """Generator form of search(): pause every batch expansions (never if None), then return the result."""
         # Start timing the search
-        start_time = time.time()
-        
-        # Priority queue (frontier) for A* algorithm, starting with the initial state
-        frontier = []
-        start_node = Node(self.problem.initial_state)
+        self.metrics.begin("search")
         
-        # Push initial node to the frontier with its priority (f-cost)
-        heapq.heappush(frontier, (self.f(start_node), start_node))
-        
-        # Track cost from the start to each node
-        cost_so_far = {self.problem.initial_state: Decimal(0)}
-        self.visited[start_node.state.id] = Decimal(0)
+        # Per-node bookkeeping lives in preallocated arrays indexed by dense node index:
+        # g holds the cost from the start to each node, and the stamp marks visited nodes
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, costs = graph.offsets, graph.targets, graph.costs
+        g, parent, stamp, closed = state.g, state.parent, state.stamp, state.closed
+        generation = state.generation
+        # Goals in a component the start cannot reach are rejected without exploring
+        if not self.goal_reachable():
+            execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None, execution_time
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
+
+        # Priority queue (frontier) of (f-cost, path cost, node), starting with the initial state
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frontier = [(self.geodesic_heuristic(self.problem.initial_state), 0.0, start)]
+        peak_frontier = 1
+        pause_at = self.expanded_nodes + batch if batch else float('inf')
 
         while frontier:
             # Pop node with the lowest f-cost
-            f_cost, current_node = heapq.heappop(frontier)
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            f_cost, _, u = heapq.heappop(frontier)
+            closed[u] = 1
             self.expanded_nodes += 1
-
-            # Check if we've reached the goal
-            if self.problem.is_goal(current_node.state):
-                end_time = time.time()
-                return current_node.path(), end_time - start_time
+            if trace:
+                trace.on_expand(u, parent[u], g[u])
+
+            # Check if we've reached the goal (or enough of the goals)
+            if goals[u] and self.goal_reached(u):
+                u = self.goals_reached[0]  # The nearest goal reached is the solution
+                execution_time = self.metrics.end("search")
+                if trace:
+                    trace.on_goal(u, parent[u], g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u), execution_time
 
             # Explore each successor of the current node
-            for action, successor, cost in self.problem.get_successors(current_node.state, include_cost=True):
-                new_cost = cost_so_far[current_node.state] + Decimal(cost)  # g(n)
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = g[u] + costs[k]  # g(n)
 
                 # Only proceed if we have not visited this successor or found a cheaper path
-                if successor.id not in self.visited or new_cost < self.visited[successor.id]:
-                    self.visited[successor.id] = new_cost
-                    cost_so_far[successor] = new_cost
-                    priority = new_cost + self.geodesic_heuristic(successor)  # f(n) = g(n) + h(n)
-                    
+                if stamp[v] != generation or new_cost < g[v]:
+                    state.update(v, new_cost, u, costs[k])
+                    priority = Decimal(new_cost) + self.geodesic_heuristic(graph.state(v))  # f(n) = g(n) + h(n)
+
                     # Add successor to the frontier with calculated priority
-                    heapq.heappush(frontier, (priority, Node(successor, current_node, action, float(new_cost))))
+                    heapq.heappush(frontier, (priority, new_cost, v))
                     self.generated_nodes += 1  # Increment generated node count
+                    if trace:
+                        trace.on_generate(v, u, new_cost)
+                elif trace:
+                    trace.on_prune(v, u, new_cost)
+
+            # Pause here every batch expansions when stepped (see Search.steps)
+            if self.expanded_nodes >= pause_at:
+                yield self.pause(len(frontier), peak_frontier, g[u])
+                self.resume_search()
+                pause_at = self.expanded_nodes + batch
 
         # If no solution found, return None and the time taken
-        return None, time.time() - start_time
+        execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None, execution_time
 
     def f(self, node):
         # Calculates the f-cost for a node: g(n) + h(n)
         return Decimal(node.path_cost) + self.geodesic_heuristic(node.state)
 
+    def prepare_heuristic(self):
+        # Precompute the goal-side terms of the Haversine formula, which are the same for every state.
+        # With several goals the heuristic is the distance to the nearest one, which stays admissible.
+        goals = [goal for goal in self.problem.goal_states if goal.latitude is not None and goal.longitude is not None]
+        self.goal_terms = None
+        self.goal_radians = [(math.radians(goal.latitude), math.radians(goal.longitude)) for goal in goals]
+        self.goal_cosines = [math.cos(lat2) for lat2, _ in self.goal_radians]
+        self.all_goal_terms = [(Decimal(lat2), Decimal(lon2), math.cos(Decimal(lat2))) for lat2, lon2 in self.goal_radians]
+        if self.all_goal_terms:
+            self.goal_terms = self.all_goal_terms[0]
+
+    def nearest_goal_terms(self, lat1: float, lon1: float):
+        # Pick the goal closest to a point with a plain float Haversine pass, so the exact
+        # Decimal formula only runs once per state however many goals there are
+        cos_lat1 = math.cos(lat1)
+        nearest = min(range(len(self.goal_radians)), key=lambda i: math.sin((self.goal_radians[i][0] - lat1) / 2) ** 2
+                      + cos_lat1 * self.goal_cosines[i] * math.sin((self.goal_radians[i][1] - lon1) / 2) ** 2)
+        return self.all_goal_terms[nearest]
+
     def geodesic_heuristic(self, state: State) -> Decimal:
         # This heuristic calculates the straight-line (geodesic) distance to the goal using the Haversine formula.
-        goal = self.problem.goal_state
         avg_speed = Decimal(120.0)  # Speed in meters/second to estimate travel time
         
         # If coordinates are missing, return infinity to avoid this path
-        if state.latitude is None or state.longitude is None or goal.latitude is None or goal.longitude is None:
+        if state.latitude is None or state.longitude is None or self.goal_terms is None:
             return Decimal('inf')
 
         # Radius of Earth (in meters)
         R = Decimal(6371000)
         lat1, lon1 = Decimal(math.radians(state.latitude)), Decimal(math.radians(state.longitude))
-        lat2, lon2 = Decimal(math.radians(goal.latitude)), Decimal(math.radians(goal.longitude))
+        lat2, lon2, cos_lat2 = self.goal_terms if len(self.all_goal_terms) == 1 else \
+            self.nearest_goal_terms(math.radians(state.latitude), math.radians(state.longitude))
 
         # Haversine formula to calculate the distance
         dlat = lat2 - lat1
         dlon = lon2 - lon1
-        a = Decimal(math.sin(dlat / 2) ** 2) + Decimal(math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2)
+        a = Decimal(math.sin(dlat / 2) ** 2) + Decimal(math.cos(lat1) * cos_lat2 * math.sin(dlon / 2) ** 2)
         c = Decimal(2) * Decimal(math.atan2(math.sqrt(a), math.sqrt(1 - a)))
         distance = R * c
 
@@ -90,43 +146,15 @@ class AStarGeodesic(Search):
 
     def write_solution_to_file(self, solution, execution_time, file_path):
         # This function writes the solution and various metrics to a file for analysis.
-        with open(file_path, 'w') as f:
-            if solution:
-                # Write general metrics
-                f.write(f"Generated nodes: {self.generated_nodes}\n")
-                f.write(f"Expanded nodes: {self.expanded_nodes}\n")
-                f.write(f"Execution time: {str(timedelta(seconds=execution_time))}\n")
-                f.write(f"Solution length: {len(solution) - 1}\n")
-                
-                # Write the cost of the entire solution path
-                solution_cost = solution[-1].path_cost
-                f.write(f"Solution cost: {str(timedelta(seconds=solution_cost))}\n")
-                
-                # Write the solution path
-                f.write("Solution: [")
-                for i in range(len(solution) - 1):
-                    current_node = solution[i]
-                    next_node = solution[i + 1]
-                    action, cost = self.problem.get_action_and_cost(current_node.state, next_node.state)
-                    cost = Decimal(cost).quantize(Decimal('0.000000'))
-                    f.write(f"{current_node.state.id} → {next_node.state.id} ({cost})")
-                    if i < len(solution) - 2:
-                        f.write(", ")
-                f.write("]\n")
-            else:
-                f.write("No solution found.\n")
+        self.write_solution(solution, execution_time, file_path)
+
 
 # Main section for testing and running the algorithm
 if __name__ == "__main__":
-    # Load a problem from JSON and run A* Geodesic search
-    json_file_path = '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json'
-    astar = AStarGeodesic(json_file_path)
+    # Parse the input JSON and output paths (defaults below), plus --profile/--metrics/--trace
+    args = parse_arguments("A* Search (geodesic)", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/astar_geodesic/plaza_isabel_ii_albacete_250_0.txt')
+    astar = AStarGeodesic(args.problem)
     
-    # Run the search and obtain the solution and execution time
-    solution, execution_time = astar.search()
-
-    # Write solution to output file or print "No solution found"
-    if solution:
-        astar.write_solution_to_file(solution, execution_time, '/home/gabri/Inteilligent Systems/src/output/huge/astar_geodesic/plaza_isabel_ii_albacete_250_0.txt')
-    else:
-        print("No solution found.")
+    # Run the search and write the solution to the output file or print "No solution found"
+    run_search(astar, args)
@@ -0,0 +1,235 @@
+import heapq
+from KShortest import KShortestPaths
+from utilities.CommandLine import parse_arguments, run_search
+
+# Candidate routes built and filtered per query, longest plateaus first; the rest are dropped
+CANDIDATE_LIMIT = 64
+
+
+class AlternativeRoutes(KShortestPaths):
+    def __init__(self, json_file_path: str, count: int = 2, stretch: float = 0.25, sharing: float = 0.75,
+                 local: float = 0.25):
+        """
+        The optimal route plus a few meaningfully different alternatives (via-node method).
+
+        One Dijkstra tree is grown forward from the initial state and one backward from the
+        goal (the reverse pass of KShortestPaths). Every node v settled by both defines a
+        candidate route: the forward tree's path to v followed by the backward tree's path
+        from v. Candidates are tried cheapest first and accepted when they pass the usual
+        admissibility filters:
+
+        - bounded stretch: the route costs at most (1 + stretch) times the optimum;
+        - limited sharing: at most sharing times the optimum of its cost is spent on
+          segments of the optimal route or of alternatives accepted before;
+        - local optimality: around the via node, the stretch of route of cost local times
+          the optimum is itself a shortest path (the T-test), so the route has no detours.
+
+        The plateau of a candidate is the run of segments around its via node that lies in
+        both trees; every node on it gives the same route, and any part of it is a shortest
+        path. The via node is moved to the middle of the plateau, and when the T-test window
+        fits on the plateau the test passes without searching; otherwise a short A* search
+        guided by both trees looks for a shortcut. Plateaus are tried longest first, since
+        long plateaus make the best alternatives, and at most CANDIDATE_LIMIT per query. Apart
+        from those short searches, the work is the two one-to-all searches.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            count (int): Alternatives wanted besides the optimal route.
+            stretch (float): Allowed extra cost, as a fraction of the optimal cost.
+            sharing (float): Allowed cost shared with earlier routes, as a fraction of the optimal cost.
+            local (float): Length of the T-test window, as a fraction of the optimal cost.
+        """
+        super().__init__(json_file_path, count + 1)
+        self.count = count
+        self.stretch = stretch
+        self.sharing = sharing
+        self.local = local
+        self.candidates_tried = 0  # Via nodes whose route went through the filters
+        self.t_tests = 0           # T-tests that needed a search
+
+    def search(self):
+        """Find the optimal route and up to count alternatives; returns the optimal one, like UCS."""
+        self.metrics.begin("search")
+        self.paths = []
+        graph = self.problem.graph
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            return None
+        start = graph.index[self.problem.initial_state.id]
+        goal = graph.index[self.problem.goal_state.id]
+        h = self.cost_to_goal(graph, goal)
+        state = self.forward_tree(graph, start, (1 + self.stretch) * h[start])
+        g, closed, parent, stamp = state.g, state.closed, state.parent, state.stamp
+        next_hop = self._to_goal[2]
+        optimum = g[goal]
+
+        # Plateaus: chains of segments u -> w that are in both trees (w's forward parent is u
+        # and u's next hop to the goal is w). Every node on a chain gives the same route.
+        limit = (1 + self.stretch) * optimum
+        plateau_next = {}
+        for w in range(len(graph)):
+            u = parent[w]
+            if closed[w] and u != -1 and next_hop[u] == w and g[u] + h[u] <= limit:
+                plateau_next[u] = w
+        heads = set(plateau_next).difference(plateau_next.values())
+        plateaus = []
+        for first in heads:
+            last, edges = first, 0
+            while last in plateau_next:
+                last, edges = plateau_next[last], edges + 1
+            plateaus.append((g[first] - g[last], first, edges))  # Longest plateau first
+        plateaus.sort()
+
+        best = state.path(goal)
+        routes = [best]
+        shared = {(u, v) for u, v in zip(best, best[1:])}  # Segments of the routes accepted so far
+        for _, first, edges in plateaus:
+            if len(routes) > self.count or self.candidates_tried >= CANDIDATE_LIMIT:
+                break
+            if (first, plateau_next[first]) in shared:
+                continue  # A plateau of a route already accepted
+            self.candidates_tried += 1
+            # The forward tree leads to the plateau and the backward tree runs along it to the goal
+            forward = state.path(first)
+            nodes = forward + self.path_to_goal(first)[1:]
+            plateau = (len(forward) - 1, len(forward) - 1 + edges)
+            if len(set(nodes)) != len(nodes):
+                continue  # The two halves meet again: the route has a loop
+            costs = self.prefix_costs(graph, nodes)
+            if costs[-1] > limit:
+                continue
+            overlap = sum(costs[i + 1] - costs[i] for i in range(len(nodes) - 1) if (nodes[i], nodes[i + 1]) in shared)
+            if overlap > self.sharing * optimum:
+                continue
+            # The via node goes in the middle of the plateau, where the T-test window fits best
+            middle = (costs[plateau[0]] + costs[plateau[1]]) / 2
+            via = min(range(plateau[0], plateau[1] + 1), key=lambda i: abs(costs[i] - middle))
+            if not self.locally_optimal(graph, state, h, nodes, costs, via, self.local * optimum, plateau):
+                continue
+            routes.append(nodes)
+            shared.update(zip(nodes, nodes[1:]))
+
+        self.execution_time = self.metrics.end("search")
+        self.metrics.gauge("via_candidates", self.candidates_tried)
+        self.metrics.gauge("t_tests", self.t_tests)
+        with self.metrics.phase("path"):
+            self.paths = [self.route_nodes(graph, nodes) for nodes in routes]
+        self.solution_cost = self.paths[0][-1].path_cost
+        return self.paths[0]
+
+    def forward_tree(self, graph, start: int, bound: float):
+        """
+        Dijkstra from the start over every node whose cost is within a bound.
+
+        Args:
+            graph (Graph): The graph being searched.
+            start (int): Dense index of the initial state.
+            bound (float): Nodes costing more than this are left unsettled.
+
+        Returns:
+            SearchState: g and parent of the tree; closed marks the settled nodes.
+        """
+        state = self.new_search_state()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, stamp, closed = state.g, state.stamp, state.closed
+        generation = state.generation
+        state.update(start, 0.0)
+        frontier = [(0.0, start)]
+        while frontier:
+            d, u = heapq.heappop(frontier)
+            if d > bound:
+                break
+            if closed[u]:
+                continue  # Stale entry
+            closed[u] = 1
+            self.expanded_nodes += 1
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = d + step_costs[k]
+                if stamp[v] != generation or new_cost < g[v]:
+                    state.update(v, new_cost, u, step_costs[k])
+                    heapq.heappush(frontier, (new_cost, v))
+                    self.generated_nodes += 1
+        return state
+
+    def prefix_costs(self, graph, nodes):
+        """Cost from the start to every node of a route, accumulated like UCS."""
+        costs = [0.0]
+        for u, v in zip(nodes, nodes[1:]):
+            costs.append(costs[-1] + graph.step_cost(u, v))
+        return costs
+
+    def locally_optimal(self, graph, state, h, nodes, costs, via: int, window: float, plateau) -> bool:
+        """
+        T-test: check that the stretch of a route around its via node is a shortest path.
+
+        The check is an A* search between the ends of the window. Both trees give a lower
+        bound on the cost from any node u to the window's end y: h[u] - h[y] from the
+        backward tree and, for nodes the forward tree settled, g[y] - g[u]. The search
+        stops as soon as no path cheaper than the route can remain.
+
+        Args:
+            graph (Graph): The graph being searched.
+            state (SearchState): The forward tree (g, closed).
+            h (array): Cost to the goal of every node (the backward tree).
+            nodes (List[int]): The route.
+            costs (List[float]): Cost from the start to each node of the route.
+            via (int): Position of the via node on the route.
+            window (float): Cost of route to cover on each side of the via node.
+            plateau (Tuple[int, int]): First and last positions of the via node's plateau.
+
+        Returns:
+            bool: True if no shortcut exists between the ends of the window.
+        """
+        x = via
+        while x > 0 and costs[via] - costs[x] < window:
+            x -= 1
+        y = via
+        while y < len(nodes) - 1 and costs[y] - costs[via] < window:
+            y += 1
+        if plateau[0] <= x and y <= plateau[1]:
+            return True  # Part of a shortest path already
+        self.t_tests += 1
+        g, closed = state.g, state.closed
+        target = nodes[y]
+        # Allow for rounding between the different ways of summing the same costs
+        length = costs[y] - costs[x] - 1e-9 * max(costs[-1], 1.0)
+
+        def bound(u):
+            # Lower bound on the cost from u to the target
+            if closed[u]:
+                return max(h[u] - h[target], g[target] - g[u], 0.0)
+            return max(h[u] - h[target], 0.0)
+
+        best = {nodes[x]: 0.0}
+        frontier = [(bound(nodes[x]), 0.0, nodes[x])]
+        while frontier:
+            f, d, u = heapq.heappop(frontier)
+            if f >= length:
+                return True  # Every remaining path costs at least as much as the route
+            if u == target:
+                return False  # A shortcut
+            if d > best[u]:
+                continue
+            self.expanded_nodes += 1
+            for k in range(graph.offsets[u], graph.offsets[u + 1]):
+                v, new_cost = graph.targets[k], d + graph.step_costs[k]
+                if new_cost < best.get(v, float('inf')):
+                    best[v] = new_cost
+                    heapq.heappush(frontier, (new_cost + bound(v), new_cost, v))
+        return True
+
+
+def alternative_options(parser):
+    """Add the number of alternatives and the admissibility filters to the command line."""
+    parser.add_argument("--alternatives", type=int, default=2, help="alternatives besides the optimal route")
+    parser.add_argument("--stretch", type=float, default=0.25, help="allowed extra cost, as a fraction of the optimum")
+    parser.add_argument("--sharing", type=float, default=0.75, help="allowed shared cost, as a fraction of the optimum")
+    parser.add_argument("--local", type=float, default=0.25, help="T-test window, as a fraction of the optimum")
+
+
+if __name__ == "__main__":
+    args = parse_arguments("Alternative routes (via-node method)", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/alternatives/plaza_isabel_ii_albacete_250_0.txt', alternative_options)
+    search = AlternativeRoutes(args.problem, args.alternatives, args.stretch, args.sharing, args.local)
+    run_search(search, args)  # Search and write the optimal route and its alternatives
@@ -1,122 +1,186 @@
 
-import time
 from collections import deque
-from utilities.Node import Node
-from datetime import timedelta
-from decimal import Decimal, getcontext
+from itertools import chain, filterfalse
 from search_algorthims.Search import Search
-
-# Set the precision for Decimal calculations (useful for cost formatting)
-getcontext().prec = 20
+from utilities.CommandLine import parse_arguments, run_search
 
 # Breadth-First Search (BFS) implementation that uses strict node tracking with clear separation between visited and queued nodes.
 class BFS(Search):
-    def __init__(self, json_file_path: str):
+    def __init__(self, json_file_path: str, level_synchronous: bool = False):
         super().__init__(json_file_path)
         self.generated_nodes = 0  # Counts nodes added to the frontier
         self.expanded_nodes = 0   # Counts nodes that have been expanded
         self.execution_time = 0   # Tracks total execution time
         self.solution_cost = 0    # Total cost of the solution path if found
+        self.level_synchronous = level_synchronous  # Advance whole levels at once (see search_levels)
 
     def search(self):
         """Perform a BFS search with careful node tracking."""
+        return self.run_steps(self.search_steps(None))
+
+    def search_steps(self, batch: int = None):
+        """Generator form of search(): pause every batch expansions (never if None), then return the result."""
         
         # Start measuring time for performance tracking
-        start_time = time.time()
+        self.metrics.begin("search")
         
+        # Per-node bookkeeping lives in preallocated arrays indexed by dense node index
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, parent, step, stamp, closed = state.g, state.parent, state.step, state.stamp, state.closed
+        generation = state.generation
+        # Goals in a component the start cannot reach are rejected without exploring
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
+
         # Initialize frontier as a queue and add the initial state as the starting point
-        frontier = deque([Node(self.problem.initial_state)])
-        
-        # Track which nodes have been expanded or are currently in the frontier
-        visited = set()  # Nodes that have already been expanded
-        queued = {self.problem.initial_state}  # Nodes that are in the frontier to avoid re-adding
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        if self.level_synchronous and not trace and self.problem.goal_count == 1 and goals.count(1) == 1:
+            return self.search_levels(graph, state, start, goals.index(1))
+        frontier = deque([start])
+        peak_frontier = 1
+        pause_at = self.expanded_nodes + batch if batch else float('inf')
 
+        # A node is queued once its stamp matches the current generation, and visited
+        # (expanded) once its closed flag is set
         while frontier:
             # Take the next node from the frontier (FIFO)
-            node = frontier.popleft()
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            u = frontier.popleft()
             self.expanded_nodes += 1  # Count each expansion
-            print(f"Expanding: {node.state}")
+            if trace:
+                trace.on_expand(u, parent[u], g[u])
 
-            # Check if the current node is the goal
-            if self.problem.is_goal(node.state):
-                end_time = time.time()
-                self.execution_time = end_time - start_time  # Total time taken to find the solution
-                self.solution_cost = node.path_cost  # Total cost to reach the goal
-                print("Goal found!")
-                return node.path()  # Return the solution path
+            # Check if the current node is the goal (or enough of the goals)
+            if goals[u] and self.goal_reached(u):
+                self.execution_time = self.metrics.end("search")  # Total time taken to find the solution
+                u = self.goals_reached[0]  # The first goal reached is the solution
+                self.solution_cost = g[u]  # Total cost to reach the goal
+                if trace:
+                    trace.on_goal(u, parent[u], g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u)  # Return the solution path
 
             # Mark the current node as visited after expansion
-            visited.add(node.state)
-
-            # Add each child of the current node to the frontier
-            for child in node.expand(self.problem):
-                # Only add child nodes that haven't been expanded or queued
-                if child.state not in visited and child.state not in queued:
-                    frontier.append(child)  # Add child node to frontier
-                    queued.add(child.state)  # Mark it as queued
+            closed[u] = 1
+
+            # Add each successor of the current node to the frontier
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                # Only add nodes that haven't been expanded or queued
+                if stamp[v] != generation:
+                    g[v] = g[u] + step_costs[k]
+                    parent[v] = u
+                    step[v] = step_costs[k]
+                    stamp[v] = generation  # Mark it as queued
+                    frontier.append(v)  # Add node to frontier
                     self.generated_nodes += 1  # Count generated nodes
-                    print(f"Adding to frontier: {child.state}")
+                    if trace:
+                        trace.on_generate(v, u, g[v])
+                elif trace:
+                    trace.on_prune(v, u, g[u] + step_costs[k])
+
+            # Pause here every batch expansions when stepped (see Search.steps)
+            if self.expanded_nodes >= pause_at:
+                yield self.pause(len(frontier), peak_frontier, g[u])
+                self.resume_search()
+                pause_at = self.expanded_nodes + batch
 
         # If the queue is empty and the goal wasn't found
-        end_time = time.time()
-        self.execution_time = end_time - start_time
-        print("No solution found after exploring all states.")
+        self.execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
         return None
 
+    def search_levels(self, graph, state, start, goal):
+        """
+        Level-synchronous BFS: expand a whole level of the frontier per step.
+
+        Each level is advanced with bulk builtins over the CSR arrays instead of one
+        Python iteration per edge: the successor slices of the level are chained, nodes
+        seen before are filtered out against a set, and dict.fromkeys keeps the first
+        occurrence of each new node, which is the order the queue would have generated
+        them in. Parents are only looked up for the nodes on the final path, as the
+        first node of the previous level with an edge to them, which is the node the
+        queue would have generated them from. When the goal appears in a level, the
+        counts are completed for the nodes the queue would have expanded before reaching
+        it, so paths, generated and expanded counts are identical to the queue-based
+        search. Tracing needs per-node events, so a traced search always uses the queue.
+
+        Returns:
+            List[Node]: The solution path, or None if no solution was found.
+        """
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        seen = {start}
+        levels = [[start]]  # Nodes of each level, in queue order
+        peak_frontier = 1
+
+        def generate(frontier):
+            # New successors of a run of frontier nodes, in the order the queue adds them
+            successors = chain.from_iterable(map(targets.__getitem__, map(
+                slice, map(offsets.__getitem__, frontier), map(offsets.__getitem__, map((1).__add__, frontier)))))
+            return list(dict.fromkeys(filterfalse(seen.__contains__, successors)))
+
+        while goal not in seen:
+            level = generate(levels[-1])
+            if not level:
+                # Every reachable node was expanded without finding the goal
+                self.expanded_nodes += len(seen)
+                self.generated_nodes += len(seen) - 1
+                self.execution_time = self.metrics.end("search")
+                self.metrics.gauge("peak_frontier", peak_frontier)
+                self.metrics.gauge("visited_nodes", len(seen))
+                return None
+            levels.append(level)
+            seen.update(level)
+            if len(level) > peak_frontier:
+                peak_frontier = len(level)
+
+        # The queue expands every earlier level, then the goal's level up to the goal;
+        # those goal-level nodes also generate part of the next level
+        depth = len(levels) - 1
+        position = levels[depth].index(goal)
+        next_generated = len(generate(levels[depth][:position])) if position else 0
+        self.expanded_nodes += sum(map(len, levels[:depth])) + position + 1
+        self.generated_nodes += sum(map(len, levels[1:])) + next_generated
+        self.execution_time = self.metrics.end("search")
+
+        # Record g and parent along the path only, then build the Node chain as usual
+        path = [goal]
+        for d in range(depth - 1, -1, -1):
+            v = path[-1]
+            path.append(next(u for u in levels[d] if v in targets[offsets[u]:offsets[u + 1]]))
+        path.reverse()
+        for u, v in zip(path, path[1:]):
+            k = next(k for k in range(offsets[u], offsets[u + 1]) if targets[k] == v)
+            state.update(v, state.g[u] + step_costs[k], u, step_costs[k])
+        self.solution_cost = state.g[goal]
+        self.metrics.gauge("peak_frontier", peak_frontier)
+        self.metrics.gauge("visited_nodes", self.expanded_nodes)
+        with self.metrics.phase("path"):
+            return state.nodes(graph, goal)
+
     def write_solution_to_file(self, solution, file_path):
         """Write the solution path and various statistics to a file."""
-        
-        with open(file_path, 'w') as f:
-            if solution:
-                # Write node generation and expansion stats
-                f.write(f"Generated nodes: {self.generated_nodes}\n")
-                f.write(f"Expanded nodes: {self.expanded_nodes}\n")
-                
-                # Format and write execution time to match expected output format
-                formatted_execution_time = str(timedelta(seconds=self.execution_time))
-                f.write(f"Execution time: {formatted_execution_time}\n")
-                
-                # Write solution length (number of steps to reach goal)
-                f.write(f"Solution length: {len(solution) - 1}\n")
-                
-                # Format and write the cost of the solution path
-                solution_cost = solution[-1].path_cost
-                formatted_cost = str(timedelta(seconds=solution_cost))
-                f.write(f"Solution cost: {formatted_cost}\n")
-                
-                # Write the solution path, including actions and costs between states
-                f.write("Solution: [")
-                
-                for i in range(len(solution) - 1):
-                    current_node = solution[i]
-                    next_node = solution[i + 1]
-                    action, cost = self.problem.get_action_and_cost(current_node.state, next_node.state)
-                    
-                    # Format the cost for precise output
-                    cost = Decimal(cost).quantize(Decimal('0.000000'))
-                    f.write(f"{current_node.state.id} → {next_node.state.id} ({cost})")
-                    if i < len(solution) - 2:
-                        f.write(", ")
-                f.write("]\n")
-            else:
-                # If no solution was found, indicate this in the output
-                f.write("No solution found.\n")
+        self.write_solution(solution, self.execution_time, file_path)
+
 
 
 # Main block to execute BFS on a given problem instance
 if __name__ == "__main__":
-    # Define the file path for input JSON
-    json_file_path = '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json'
+    # Parse the input JSON and output paths (defaults below), plus --profile/--metrics/--trace
+    args = parse_arguments("Breadth-First Search", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/bfs/plaza_isabel_ii_albacete_250_0.txt')
     
     # Create BFS instance
-    bfs = BFS(json_file_path)
+    bfs = BFS(args.problem)
     
-    # Run BFS search and capture the solution if it exists
-    solution = bfs.search()
-
-    # Write solution details to output file or print "No solution found"
-    if solution:
-        output_path = '/home/gabri/Inteilligent Systems/src/output/huge/bfs/plaza_isabel_ii_albacete_250_0.txt'
-        bfs.write_solution_to_file(solution, output_path)
-    else:
-        print("No solution found.")
+    # Run BFS search and write solution details to the output file or print "No solution found"
+    run_search(bfs, args)
@@ -1,11 +1,5 @@
-import time
 from Search import Search
-from utilities.Node import Node
-from datetime import timedelta
-from decimal import Decimal, getcontext
-
-# Set Decimal precision for cost formatting
-getcontext().prec = 20
+from utilities.CommandLine import parse_arguments, run_search
 
 # Depth-First Search (DFS) implementation with controlled traversal and output
 class DFS(Search):
@@ -18,105 +12,252 @@ class DFS(Search):
         self.solution_cost = 0    # Store the cost of the found solution path
 
     def search(self):
-        """Perform DFS search without backtracking pruning and with node ordering for consistency."""
+        """Perform DFS search; see search_steps."""
+        return self.run_steps(self.search_steps(None))
+
+    def search_steps(self, batch: int = None):
+        """
+        Perform DFS search without backtracking pruning and with node ordering for consistency.
+
+        The frontier is a stack of frames, one per node on the current path, each holding a
+        lazy iterator over that node's remaining edges (last destination id first, the
+        order a stack of pushed successors would pop them in). Memory is O(depth) instead
+        of O(branching * depth), and the exploration order, node counts and trace events
+        are exactly those of pushing every unexpanded successor onto a stack.
+
+        As a generator it pauses every batch expansions (never if batch is None) and
+        returns the solution path, or None.
+        """
         
         # Start timing the execution
-        start_time = time.time()
+        self.metrics.begin("search")
         
-        # Initialize the frontier (stack for DFS) with the initial state
-        frontier = [Node(self.problem.initial_state)]
-        self.checked = set()  # Track expanded nodes to avoid revisiting
-
-        while frontier:
-            # Pop the last node from the stack (LIFO behavior for DFS)
-            node = frontier.pop()
-            
-            # Skip nodes already expanded
-            if node.state in self.checked:
-                continue
-
-            # Mark the current node as explored
-            print(f"Exploring: {node.state}")
-            self.checked.add(node.state)
-            self.expanded_nodes += 1
+        # Per-node bookkeeping lives in preallocated arrays indexed by dense node index
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, parent, closed = state.g, state.parent, state.closed
+        # Goals in a component the start cannot reach are rejected without exploring
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
+        # With tracing on, the expansion number of every node tells whether an edge would
+        # have been on the stack (its target was not expanded yet when its source was)
+        expanded_at = {} if trace else None
+
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frames = []
+        peak_frontier = 1
+        pause_at = self.expanded_nodes + batch if batch else float('inf')
+        u = start
 
-            # Check if we've reached the goal state
-            if self.problem.is_goal(node.state):
+        while True:
+            # Expand u: mark it as explored and check for the goal (or enough of the goals)
+            closed[u] = 1
+            self.expanded_nodes += 1
+            if trace:
+                expanded_at[u] = self.expanded_nodes
+                trace.on_expand(u, parent[u], g[u])
+            if goals[u] and self.goal_reached(u):
+                u = self.goals_reached[0]  # The first goal reached is the solution
                 # Calculate total execution time and solution cost
-                self.execution_time = time.time() - start_time
-                self.solution_cost = node.path_cost
-                print("Goal found!")
-                return node.path()  # Return the solution path
-
-            # Expand the current node to generate successors
-            successors = node.expand(self.problem)
-            
-            # Sort successors by state ID to ensure consistent traversal order
-            successors.sort(key=lambda x: x.state.id)
-
-            # Add each child to the frontier if it hasn't been expanded
-            for child in successors:
-                if child.state not in self.checked:
-                    frontier.append(child)  # Add child to the stack
+                self.execution_time = self.metrics.end("search")
+                self.solution_cost = g[u]
+                if trace:
+                    trace.on_goal(u, parent[u], g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u)  # Return the solution path
+
+            # Successors are stored sorted by state ID, which keeps the traversal order
+            # consistent. Every successor not expanded yet counts as generated now, and is
+            # visited later through the frame's iterator, last one first.
+            for k in range(offsets[u], offsets[u + 1]):
+                if not closed[targets[k]]:
                     self.generated_nodes += 1  # Track the generated nodes
-                    print(f"Adding to frontier: {child.state}")
+                    if trace:
+                        trace.on_generate(targets[k], u, g[u] + step_costs[k])
+                elif trace:
+                    trace.on_prune(targets[k], u, g[u] + step_costs[k])
+            frames.append((u, reversed(range(offsets[u], offsets[u + 1]))))
+            if len(frames) > peak_frontier:
+                peak_frontier = len(frames)
 
-        # If the stack is empty and no solution was found
-        self.execution_time = time.time() - start_time
-        print("No solution found after exploring all states.")
+            # Pause here every batch expansions when stepped (see Search.steps)
+            if self.expanded_nodes >= pause_at:
+                yield self.pause(len(frames), peak_frontier, g[u])
+                self.resume_search()
+                pause_at = self.expanded_nodes + batch
+
+            # Take the next edge to a node not expanded yet, backtracking over finished frames
+            u = -1
+            while frames:
+                source, edges = frames[-1]
+                for k in edges:
+                    v = targets[k]
+                    if not closed[v]:
+                        state.update(v, g[source] + step_costs[k], source, step_costs[k])
+                        u = v
+                        break
+                    if trace and expanded_at[v] > expanded_at[source]:
+                        # Generated by source, but expanded through another path since
+                        trace.on_prune(v, source, g[source] + step_costs[k])
+                if u != -1:
+                    break
+                frames.pop()
+            if u == -1:
+                break
+
+        # If every frame is exhausted and no solution was found
+        self.execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
         return None
 
     def write_solution_to_file(self, solution, file_path):
         """Write solution details, including node statistics and path, to a file."""
-        
-        with open(file_path, 'w') as f:
-            if solution:
-                # Write statistics on generated and expanded nodes
-                f.write(f"Generated nodes: {self.generated_nodes}\n")
-                f.write(f"Expanded nodes: {self.expanded_nodes}\n")
-                
-                # Format execution time to match expected output
-                formatted_execution_time = str(timedelta(seconds=self.execution_time))
-                f.write(f"Execution time: {formatted_execution_time}\n")
-                
-                # Write the solution length (number of steps to reach goal)
-                f.write(f"Solution length: {len(solution) - 1}\n")
-                
-                # Format and write the total cost of the solution path
-                solution_cost = solution[-1].path_cost
-                formatted_cost = str(timedelta(seconds=solution_cost))
-                f.write(f"Solution cost: {formatted_cost}\n")
-                
-                # Write out the solution path, including actions and costs
-                f.write("Solution: [")
-                
-                for i in range(len(solution) - 1):
-                    current_node = solution[i]
-                    next_node = solution[i + 1]
-                    action, cost = self.problem.get_action_and_cost(current_node.state, next_node.state)
-                    
-                    # Format cost with six decimal precision
-                    cost = Decimal(cost).quantize(Decimal('0.000000'))
-                    f.write(f"{current_node.state.id} → {next_node.state.id} ({cost})")
-                    if i < len(solution) - 2:
-                        f.write(", ")
-                f.write("]\n")
-            else:
-                # Indicate if no solution was found
-                f.write("No solution found.\n")
+        self.write_solution(solution, self.execution_time, file_path)
+
+
+class IterativeDeepeningDFS(DFS):
+    def __init__(self, json_file_path: str, max_depth: int = None, start_depth: int = 0):
+        """
+        Depth-limited DFS run with limits start_depth, start_depth + 1, ..., max_depth.
+
+        Each pass explores in the same order as DFS but never goes more than the limit of
+        segments away from the start, and re-enters an intersection reached again at a
+        shallower depth, so the first goal found is one with the fewest segments. Passes
+        stop as soon as one runs without cutting off any branch. Expanded and generated
+        nodes add up over all passes. With start_depth equal to max_depth it is a single
+        depth-limited search.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            max_depth (int): Largest depth limit, in segments (default: number of intersections - 1).
+            start_depth (int): Depth limit of the first pass.
+        """
+        super().__init__(json_file_path)
+        self.max_depth = max_depth
+        self.start_depth = start_depth
+        self.depth_limit = None  # Limit of the pass that found the solution
+
+    def search(self):
+        """Perform iterative deepening; returns the solution like DFS."""
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        state = self.new_search_state()
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
+        max_depth = len(graph) - 1 if self.max_depth is None else self.max_depth
+
+        peak_frontier = 0
+        for limit in range(self.start_depth, max_depth + 1):
+            if limit > self.start_depth:
+                state = self.new_search_state()  # Every pass starts from a clean slate
+                self.goals_reached = []
+            u, cut_off, frames = self._limited(state, goals, trace, limit)
+            peak_frontier = max(peak_frontier, frames)
+            if u != -1:
+                self.depth_limit = limit
+                self.metrics.gauge("depth_limit", limit)
+                self.execution_time = self.metrics.end("search")
+                self.solution_cost = state.g[u]
+                if trace:
+                    trace.on_goal(u, state.parent[u], state.g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u)
+            if not cut_off:
+                break  # The whole reachable map fits under the limit: deeper passes find nothing new
+
+        self.execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None
+
+    def _limited(self, state, goals, trace, limit: int):
+        # One depth-limited pass. Returns the goal reached (or -1), whether any branch was
+        # cut at the limit, and the most frames on the stack at once.
+        graph = self.problem.graph
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, parent, closed = state.g, state.parent, state.closed
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        depth = {start: 0}  # Shallowest depth each intersection was entered at in this pass
+        frames = []
+        peak_frames, cut_off = 1, False
+        u = start
+
+        while True:
+            # Expand u at depth d
+            d = depth[u]
+            closed[u] = 1
+            self.expanded_nodes += 1
+            if trace:
+                trace.on_expand(u, parent[u], g[u])
+            if goals[u] and self.goal_reached(u):
+                return self.goals_reached[0], cut_off, peak_frames
+
+            if d < limit:
+                # Successors not entered yet, or only at a greater depth, are generated
+                for k in range(offsets[u], offsets[u + 1]):
+                    v = targets[k]
+                    if depth.get(v, limit + 1) > d + 1:
+                        self.generated_nodes += 1
+                        if trace:
+                            trace.on_generate(v, u, g[u] + step_costs[k])
+                    elif trace:
+                        trace.on_prune(v, u, g[u] + step_costs[k])
+                frames.append((u, reversed(range(offsets[u], offsets[u + 1]))))
+                if len(frames) > peak_frames:
+                    peak_frames = len(frames)
+            elif offsets[u] != offsets[u + 1]:
+                cut_off = True  # A deeper pass could go on from here
+
+            # Next edge to enter, backtracking over finished frames
+            u = -1
+            while frames:
+                source, edges = frames[-1]
+                next_depth = depth[source] + 1
+                for k in edges:
+                    v = targets[k]
+                    if depth.get(v, limit + 1) > next_depth:
+                        depth[v] = next_depth
+                        state.update(v, g[source] + step_costs[k], source, step_costs[k])
+                        u = v
+                        break
+                if u != -1:
+                    break
+                frames.pop()
+            if u == -1:
+                return -1, cut_off, peak_frames
+
+
+def dfs_options(parser):
+    """Add the depth limit and iterative deepening to the command line."""
+    parser.add_argument("--max-depth", type=int, metavar="N",
+                        help="never go more than N segments from the start (depth-limited DFS)")
+    parser.add_argument("--iterative", action="store_true",
+                        help="iterative deepening: depth limits 0, 1, ... up to --max-depth")
+
 
 # Main function to run DFS on a specific problem instance
 if __name__ == "__main__":
-    # Define path to the input JSON file
-    json_file_path = '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json'
+    # Parse the input JSON and output paths (defaults below), plus --profile/--metrics/--trace
+    args = parse_arguments("Depth-First Search", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/dfs/plaza_isabel_ii_albacete_250_0.txt', dfs_options)
     
-    # Create a DFS instance and run the search
-    dfs = DFS(json_file_path)
-    solution = dfs.search()
-
-    # Write the solution to a file if found, otherwise print "No solution found"
-    if solution:
-        output_path = '/home/gabri/Inteilligent Systems/src/output/huge/dfs/plaza_isabel_ii_albacete_250_0.txt'
-        dfs.write_solution_to_file(solution, output_path)
+    # Create a DFS instance (depth-limited or iterative deepening if asked), run the search and write the solution if found
+    if args.iterative:
+        dfs = IterativeDeepeningDFS(args.problem, args.max_depth)
+    elif args.max_depth is not None:
+        dfs = IterativeDeepeningDFS(args.problem, args.max_depth, start_depth=args.max_depth)
     else:
-        print("No solution found.")
+        dfs = DFS(args.problem)
+    run_search(dfs, args)
@@ -0,0 +1,199 @@
+import multiprocessing
+from UCS import UCS
+from utilities.CommandLine import parse_arguments, run_search
+
+# Phases with fewer frontier nodes than this are relaxed in the main process, since
+# shipping a small batch to the workers costs more than relaxing it directly
+PARALLEL_MIN = 2048
+
+# Graph arrays used by the workers, set once per worker process by _share_graph
+_shared = None
+
+
+def _share_graph(offsets, targets, step_costs):
+    """Pool initializer: keep the CSR arrays in the worker (inherited as-is under fork)."""
+    global _shared
+    _shared = (offsets, targets, step_costs)
+
+
+def _requests(batch, delta, light, arrays=None):
+    """
+    Relaxation requests of a batch of frontier nodes over their light or heavy edges.
+
+    Args:
+        batch (List[Tuple[int, float]]): (node, path cost) pairs to relax.
+        delta (float): Bucket width; edges costing at most delta are light.
+        light (bool): Relax the light edges if True, the heavy edges otherwise.
+        arrays: (offsets, targets, step_costs); defaults to the arrays shared with the worker.
+
+    Returns:
+        List[Tuple[int, float, int, float]]: (node, new path cost, parent, step cost) for the
+        cheapest request per node in the batch, in the order the nodes were first reached.
+    """
+    offsets, targets, step_costs = arrays or _shared
+    best = {}
+    for u, d in batch:
+        for k in range(offsets[u], offsets[u + 1]):
+            cost = step_costs[k]
+            if (cost <= delta) is light:
+                v = targets[k]
+                new_cost = d + cost
+                if v not in best or new_cost < best[v][0]:
+                    best[v] = (new_cost, u, cost)
+    return [(v, *request) for v, request in best.items()]
+
+
+class DeltaStepping(UCS):
+    def __init__(self, json_file_path: str, delta: float = None, workers: int = 1):
+        """
+        Delta-stepping shortest paths, optionally relaxing each phase across a worker pool.
+
+        Nodes are kept in buckets of width delta by path cost. The lowest non-empty bucket
+        is emptied repeatedly by relaxing the light edges (cost <= delta) of its nodes,
+        which can only refill the same bucket or later ones; then the heavy edges of every
+        node taken from it are relaxed once. Each phase relaxes a whole batch of nodes, so
+        large phases are split across the workers, which share the graph arrays and send
+        back the cheapest request per node. Once the goal's bucket has been emptied its
+        cost is final, which is the same cost UCS finds.
+
+        The pool is started by the first phase large enough to use it and kept for later
+        searches; close() (or a with block) stops it.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            delta (float): Bucket width in seconds; defaults to the mean step cost.
+            workers (int): Processes used to relax large phases; 1 relaxes everything in
+                the main process.
+        """
+        super().__init__(json_file_path)
+        self.delta = delta
+        self.workers = workers
+        self.phases = 0    # Light and heavy relaxation phases run
+        self._pool = None  # (graph, version, pool) of the running worker pool
+
+    def worker_pool(self, graph):
+        """
+        The pool relaxing large phases, started on first use and kept across searches.
+
+        The workers hold the graph arrays they were started with, so the pool is restarted
+        when the graph is replaced (renumbered, contracted) or patched.
+
+        Args:
+            graph (Graph): The graph being searched.
+
+        Returns:
+            multiprocessing.pool.Pool: The running pool.
+        """
+        if self._pool is not None:
+            pool_graph, version, pool = self._pool
+            if pool_graph is graph and version == graph.version:
+                return pool
+            self.close()
+        pool = multiprocessing.Pool(self.workers, initializer=_share_graph,
+                                    initargs=(graph.offsets, graph.targets, graph.step_costs))
+        self._pool = (graph, graph.version, pool)
+        return pool
+
+    def close(self):
+        """Stop the worker pool, if one was started."""
+        if self._pool is not None:
+            pool = self._pool[2]
+            self._pool = None
+            pool.close()
+            pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def search(self):
+        """Perform the delta-stepping search from the initial state to the goal."""
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        state = self.new_search_state()
+        arrays = (graph.offsets, graph.targets, graph.step_costs)
+        g, parent, step, stamp = state.g, state.parent, state.step, state.stamp
+        generation = state.generation
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        start = graph.index[self.problem.initial_state.id]
+        delta = self.delta or (sum(graph.step_costs) / len(graph.step_costs) if graph.num_edges() else 1.0)
+
+        def requests(nodes, light):
+            # Relax a batch in the main process, or split it evenly across the pool
+            self.phases += 1
+            batch = [(u, g[u]) for u in nodes]
+            if self.workers <= 1 or len(batch) < PARALLEL_MIN:
+                return _requests(batch, delta, light, arrays)
+            pool = self.worker_pool(graph)
+            size = -(-len(batch) // self.workers)
+            chunks = [batch[i:i + size] for i in range(0, len(batch), size)]
+            results = pool.starmap(_requests, [(chunk, delta, light) for chunk in chunks])
+            # Merge in chunk order, so the result does not depend on the number of workers
+            best = {}
+            for result in results:
+                for v, *request in result:
+                    if v not in best or request[0] < best[v][0]:
+                        best[v] = request
+            return [(v, *request) for v, request in best.items()]
+
+        buckets = {}  # Bucket number -> nodes whose path cost falls in it
+        peak_frontier = 1
+
+        def relax(batch):
+            # Apply the requests that improve a node, moving it to its new bucket
+            for v, cost, u, step_cost in batch:
+                if stamp[v] != generation or cost < g[v]:
+                    if stamp[v] == generation and int(g[v] // delta) in buckets:
+                        buckets[int(g[v] // delta)].discard(v)
+                    g[v] = cost
+                    parent[v] = u
+                    step[v] = step_cost
+                    stamp[v] = generation
+                    buckets.setdefault(int(cost // delta), set()).add(v)
+                    self.generated_nodes += 1
+
+        state.update(start, 0.0)
+        buckets[0] = {start}
+        while buckets:
+            i = min(buckets)
+            emptied = {}  # Nodes taken from bucket i, in order
+            while buckets.get(i):
+                frontier = sorted(buckets.pop(i))
+                peak_frontier = max(peak_frontier, len(frontier))
+                self.expanded_nodes += len(frontier)
+                emptied.update(dict.fromkeys(frontier))
+                relax(requests(frontier, light=True))
+            buckets.pop(i, None)
+            # Later buckets only hold costlier paths, so the costs of the goals in this one are final
+            settled = sorted((v for v in emptied if goals[v]), key=lambda v: g[v])
+            if any(self.goal_reached(v) for v in settled):
+                self.execution_time = self.metrics.end("search")
+                goal = self.goals_reached[0]
+                self.solution_cost = g[goal]
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, goal)
+            relax(requests(emptied, light=False))
+
+        self.execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None
+
+
+def delta_options(parser):
+    """Add the bucket width and worker count to the command line."""
+    parser.add_argument("--delta", type=float, help="bucket width in seconds (default: mean step cost)")
+    parser.add_argument("--workers", type=int, default=1, help="processes relaxing large phases")
+
+
+if __name__ == "__main__":
+    args = parse_arguments("Delta-stepping shortest paths", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/delta/plaza_isabel_ii_albacete_250_0.txt', delta_options)
+    with DeltaStepping(args.problem, args.delta, args.workers) as search:
+        run_search(search, args)  # Search and write solution to file
@@ -0,0 +1,263 @@
+# External-memory BFS and UCS: the graph, frontier and visited set live on disk
+
+import argparse
+import os
+import struct
+import tempfile
+from utilities.ExternalMemory import (ExternalGraph, ExternalHeap, IOStats, RecordWriter, RunSet, ScratchFiles,
+                                      build_external, external_is_current, external_sort, read_records,
+                                      read_records_backward)
+from utilities.Metrics import Metrics
+from utilities.Node import Node
+from utilities.NodeOrder import ORDERS
+from utilities.SolutionWriter import SolutionRecord, SolutionWriter
+from utilities.State import State
+
+# Algorithms that can run in external memory; they match BFS and UCS paths and costs exactly
+ALGORITHMS = ("breadth", "uniform_cost")
+
+LEVEL = struct.Struct("<qq")          # BFS level, in queue order: node, parent
+POSITION = struct.Struct("<qq")       # Level node and its position in the level
+CANDIDATE = struct.Struct("<qqqq")    # Successor, parent's position, edge number, parent
+QUEUED = struct.Struct("<qqqq")       # Parent's position, edge number, successor, parent
+ENTRY = struct.Struct("<dqqqd")       # UCS frontier entry: cost, node, push number, parent, step cost
+SETTLED = struct.Struct("<qqdd")      # UCS settled node: node, parent, cost, step cost
+
+
+class ExternalSearch:
+    def __init__(self, data_dir: str, algorithm: str = "breadth", memory_records: int = 65536,
+                 scratch_dir: str = None):
+        """
+        Run BFS or UCS over a graph that stays on disk, with bounded memory.
+
+        The graph is read through a small block cache (utilities.ExternalMemory.ExternalGraph).
+        Everything else that grows with the search is kept as sorted runs on disk once it
+        exceeds memory_records records:
+
+        - breadth: level by level, in the style of Munagala and Ramachandran. The level's
+          nodes are sorted by index so their edges are read in one forward scan of the
+          edge file; the successors are sorted and de-duplicated, the nodes of earlier
+          levels are removed by merging against the visited set (a RunSet), and the
+          survivors are sorted back into the order the queue would have generated them.
+          Road maps are directed, so all earlier levels are subtracted, not only the last
+          two as in the undirected algorithm.
+        - uniform_cost: Dijkstra over an ExternalHeap, with settled nodes in a RunSet and
+          a settle log on disk that gives the path back in one backward scan.
+
+        Paths and costs are identical to BFS and UCS, since ties are broken the same way.
+        BFS generated/expanded counts are also identical. UCS cannot tell without a per-node
+        cost array whether a relaxation improves a node, so it pushes every relaxation and
+        skips settled nodes when popping: its generated count is the number of entries
+        pushed and its expanded count the number of nodes settled.
+
+        Args:
+            data_dir (str): Directory written by utilities.ExternalMemory.build_external.
+            algorithm (str): One of ALGORITHMS.
+            memory_records (int): Records each sort, heap or set may hold in memory.
+            scratch_dir (str): Where temporary runs go (default: the system temp directory).
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm for external search: {algorithm}")
+        self.metrics = Metrics()
+        self.io = IOStats()
+        with self.metrics.phase("load"):
+            self.graph = ExternalGraph(data_dir, self.io)
+        self.algorithm = algorithm
+        self.memory_records = memory_records
+        self.scratch_dir = scratch_dir
+        self.generated_nodes = 0
+        self.expanded_nodes = 0
+        self.execution_time = 0
+        self.peak_frontier = 0
+        self.path = []  # Dense indices of the last solution
+        self.start = self.graph.endpoint("initial")
+        self.goal = self.graph.endpoint("final")
+
+    def search(self):
+        """
+        Run the selected algorithm from the problem's initial to its final intersection.
+
+        Returns:
+            List[Node]: The solution path, or None if no solution was found.
+        """
+        self.metrics.begin("search")
+        if not self.graph.manifest["reachable"]:
+            # Rejected without exploring, like the in-memory searches
+            self.execution_time = self.metrics.end("search")
+            return None
+        with tempfile.TemporaryDirectory(dir=self.scratch_dir) as directory:
+            scratch = ScratchFiles(directory)
+            if self.algorithm == "breadth":
+                path, costs, steps = self._breadth(scratch)
+            else:
+                path, costs, steps = self._uniform_cost(scratch)
+        self.execution_time = self.metrics.end("search")
+        self.metrics.gauge("peak_frontier", self.peak_frontier)
+        self.metrics.gauge("io_bytes_read", self.io.bytes_read)
+        self.metrics.gauge("io_bytes_written", self.io.bytes_written)
+        self.metrics.gauge("scratch_files", scratch.count)
+        if path is None:
+            return None
+        with self.metrics.phase("path"):
+            return self._nodes(path, costs, steps)
+
+    def _expand_level(self, level_path, visited, scratch, limit=None):
+        # Successors of a level (or of its first limit nodes) not visited yet, in queue order
+        memory, io = self.memory_records, self.io
+        levels = enumerate(read_records(level_path, LEVEL, io))
+        by_node = external_sort(((u, position) for position, (u, _) in levels if limit is None or position < limit),
+                                POSITION, memory, scratch, io)
+
+        def candidates():
+            # Frontier nodes come in increasing index order: one forward pass over the edges
+            for u, position in by_node:
+                for edge, (v, _) in enumerate(self.graph.successors(u)):
+                    yield v, position, edge, u
+
+        def first_occurrences(records):
+            # Sorted by successor, then queue order: the first record of each node wins
+            previous = -1
+            for v, position, edge, u in records:
+                if v != previous:
+                    previous = v
+                    yield v, position, edge, u
+
+        new = visited.difference(first_occurrences(external_sort(candidates(), CANDIDATE, memory, scratch, io)))
+        return ((v, u) for _, _, v, u in external_sort(((position, edge, v, u) for v, position, edge, u in new),
+                                                          QUEUED, memory, scratch, io))
+
+    def _breadth(self, scratch):
+        # Same results as BFS.search_levels: whole levels, nodes in the order the queue holds them
+        io = self.io
+        visited = RunSet(scratch, io, self.memory_records)
+        visited.add(self.start)
+        writer = RecordWriter(scratch.new("level"), LEVEL, io)
+        writer.write((self.start, -1))
+        writer.close()
+        levels = [writer]
+        self.peak_frontier = 1
+        position = 0 if self.start == self.goal else None
+        while position is None:
+            writer = RecordWriter(scratch.new("level"), LEVEL, io)
+            for v, u in self._expand_level(levels[-1].path, visited, scratch):
+                if v == self.goal:
+                    position = writer.count
+                writer.write((v, u))
+            writer.close()
+            if writer.count == 0:
+                # Every reachable node was expanded without finding the goal
+                self.expanded_nodes += visited.count
+                self.generated_nodes += visited.count - 1
+                return None, None, None
+            for v, _ in read_records(writer.path, LEVEL, io):
+                visited.add(v)
+            levels.append(writer)
+            self.peak_frontier = max(self.peak_frontier, writer.count)
+
+        # The queue expands every earlier level, then the goal's level up to the goal;
+        # those goal-level nodes also generate part of the next level
+        depth = len(levels) - 1
+        next_generated = sum(1 for _ in self._expand_level(levels[depth].path, visited, scratch, position)) \
+            if position else 0
+        self.expanded_nodes += sum(level.count for level in levels[:depth]) + position + 1
+        self.generated_nodes += sum(level.count for level in levels[1:]) + next_generated
+
+        # Parents, one level file per step back to the start
+        path, wanted = [self.goal], self.goal
+        for level in reversed(levels[1:]):
+            wanted = next(u for v, u in read_records(level.path, LEVEL, io) if v == wanted)
+            path.append(wanted)
+        path.reverse()
+        costs, steps = [0.0], [0.0]
+        for u, v in zip(path, path[1:]):
+            steps.append(self.graph.edge_cost(u, v))
+            costs.append(costs[-1] + steps[-1])
+        return path, costs, steps
+
+    def _uniform_cost(self, scratch):
+        # Same pop order as UCS: (cost, node), with the first push of the best cost as parent
+        io = self.io
+        frontier = ExternalHeap(ENTRY, self.memory_records, scratch, io)
+        settled = RunSet(scratch, io, self.memory_records)
+        log = RecordWriter(scratch.new("settled"), SETTLED, io)
+        frontier.push((0.0, self.start, 0, -1, 0.0))
+        pushes = 0
+        found = False
+        while len(frontier):
+            self.peak_frontier = max(self.peak_frontier, len(frontier))
+            cost, u, _, parent, step = frontier.pop()
+            if u in settled:
+                continue  # Stale entry
+            settled.add(u)
+            log.write((u, parent, cost, step))
+            self.expanded_nodes += 1
+            if u == self.goal:
+                found = True
+                break
+            for v, step_cost in self.graph.successors(u):
+                pushes += 1
+                frontier.push((cost + step_cost, v, pushes, u, step_cost))
+        self.generated_nodes += pushes
+        self.metrics.gauge("frontier_spills", frontier.spills)
+        log.close()
+        if not found:
+            return None, None, None
+
+        # Parents are settled before their children: one backward scan of the log
+        path, costs, steps, wanted = [], [], [], self.goal
+        for u, parent, cost, step in read_records_backward(log.path, SETTLED, io):
+            if u == wanted:
+                path.append(u)
+                costs.append(cost)
+                steps.append(step)
+                wanted = parent
+        path.reverse()
+        costs.reverse()
+        steps.reverse()
+        return path, costs, steps
+
+    def _nodes(self, path, costs, steps):
+        # Build the Node chain for the solution only, like SearchState.nodes
+        self.path = path
+        nodes = []
+        for depth, (v, cost, step) in enumerate(zip(path, costs, steps)):
+            state = State(*self.graph.node(v))
+            previous = nodes[-1] if nodes else None
+            action = f"move to {state.id}" if previous else None
+            nodes.append(Node(state, previous, action, cost, depth, step if previous else 0.0))
+        return nodes
+
+    def write_solution_to_file(self, solution, file_path):
+        """Write the solution path and various statistics to a file."""
+        ids = [node.state.id for node in solution] if solution else []
+        edge_costs = [node.step_cost for node in solution[1:]] if solution else []
+        cost = solution[-1].path_cost if solution else 0.0
+        with self.metrics.phase("write"), SolutionWriter(file_path) as writer:
+            writer.write(SolutionRecord(ids, edge_costs, cost, self.generated_nodes, self.expanded_nodes,
+                                        self.execution_time))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BFS or UCS over a graph kept on disk, with bounded memory.")
+    parser.add_argument("problem", help="problem JSON; it is written out in external format on first use "
+                                        "and again whenever it changes")
+    parser.add_argument("output", help="solution file to write")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="breadth")
+    parser.add_argument("--data-dir", help="external graph directory (default: <problem>.external)")
+    parser.add_argument("--memory-records", type=int, default=65536,
+                        help="records each sort, frontier or visited set may hold in memory")
+    parser.add_argument("--node-order", choices=ORDERS, default="input",
+                        help="node numbering of the external graph (rebuilt if it was written in another)")
+    parser.add_argument("--scratch-dir", help="directory for temporary runs (default: system temp)")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or os.path.splitext(args.problem)[0] + ".external"
+    if not external_is_current(args.problem, data_dir, args.node_order):
+        build_external(args.problem, data_dir, args.node_order)
+    external = ExternalSearch(data_dir, args.algorithm, args.memory_records, args.scratch_dir)
+    solution = external.search()
+    if solution:
+        external.write_solution_to_file(solution, args.output)
+    else:
+        print("No solution found.")
+    print(f"I/O: {external.io.bytes_read} bytes read, {external.io.bytes_written} bytes written")
@@ -1,10 +1,8 @@
 import heapq
 import math
-import time
-from datetime import timedelta
 from decimal import Decimal, getcontext
 from Search import Search
-from utilities.Node import Node
+from utilities.CommandLine import parse_arguments, run_search
 from utilities.State import State
 
 # Set precision for Decimal calculations
@@ -17,66 +15,121 @@ class GreedyBestGeodesic(Search):
         super().__init__(json_file_path)
         self.generated_nodes = 0
         self.expanded_nodes = 0
+        with self.metrics.phase("heuristic"):
+            self.prepare_heuristic()
 
     def search(self):
         """Execute Greedy Best-First Search using only the geodesic heuristic for node ordering."""
+        return self.run_steps(self.search_steps(None))
+
+    def search_steps(self, batch: int = None):
+        """Generator form of search(): pause every batch expansions (never if None), then return the result."""
         
         # Start tracking execution time
-        start_time = time.time()
+        self.metrics.begin("search")
         
-        # Initialize priority queue (frontier) and add the start node
-        frontier = []
-        start_node = Node(self.problem.initial_state)
-        heapq.heappush(frontier, (self.geodesic_heuristic(start_node.state), start_node))
-        self.checked.add(start_node.state)  # Track explored nodes
+        # Per-node bookkeeping lives in preallocated arrays indexed by dense node index;
+        # a node is checked once its stamp matches the current generation
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, costs = graph.offsets, graph.targets, graph.costs
+        g, parent, stamp, closed = state.g, state.parent, state.stamp, state.closed
+        generation = state.generation
+        # Goals in a component the start cannot reach are rejected without exploring
+        if not self.goal_reachable():
+            execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None, execution_time
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
+
+        # Initialize priority queue (frontier) of (heuristic, path cost, node) and add the start node
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)  # Track explored nodes
+        frontier = [(self.geodesic_heuristic(self.problem.initial_state), 0.0, start)]
+        peak_frontier = 1
+        pause_at = self.expanded_nodes + batch if batch else float('inf')
 
         while frontier:
             # Pop node with the lowest heuristic value
-            _, current_node = heapq.heappop(frontier)
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            _, _, u = heapq.heappop(frontier)
+            closed[u] = 1
             self.expanded_nodes += 1
+            if trace:
+                trace.on_expand(u, parent[u], g[u])
 
-            print(f"Exploring: {current_node.state}")
-
-            # Check if the current node is the goal
-            if self.problem.is_goal(current_node.state):
-                end_time = time.time()
-                print("Goal found!")
-                execution_time = end_time - start_time
-                return current_node.path(), execution_time
+            # Check if the current node is the goal (or enough of the goals)
+            if goals[u] and self.goal_reached(u):
+                u = self.goals_reached[0]  # The first goal reached is the solution
+                execution_time = self.metrics.end("search")
+                if trace:
+                    trace.on_goal(u, parent[u], g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u), execution_time
 
             # Expand current node, adding successors to the frontier if not explored
-            for action, successor, cost in self.problem.get_successors(current_node.state, include_cost=True):
-                if successor not in self.checked:
-                    self.checked.add(successor)
-                    priority = self.geodesic_heuristic(successor)  # Use heuristic value for ordering
-                    heapq.heappush(frontier, (priority, Node(successor, current_node, action, current_node.path_cost + cost)))
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if stamp[v] != generation:
+                    state.update(v, g[u] + costs[k], u, costs[k])
+                    priority = self.geodesic_heuristic(graph.state(v))  # Use heuristic value for ordering
+                    heapq.heappush(frontier, (priority, g[v], v))
                     self.generated_nodes += 1
-                    print(f"Adding to frontier: {successor}")
+                    if trace:
+                        trace.on_generate(v, u, g[v])
+                elif trace:
+                    trace.on_prune(v, u, g[u] + costs[k])
+
+            # Pause here every batch expansions when stepped (see Search.steps)
+            if self.expanded_nodes >= pause_at:
+                yield self.pause(len(frontier), peak_frontier, g[u])
+                self.resume_search()
+                pause_at = self.expanded_nodes + batch
+
+        execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None, execution_time
 
-        print("No solution found.")
-        return None, 0
+    def prepare_heuristic(self):
+        """Precompute the goal-side terms of the Haversine formula, which are the same for every state."""
+        goals = [goal for goal in self.problem.goal_states if goal.latitude is not None and goal.longitude is not None]
+        self.goal_terms = None
+        self.goal_radians = [(math.radians(goal.latitude), math.radians(goal.longitude)) for goal in goals]
+        self.goal_cosines = [math.cos(lat2) for lat2, _ in self.goal_radians]
+        self.all_goal_terms = [(Decimal(lat2), Decimal(lon2), math.cos(Decimal(lat2))) for lat2, lon2 in self.goal_radians]
+        if self.all_goal_terms:
+            self.goal_terms = self.all_goal_terms[0]
+
+    def nearest_goal_terms(self, lat1: float, lon1: float):
+        """Goal-side terms of the goal closest to a point, found with a plain float Haversine pass."""
+        cos_lat1 = math.cos(lat1)
+        nearest = min(range(len(self.goal_radians)), key=lambda i: math.sin((self.goal_radians[i][0] - lat1) / 2) ** 2
+                      + cos_lat1 * self.goal_cosines[i] * math.sin((self.goal_radians[i][1] - lon1) / 2) ** 2)
+        return self.all_goal_terms[nearest]
 
     def geodesic_heuristic(self, state: State) -> float:
         """Calculate the geodesic distance (using Haversine formula) to approximate travel time to the goal."""
         
-        goal = self.problem.goal_state
         avg_speed = Decimal(120.0)  # Tuned average speed in meters per second
         
         # Return high cost if coordinates are missing
-        if state.latitude is None or state.longitude is None or goal.latitude is None or goal.longitude is None:
+        if state.latitude is None or state.longitude is None or self.goal_terms is None:
             return float('inf')
 
         # Haversine formula to calculate the straight-line distance
         R = Decimal(6371000)  # Earth radius in meters
         lat1 = Decimal(math.radians(state.latitude))
         lon1 = Decimal(math.radians(state.longitude))
-        lat2 = Decimal(math.radians(goal.latitude))
-        lon2 = Decimal(math.radians(goal.longitude))
+        lat2, lon2, cos_lat2 = self.goal_terms if len(self.all_goal_terms) == 1 else \
+            self.nearest_goal_terms(math.radians(state.latitude), math.radians(state.longitude))
 
         dlat = lat2 - lat1
         dlon = lon2 - lon1
 
-        a = Decimal(math.sin(dlat / 2) ** 2) + Decimal(math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2)
+        a = Decimal(math.sin(dlat / 2) ** 2) + Decimal(math.cos(lat1) * cos_lat2 * math.sin(dlon / 2) ** 2)
         c = Decimal(2) * Decimal(math.atan2(math.sqrt(a), math.sqrt(1 - a)))
         distance = R * c  # Calculate distance in meters
 
@@ -85,52 +138,15 @@ class GreedyBestGeodesic(Search):
 
     def write_solution_to_file(self, solution, execution_time, file_path):
         """Write the solution path and search metrics to a file for analysis."""
-        
-        with open(file_path, 'w') as f:
-            if solution:
-                # Write out statistics about nodes
-                f.write(f"Generated nodes: {self.generated_nodes}\n")
-                f.write(f"Expanded nodes: {self.expanded_nodes}\n")
-                
-                # Format execution time as a timedelta for expected output
-                f.write(f"Execution time: {str(timedelta(seconds=execution_time))}\n")
-                
-                # Record solution length
-                f.write(f"Solution length: {len(solution) - 1}\n")
-                
-                # Write solution path cost, formatted for precision
-                solution_cost = solution[-1].path_cost
-                formatted_cost = str(timedelta(seconds=solution_cost))
-                f.write(f"Solution cost: {formatted_cost}\n")
-                
-                # Write each step in the solution path
-                f.write("Solution: [")
-                
-                for i in range(len(solution) - 1):
-                    current_node = solution[i]
-                    next_node = solution[i + 1]
-                    action, cost = self.problem.get_action_and_cost(current_node.state, next_node.state)
-                    cost = Decimal(cost).quantize(Decimal('0.000000'))  # Ensure six decimal places for cost
-                    f.write(f"{current_node.state.id} → {next_node.state.id} ({cost})")
-                    if i < len(solution) - 2:
-                        f.write(", ")
-                f.write("]\n")
-            else:
-                # Indicate that no solution was found
-                f.write("No solution found.\n")
+        self.write_solution(solution, execution_time, file_path)
+
 
 # Main function to execute the Greedy Best-First Search
 if __name__ == "__main__":
-    # Define path to input JSON file
-    json_file_path = '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json'
-    
-    # Create a GreedyBestGeodesic instance and start the search
-    greedy_search = GreedyBestGeodesic(json_file_path)
-    solution, execution_time = greedy_search.search()
+    # Parse the input JSON and output paths (defaults below), plus --profile/--metrics/--trace
+    args = parse_arguments("Greedy Best-First Search (geodesic)", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/gbs/plaza_isabel_ii_albacete_250_0.txt')
     
-    # Write the solution to an output file if found
-    if solution:
-        output_path = '/home/gabri/Inteilligent Systems/src/output/huge/gbs/plaza_isabel_ii_albacete_250_0.txt'
-        greedy_search.write_solution_to_file(solution, execution_time, output_path)
-    else:
-        print("No solution found.")
+    # Create a GreedyBestGeodesic instance, run the search and write the solution if found
+    greedy_search = GreedyBestGeodesic(args.problem)
+    run_search(greedy_search, args)
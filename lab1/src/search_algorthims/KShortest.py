@@ -0,0 +1,221 @@
+import heapq
+from array import array
+from UCS import UCS
+from utilities.CommandLine import parse_arguments, run_search
+from utilities.SearchState import SearchState
+from utilities.SolutionWriter import SolutionWriter
+
+
+class KShortestPaths(UCS):
+    def __init__(self, json_file_path: str, k: int = 3):
+        """
+        The k cheapest loopless routes between the initial and goal states (Yen's algorithm).
+
+        Every candidate route leaves an earlier route at some spur node and continues on the
+        cheapest way to the goal that avoids the earlier route's prefix. Instead of a fresh
+        UCS per spur, one Dijkstra pass over the reversed graph gives the exact cost from
+        every node to the goal. Removing edges and nodes can only make those costs larger,
+        so they stay an admissible heuristic for every spur search, which then expands
+        little more than the nodes of the route it returns. Spur nodes are only tried from
+        the point where a route left its parent route (Lawler's refinement), since earlier
+        spurs were already tried for the parent.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            k (int): Number of routes to find.
+        """
+        super().__init__(json_file_path)
+        self.k = k
+        self.paths = []         # Node chains of the routes found, cheapest first
+        self.spur_searches = 0  # A* searches run from spur nodes
+        self._to_goal = None    # ((graph, version, goal), cost-to-goal array, next hops) of the last reverse pass
+
+    def search(self):
+        """Find up to k loopless routes; returns the cheapest one, like UCS."""
+        self.metrics.begin("search")
+        self.paths = []
+        graph = self.problem.graph
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            return None
+        start = graph.index[self.problem.initial_state.id]
+        goal = graph.index[self.problem.goal_state.id]
+        h = self.cost_to_goal(graph, goal)
+        state = self.new_search_state()
+        blocked = bytearray(len(graph))  # Root-path nodes a spur search may not enter
+
+        first = self.spur_path(graph, state, h, start, goal, blocked, ())
+        routes = [(self.path_cost(graph, first), first, 0)]  # (cost, nodes, deviation index)
+        candidates = []  # Heap of (cost, nodes, deviation index)
+        known = {tuple(first)}
+        while len(routes) < self.k:
+            _, previous, deviation = routes[-1]
+            for j in range(deviation, len(previous) - 1):
+                spur, root = previous[j], previous[:j + 1]
+                # Edges out of the spur node already used by a route with the same prefix
+                banned = {nodes[j + 1] for _, nodes, _ in routes if nodes[:j + 1] == root}
+                for u in root[:-1]:
+                    blocked[u] = 1
+                tail = self.spur_path(graph, state, h, spur, goal, blocked, banned)
+                for u in root[:-1]:
+                    blocked[u] = 0
+                if tail is None:
+                    continue
+                nodes = root[:-1] + tail
+                if tuple(nodes) not in known:
+                    known.add(tuple(nodes))
+                    heapq.heappush(candidates, (self.path_cost(graph, nodes), nodes, j))
+            if not candidates:
+                break  # Fewer than k loopless routes exist
+            routes.append(heapq.heappop(candidates))
+
+        self.execution_time = self.metrics.end("search")
+        self.metrics.gauge("spur_searches", self.spur_searches)
+        with self.metrics.phase("path"):
+            self.paths = [self.route_nodes(graph, nodes) for _, nodes, _ in routes]
+        self.solution_cost = routes[0][0]
+        return self.paths[0]
+
+    def cost_to_goal(self, graph, goal: int) -> array:
+        """
+        Exact cost from every node to the goal, by Dijkstra over the reversed edges.
+
+        The array is kept, so further searches towards the same goal reuse it, together with
+        the next hop of every node on its cheapest way to the goal (see path_to_goal).
+
+        Args:
+            graph (Graph): The graph being searched.
+            goal (int): Dense index of the goal.
+
+        Returns:
+            array: Cost to the goal per dense node index; infinity where it cannot be reached.
+        """
+        # The graph itself is kept and compared by identity: renumbering replaces it, and
+        # the id of a freed graph can be reused by the next one
+        if self._to_goal is not None:
+            (last_graph, version, last_goal), h, _ = self._to_goal
+            if last_graph is graph and version == graph.version and last_goal == goal:
+                return h
+        n = len(graph)
+        sources, step_costs = graph.sources, graph.step_costs
+        in_offsets, incoming = graph.incoming_edges()
+
+        h = array('d', [float('inf')]) * n
+        next_hop = array('l', [-1]) * n
+        h[goal] = 0.0
+        frontier = [(0.0, goal)]
+        while frontier:
+            d, v = heapq.heappop(frontier)
+            if d > h[v]:
+                continue  # Stale entry
+            self.expanded_nodes += 1
+            for i in range(in_offsets[v], in_offsets[v + 1]):
+                k = incoming[i]
+                u = sources[k]
+                new_cost = step_costs[k] + d
+                if new_cost < h[u]:
+                    h[u] = new_cost
+                    next_hop[u] = v
+                    heapq.heappush(frontier, (new_cost, u))
+                    self.generated_nodes += 1
+        self._to_goal = ((graph, graph.version, goal), h, next_hop)
+        return h
+
+    def path_to_goal(self, u: int):
+        """
+        Cheapest way from a node to the goal of the last cost_to_goal pass.
+
+        Args:
+            u (int): Dense index to start from.
+
+        Returns:
+            List[int]: Dense indices from u to the goal.
+        """
+        next_hop = self._to_goal[2]
+        path = [u]
+        while next_hop[path[-1]] != -1:
+            path.append(next_hop[path[-1]])
+        return path
+
+    def spur_path(self, graph, state: SearchState, h: array, spur: int, goal: int, blocked: bytearray, banned):
+        """
+        Cheapest path from a spur node to the goal avoiding blocked nodes and banned first steps.
+
+        Args:
+            graph (Graph): The graph being searched.
+            state (SearchState): Scratch arrays, reset for this search.
+            h (array): Cost to the goal from every node, used as the A* heuristic.
+            spur (int): Dense index to start from.
+            goal (int): Dense index of the goal.
+            blocked (bytearray): 1 for nodes the path may not enter.
+            banned: Successors of the spur node the path may not move to first.
+
+        Returns:
+            List[int]: Dense indices from the spur node to the goal, or None if there is no path.
+        """
+        self.spur_searches += 1
+        state.reset()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, stamp, parent = state.g, state.stamp, state.parent
+        generation = state.generation
+        state.update(spur, 0.0)
+        frontier = [(h[spur], 0.0, spur)]
+        while frontier:
+            _, d, u = heapq.heappop(frontier)
+            if d > g[u]:
+                continue  # Stale entry
+            self.expanded_nodes += 1
+            if u == goal:
+                return state.path(u)
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if blocked[v] or h[v] == float('inf') or (u == spur and v in banned):
+                    continue
+                new_cost = d + step_costs[k]
+                if stamp[v] != generation or new_cost < g[v]:
+                    state.update(v, new_cost, u, step_costs[k])
+                    heapq.heappush(frontier, (new_cost + h[v], new_cost, v))
+                    self.generated_nodes += 1
+        return None
+
+    def path_cost(self, graph, nodes) -> float:
+        """Cost of a route summed from the start, the same way UCS accumulates it."""
+        cost = 0.0
+        for u, v in zip(nodes, nodes[1:]):
+            cost += graph.step_cost(u, v)
+        return cost
+
+    def route_nodes(self, graph, nodes):
+        """Build the Node chain of a route, unpacked to the original intersections if contracted."""
+        state = SearchState(len(graph))
+        previous, cost, step = -1, 0.0, 0.0
+        for u in nodes:
+            if previous != -1:
+                step = graph.step_cost(previous, u)
+                cost += step
+            state.update(u, cost, previous, step)
+            previous = u
+        return state.nodes(graph, nodes[-1])
+
+    def write_solution_to_file(self, solution, file_path):
+        """Write every route found, cheapest first, as consecutive records of one solution file."""
+        if not self.paths:
+            self.write_solution(solution, self.execution_time, file_path)
+            return
+        with self.metrics.phase("write"), \
+                SolutionWriter(file_path, self.solution_format, layout=self.format_solution_text) as writer:
+            for rank, path in enumerate(self.paths, 1):
+                writer.write(self.solution_record(path, self.execution_time, f"route {rank} of {len(self.paths)}"))
+        self.write_metrics(file_path)
+
+
+def k_options(parser):
+    """Add the number of routes to the command line."""
+    parser.add_argument("-k", type=int, default=3, help="number of loopless routes to find (default: 3)")
+
+
+if __name__ == "__main__":
+    args = parse_arguments("K shortest loopless paths (Yen)", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/kshortest/plaza_isabel_ii_albacete_250_0.txt', k_options)
+    search = KShortestPaths(args.problem, args.k)
+    run_search(search, args)  # Search and write every route to the solution file
@@ -0,0 +1,289 @@
+# All-pairs distance oracle: exact lookups and a perfect A* heuristic on small and medium maps
+
+import heapq
+import os
+import struct
+from array import array
+from UCS import UCS
+from utilities.CommandLine import parse_arguments, run_search
+from utilities.Graph import graph_fingerprint
+
+# Maps with more intersections than this are searched with plain UCS instead
+MAX_NODES = 1000
+
+# Oracle file header: magic, number of nodes, number of edges, fingerprint of the graph,
+# predecessor typecode. The header is followed by the distance matrix (float64) and the
+# predecessor matrix, both row-major by origin.
+MAGIC = b"APO1"
+HEADER = struct.Struct("<4sIIIc")
+
+
+class DistanceOracle:
+    def __init__(self, graph, dist: array = None, pred: array = None):
+        """
+        Travel time and predecessor between every pair of intersections of a graph.
+
+        dist[s * n + t] is the UCS cost from s to t (infinity if t is unreachable) and
+        pred[s * n + t] the node before t on that path (NONE if there is none). Each row is
+        one Dijkstra run from s over step costs, with the same relaxation order and ties as
+        UCS, so costs and paths are bit-for-bit the ones UCS finds. Predecessors are stored
+        as uint16 while the map has fewer than 65535 nodes.
+
+        Args:
+            graph (Graph): The graph to index.
+            dist (array): A distance matrix read from disk, instead of computing it.
+            pred (array): The matching predecessor matrix.
+        """
+        self.graph = graph
+        self.version = graph.version  # Stale once the graph is patched
+        self.n = n = len(graph)
+        self.typecode = 'H' if n < 0xFFFF else 'I'
+        self.none = 0xFFFF if self.typecode == 'H' else 0xFFFFFFFF
+        if dist is not None:
+            self.dist, self.pred = dist, pred
+            return
+        self.dist = array('d', [float('inf')]) * (n * n)
+        self.pred = array(self.typecode, [self.none]) * (n * n)
+        for s in range(n):
+            self._row(s)
+
+    def _row(self, s: int):
+        # Dijkstra from s, written straight into row s of both matrices
+        graph, n = self.graph, self.n
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        dist, pred, base = self.dist, self.pred, s * n
+        closed = bytearray(n)
+        dist[base + s] = 0.0
+        frontier = [(0.0, s)]
+        while frontier:
+            d, u = heapq.heappop(frontier)
+            if closed[u]:
+                continue  # Stale entry
+            closed[u] = 1
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = d + step_costs[k]
+                if new_cost < dist[base + v]:
+                    dist[base + v] = new_cost
+                    pred[base + v] = u
+                    heapq.heappush(frontier, (new_cost, v))
+
+    def distance(self, s: int, t: int) -> float:
+        """UCS cost from s to t, or infinity if t cannot be reached."""
+        return self.dist[s * self.n + t]
+
+    def path(self, s: int, t: int):
+        """
+        Walk the predecessors back from t to s.
+
+        Returns:
+            List[int]: Dense indices from s to t, or None if t cannot be reached.
+        """
+        base = s * self.n
+        if self.dist[base + t] == float('inf'):
+            return None
+        path = [t]
+        while path[-1] != s:
+            path.append(self.pred[base + path[-1]])
+        path.reverse()
+        return path
+
+    def nbytes(self) -> int:
+        """Memory used by the two matrices, in bytes."""
+        return self.dist.itemsize * len(self.dist) + self.pred.itemsize * len(self.pred)
+
+    def save(self, file_path: str):
+        """Write both matrices to a file, with a fingerprint of the graph they belong to."""
+        with open(file_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.n, self.graph.num_edges(), graph_fingerprint(self.graph),
+                                self.typecode.encode()))
+            self.dist.tofile(f)
+            self.pred.tofile(f)
+
+    @staticmethod
+    def load(file_path: str, graph):
+        """
+        Read an oracle written by save.
+
+        Returns:
+            DistanceOracle: The oracle, or None if the file is missing or was built for
+            another graph (different map, node order or contraction).
+        """
+        if not os.path.exists(file_path):
+            return None
+        n = len(graph)
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                return None
+            magic, nodes, edges, fingerprint, typecode = HEADER.unpack(header)
+            if magic != MAGIC or (nodes, edges) != (n, graph.num_edges()) or fingerprint != graph_fingerprint(graph):
+                return None
+            dist, pred = array('d'), array(typecode.decode())
+            dist.fromfile(f, n * n)
+            pred.fromfile(f, n * n)
+        return DistanceOracle(graph, dist, pred)
+
+
+class OracleSearch(UCS):
+    def __init__(self, json_file_path: str, max_nodes: int = MAX_NODES, oracle_file: str = None):
+        """
+        UCS answered from an all-pairs distance oracle when the map is small enough.
+
+        The oracle is built on first use (one Dijkstra per intersection) and kept in
+        oracle_file, so later runs on the same map only read it back. Every query is then a
+        matrix lookup plus a walk along the predecessors; expanded_nodes counts the path
+        nodes walked. Maps with more than max_nodes intersections fall back to UCS.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            max_nodes (int): Largest map, in intersections, to build an oracle for.
+            oracle_file (str): Where the oracle is kept (default: <problem>.oracle).
+        """
+        super().__init__(json_file_path)
+        self.max_nodes = max_nodes
+        self.oracle_file = oracle_file or os.path.splitext(json_file_path)[0] + ".oracle"
+        self._oracle = None
+
+    @property
+    def oracle(self) -> DistanceOracle:
+        """The oracle of the current graph, read from oracle_file or built and saved; None if the map is too big."""
+        graph = self.problem.graph
+        if len(graph) > self.max_nodes:
+            return None
+        if self._oracle is None or self._oracle.graph is not graph or self._oracle.version != graph.version:
+            with self.metrics.phase("oracle"):
+                self._oracle = DistanceOracle.load(self.oracle_file, graph)
+                if self._oracle is None:
+                    self._oracle = DistanceOracle(graph)
+                    self._oracle.save(self.oracle_file)
+            self.metrics.gauge("oracle_bytes", self._oracle.nbytes())
+        return self._oracle
+
+    def goal_nodes(self, graph, goals):
+        """Dense indices of the reachable goals marked by goal_mask, without scanning the mask."""
+        return list(dict.fromkeys(graph.index[goal.id] for goal in self.problem.goal_states
+                                  if goal.id in graph.index and goals[graph.index[goal.id]]))
+
+    def search(self):
+        """Look up the path to the nearest goal (or goals); returns the solution like UCS."""
+        oracle = self.oracle
+        if oracle is None:
+            return super().search()
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        state = self.new_search_state()
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        start = graph.index[self.problem.initial_state.id]
+
+        # Goals in the order UCS settles them: by cost, then by dense index
+        nearest = sorted((oracle.distance(start, u), u) for u in self.goal_nodes(graph, goals))
+        self.goals_reached = [u for _, u in nearest[:self._goals_wanted]]
+        state.update(start, 0.0)
+        for u in self.goals_reached:
+            path = oracle.path(start, u)
+            self.expanded_nodes += len(path)
+            for a, b in zip(path, path[1:]):
+                state.update(b, oracle.distance(start, b), a, oracle.distance(a, b))
+        self.execution_time = self.metrics.end("search")
+        u = self.goals_reached[0]
+        self.solution_cost = state.g[u]
+        self.record_search_stats(state, 0)
+        with self.metrics.phase("path"):
+            return state.nodes(graph, u)
+
+
+class PerfectAStar(OracleSearch):
+    def __init__(self, json_file_path: str, max_nodes: int = MAX_NODES, oracle_file: str = None):
+        """
+        A* over step costs with the oracle's exact distance to the nearest goal as heuristic.
+
+        With a perfect heuristic every node on a shortest path has f equal to the optimal
+        cost, and ties on f go to the deeper node (larger g), so the search walks straight
+        down one optimal path: it expands only the nodes on it, and generates their
+        successors. Costs equal UCS's, since both use step costs. Maps with more than
+        max_nodes intersections fall back to UCS.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            max_nodes (int): Largest map, in intersections, to build an oracle for.
+            oracle_file (str): Where the oracle is kept (default: <problem>.oracle).
+        """
+        super().__init__(json_file_path, max_nodes, oracle_file)
+
+    def search(self):
+        """Perform A* with the oracle heuristic; returns the solution like UCS."""
+        oracle = self.oracle
+        if oracle is None:
+            return UCS.search(self)
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, stamp, closed = state.g, state.stamp, state.closed
+        generation = state.generation
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        n, dist = oracle.n, oracle.dist
+        goal_list = self.goal_nodes(graph, goals)
+
+        def h(v):
+            # Exact cost to the nearest goal
+            return min(dist[v * n + u] for u in goal_list)
+
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frontier = [(h(start), -0.0, start)]  # (f, -g, node): deeper nodes first on equal f
+        peak_frontier = 1
+        while frontier:
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            _, _, u = heapq.heappop(frontier)
+            if closed[u]:
+                continue  # Stale entry
+            closed[u] = 1
+            self.expanded_nodes += 1
+
+            if goals[u] and self.goal_reached(u):
+                self.execution_time = self.metrics.end("search")
+                u = self.goals_reached[0]
+                self.solution_cost = g[u]
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u)
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = g[u] + step_costs[k]
+                if stamp[v] != generation or new_cost < g[v]:
+                    state.update(v, new_cost, u, step_costs[k])
+                    heapq.heappush(frontier, (new_cost + h(v), -new_cost, v))
+                    self.generated_nodes += 1
+
+        self.execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None
+
+
+def oracle_options(parser):
+    """Add the oracle engine, size threshold and file to the command line."""
+    parser.add_argument("--engine", choices=("lookup", "astar"), default="lookup",
+                        help="answer from the matrix, or run A* with it as the heuristic")
+    parser.add_argument("--max-nodes", type=int, default=MAX_NODES,
+                        help=f"largest map to build an oracle for (default: {MAX_NODES})")
+    parser.add_argument("--oracle-file", help="where the oracle is kept (default: <problem>.oracle)")
+
+
+if __name__ == "__main__":
+    args = parse_arguments("All-pairs distance oracle", '/home/gabri/Inteilligent Systems/src/input/problems/medium/calle_herreros_albacete_500_2.json',
+                           '/home/gabri/Inteilligent Systems/src/output/medium/oracle/calle_herreros_albacete_500_2.txt', oracle_options)
+    engine = PerfectAStar if args.engine == "astar" else OracleSearch
+    search = engine(args.problem, args.max_nodes, args.oracle_file)
+    run_search(search, args)
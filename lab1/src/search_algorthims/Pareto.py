@@ -0,0 +1,210 @@
+import heapq
+from array import array
+from bisect import bisect_right
+from UCS import UCS
+from utilities.CommandLine import parse_arguments, run_search
+from utilities.SearchState import SearchState
+from utilities.SolutionWriter import SolutionWriter
+
+
+def cost_to_goal(graph, incoming, goal: int, weights) -> array:
+    """
+    Exact cost from every node to the goal under one edge weight, by Dijkstra over the reversed edges.
+
+    Args:
+        graph (Graph): The graph being searched.
+        incoming (Tuple[array, array]): The graph's incoming_edges().
+        goal (int): Dense index of the goal.
+        weights (array): Weight of every edge, e.g. graph.costs or graph.distances.
+
+    Returns:
+        array: Cost to the goal per dense node index; infinity where it cannot be reached.
+    """
+    in_offsets, edges = incoming
+    sources = graph.sources
+    h = array('d', [float('inf')]) * len(graph)
+    h[goal] = 0.0
+    frontier = [(0.0, goal)]
+    while frontier:
+        d, v = heapq.heappop(frontier)
+        if d > h[v]:
+            continue  # Stale entry
+        for i in range(in_offsets[v], in_offsets[v + 1]):
+            k = edges[i]
+            u = sources[k]
+            new_cost = weights[k] + d
+            if new_cost < h[u]:
+                h[u] = new_cost
+                heapq.heappush(frontier, (new_cost, u))
+    return h
+
+
+class ParetoRoutes(UCS):
+    def __init__(self, json_file_path: str):
+        """
+        Every route that is not beaten on both travel time and distance (the Pareto front).
+
+        A bi-criteria label-setting search (multi-criteria Dijkstra, Martins' algorithm
+        guided like NAMOA*): a label is one way of reaching a node, with its travel time and
+        distance. Labels live in flat arrays (time, distance, node, parent label, edge), so
+        each costs a few dozen bytes and a route is read back by following parent labels.
+        Every node keeps the ids of its non-dominated labels sorted by time, which makes
+        their distances strictly decreasing: a new label is dominated exactly when the last
+        label no slower than it is also no longer, found with one bisection, and the labels
+        it dominates in turn are the run right after it.
+
+        Two reverse Dijkstra passes give the exact remaining time and distance from every
+        node to the goal. Labels are taken from the heap by time + remaining time, then
+        distance + remaining distance; both bounds are consistent, so these keys never
+        decrease along a route and a label taken from the heap is final. The same bounds
+        prune towards the target: a label whose best possible completion is dominated by a
+        route already found is dropped, as are labels at nodes that cannot reach the goal.
+
+        Travel times are those of each segment (like A*), so parallel segments are separate
+        choices. The solution is the fastest route; every route of the front is written to
+        the solution file, fastest first.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+        """
+        super().__init__(json_file_path)
+        self.front = []          # (time, distance, label) of the Pareto-optimal routes, fastest first
+        self.paths = []          # Node chains of those routes
+        self.labels_created = 0  # Labels that passed the dominance checks
+
+    def use_contraction(self):
+        # Super-edges would need summed distances as well as times
+        raise ValueError("Pareto routing runs on the full graph only")
+
+    def search(self):
+        """Find the Pareto front of routes; returns the fastest one, like UCS."""
+        self.metrics.begin("search")
+        self.front, self.paths = [], []
+        graph = self.problem.graph
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            return None
+        start = graph.index[self.problem.initial_state.id]
+        goal = graph.index[self.problem.goal_state.id]
+        offsets, targets, costs, distances = graph.offsets, graph.targets, graph.costs, graph.distances
+        incoming = graph.incoming_edges()
+        to_goal_time = cost_to_goal(graph, incoming, goal, costs)
+        to_goal_distance = cost_to_goal(graph, incoming, goal, distances)
+
+        # Label storage: one entry per label in each array
+        times, lengths = array('d', [0.0]), array('d', [0.0])
+        nodes, parents, via = array('l', [start]), array('l', [-1]), array('l', [-1])
+        alive = bytearray(b'\x01')
+        node_times = {start: [0.0]}  # Non-dominated labels of each node, sorted by time
+        node_labels = {start: [0]}
+        front_times, front_lengths = [], []  # Routes found, by time (so lengths decrease)
+
+        def beaten(t: float, d: float) -> bool:
+            # Whether a route already found is at least as good on both criteria
+            i = bisect_right(front_times, t)
+            return i > 0 and front_lengths[i - 1] <= d
+
+        frontier = [(to_goal_time[start], to_goal_distance[start], 0)]
+        peak_frontier = 1
+        while frontier:
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            f_time, f_length, label = heapq.heappop(frontier)
+            if not alive[label]:
+                continue  # Dominated after it was pushed
+            if beaten(f_time, f_length):
+                continue  # Target pruning: a route found since then is at least as good
+            u = nodes[label]
+            self.expanded_nodes += 1
+            if u == goal:
+                # Keys never decrease, so this route is slower than every route found before
+                # and shorter than all of them (or it would have been pruned)
+                front_times.append(times[label])
+                front_lengths.append(lengths[label])
+                self.front.append((times[label], lengths[label], label))
+                continue  # Going on through the goal only adds time and distance
+
+            t_u, d_u = times[label], lengths[label]
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if to_goal_time[v] == float('inf'):
+                    continue  # The goal cannot be reached from v
+                t, d = t_u + costs[k], d_u + distances[k]
+                if beaten(t + to_goal_time[v], d + to_goal_distance[v]):
+                    continue
+
+                # Dominance against the labels of v
+                v_times = node_times.get(v)
+                if v_times is None:
+                    v_times, v_labels = [], []
+                    node_times[v], node_labels[v] = v_times, v_labels
+                    i = 0
+                else:
+                    v_labels = node_labels[v]
+                    i = bisect_right(v_times, t)
+                    if i > 0 and lengths[v_labels[i - 1]] <= d:
+                        continue  # A label no slower and no longer is already there
+                    # The new label dominates the run of labels after it that are no shorter
+                    j = i
+                    while j < len(v_labels) and lengths[v_labels[j]] >= d:
+                        alive[v_labels[j]] = 0
+                        j += 1
+                    del v_times[i:j], v_labels[i:j]
+
+                new = len(times)
+                times.append(t)
+                lengths.append(d)
+                nodes.append(v)
+                parents.append(label)
+                via.append(k)
+                alive.append(1)
+                v_times.insert(i, t)
+                v_labels.insert(i, new)
+                heapq.heappush(frontier, (t + to_goal_time[v], d + to_goal_distance[v], new))
+                self.generated_nodes += 1
+
+        self.labels_created = len(times)
+        self.execution_time = self.metrics.end("search")
+        self.metrics.gauge("peak_frontier", peak_frontier)
+        self.metrics.gauge("labels", len(times))
+        self.metrics.gauge("front_size", len(self.front))
+        with self.metrics.phase("path"):
+            self.paths = [self.route_nodes(graph, nodes, parents, via, label) for _, _, label in self.front]
+        self.solution_cost = self.front[0][0]
+        return self.paths[0]
+
+    def route_nodes(self, graph, nodes: array, parents: array, via: array, label: int):
+        """Build the Node chain of the route ending in a label, with travel time as the path cost."""
+        chain = []
+        while label != -1:
+            chain.append(label)
+            label = parents[label]
+        chain.reverse()
+        state = SearchState(len(graph))
+        cost, step, previous = 0.0, 0.0, -1
+        for label in chain:
+            if previous != -1:
+                step = graph.costs[via[label]]
+                cost += step
+            state.update(nodes[label], cost, previous, step)
+            previous = nodes[label]
+        return state.nodes(graph, previous)
+
+    def write_solution_to_file(self, solution, file_path):
+        """Write every route of the front, fastest first, as consecutive records of one solution file."""
+        if not self.paths:
+            self.write_solution(solution, self.execution_time, file_path)
+            return
+        with self.metrics.phase("write"), \
+                SolutionWriter(file_path, self.solution_format, layout=self.format_solution_text) as writer:
+            for rank, (path, (t, d, _)) in enumerate(zip(self.paths, self.front), 1):
+                label = f"route {rank} of {len(self.paths)}: {t:.1f} s, {d:.0f} m"
+                writer.write(self.solution_record(path, self.execution_time, label))
+        self.write_metrics(file_path)
+
+
+if __name__ == "__main__":
+    args = parse_arguments("Pareto routes (travel time and distance)", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/pareto/plaza_isabel_ii_albacete_250_0.txt')
+    search = ParetoRoutes(args.problem)
+    run_search(search, args)  # Search and write every route of the front to the solution file
@@ -0,0 +1,272 @@
+import heapq
+from collections import OrderedDict
+from typing import Tuple
+from Search import Search
+from utilities.CommandLine import parse_arguments, run_search
+from utilities.Graph import Graph, graph_fingerprint
+from utilities.SearchState import SearchState
+
+# Full shortest-path tree from one origin: distances and predecessors for every reachable node.
+class ShortestPathTree:
+    def __init__(self, graph: Graph, origin: int):
+        """
+        Run Dijkstra from a dense origin index until the whole reachable graph is settled.
+
+        Edges are weighed by their step costs, like UCS, so parallel segments cost what
+        Problem.step_cost reports and every answer matches a UCS query.
+
+        Args:
+            graph (Graph): The dense graph to search.
+            origin (int): Dense index of the origin node.
+        """
+        self.graph = graph
+        self.origin = origin
+        self.generated_nodes = 0  # Heap pushes while building the tree
+        self.expanded_nodes = 0   # Nodes settled while building the tree
+
+        self.state = SearchState(len(graph))
+        self.state.update(origin, 0.0)
+
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        dist, pred, step, stamp, closed = self.state.g, self.state.parent, self.state.step, self.state.stamp, self.state.closed
+        generation = self.state.generation
+        frontier = [(0.0, origin)]
+        while frontier:
+            d, u = heapq.heappop(frontier)
+            if closed[u]:
+                continue  # Stale entry, u was settled with a lower cost
+            closed[u] = 1
+            self.expanded_nodes += 1
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = d + step_costs[k]
+                if stamp[v] != generation or new_cost < dist[v]:
+                    dist[v] = new_cost
+                    pred[v] = u
+                    step[v] = step_costs[k]
+                    stamp[v] = generation
+                    heapq.heappush(frontier, (new_cost, v))
+                    self.generated_nodes += 1
+
+    def nbytes(self) -> int:
+        """Memory held by the distance and predecessor arrays, in bytes."""
+        return self.state.nbytes()
+
+    def reachable(self, target: int) -> bool:
+        """Check whether a dense node index is reachable from the origin."""
+        return self.state.seen(target)
+
+    def path_to(self, target: int):
+        """
+        Walk the predecessor array back from a target to the origin.
+
+        Args:
+            target (int): Dense index of the destination.
+
+        Returns:
+            List[int]: Dense indices from the origin to the target, or None if unreachable.
+        """
+        if not self.reachable(target):
+            return None
+        return self.state.path(target)
+
+    def nodes_to(self, target: int):
+        """
+        Build the Node chain for the path to a target, matching what Node.path() returns.
+
+        Args:
+            target (int): Dense index of the destination.
+
+        Returns:
+            List[Node]: Nodes from the origin to the target, or None if unreachable.
+        """
+        if not self.reachable(target):
+            return None
+        return self.state.nodes(self.graph, target)
+
+    def nodes_through(self, target: int):
+        """
+        Build the Node chain for the path to a node that a contraction collapsed into a chain.
+
+        The node can only be reached along its chain, so the path is the tree path to the
+        start of the cheapest super-edge through it, followed by the chain up to the node.
+
+        Args:
+            target (int): Dense index of the destination in the original graph.
+
+        Returns:
+            List[Node]: Nodes from the origin to the target, or None if it is in no chain
+            reached by the tree.
+        """
+        graph, g = self.graph, self.state.g
+        step_costs = graph.original.step_costs
+        best = None
+        for e, j in graph.chains_through(target):
+            u = graph.sources[e]
+            if not self.reachable(u):
+                continue
+            cost = g[u]
+            for k in graph.unpack[e][:j + 1]:
+                cost += step_costs[k]
+            if best is None or cost < best[0]:
+                best = (cost, e, j)
+        if best is None:
+            return None
+        _, e, j = best
+        u = graph.sources[e]
+        steps = graph.unpack_path(self.state.path(u), g, self.state.step)
+        cost = g[u]
+        for k in graph.unpack[e][:j + 1]:
+            cost += step_costs[k]
+            steps.append((graph.original.targets[k], cost, step_costs[k]))
+        return self.state.step_nodes(graph.original, steps)
+
+
+# Keeps shortest-path trees per (graph, origin), evicting the least-used trees over a memory budget.
+class ShortestPathTreeCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int): Memory budget for the cached distance and predecessor arrays.
+        """
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()  # key -> tree, ordered from least to most recently used
+        self.uses = {}              # key -> number of lookups served
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, graph: Graph, origin: int, key=None) -> ShortestPathTree:
+        """
+        Return the tree for an origin, building it on a miss.
+
+        Args:
+            graph (Graph): The dense graph to search.
+            origin (int): Dense index of the origin node.
+            key: Identifies the map the graph was built from. Graphs built from the same
+                file share dense indices, so passing the file path lets separate searches
+                share trees. Defaults to the graph object itself.
+
+        Returns:
+            ShortestPathTree: The cached or newly built tree.
+        """
+        cache_key = (key if key is not None else id(graph), origin)
+        tree = self.trees.get(cache_key)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(cache_key)
+        else:
+            self.misses += 1
+            tree = ShortestPathTree(graph, origin)
+            self.trees[cache_key] = tree
+            self.uses[cache_key] = 0
+            self.nbytes += tree.nbytes()
+            self._evict(keep=cache_key)
+        self.uses[cache_key] += 1
+        return tree
+
+    def _evict(self, keep):
+        """Drop the least-used trees (oldest first on ties) until the budget is met."""
+        while self.nbytes > self.max_bytes and len(self.trees) > 1:
+            victim = min((k for k in self.trees if k != keep), key=lambda k: self.uses[k])
+            self.nbytes -= self.trees.pop(victim).nbytes()
+            del self.uses[victim]
+
+    def clear(self):
+        """Forget every cached tree."""
+        self.trees.clear()
+        self.uses.clear()
+        self.nbytes = 0
+
+
+# Shortest-path queries answered from a cached tree rooted at the problem's initial state.
+class SPT(Search):
+    def __init__(self, json_file_path: str, cache: ShortestPathTreeCache = None):
+        super().__init__(json_file_path)
+        self.cache = cache if cache is not None else ShortestPathTreeCache()
+        self.generated_nodes = 0  # Heap pushes spent building the tree
+        self.expanded_nodes = 0   # Nodes settled while building the tree
+        self.execution_time = 0   # Tracks total execution time
+        self.solution_cost = 0    # Total cost of the solution path if found
+        self._numbering = {}      # id(graph) -> (graph, version, numbering), for the graphs last searched
+
+    def numbering(self, graph) -> Tuple[int, int, int]:
+        """
+        Size and fingerprint of a graph's numbering, edges and step costs, for keying cached trees.
+
+        A contraction is renumbered for every set of kept endpoints, and a patch changes
+        edges without replacing the graph, so neither the file path nor the graph object
+        says whether a cached tree still fits. The fingerprint does, and graphs built the
+        same way from the same file still share trees. The node and edge counts go with it,
+        so a 32-bit collision alone cannot hand out a tree of another graph. It is
+        recomputed only when the graph or its version changes.
+
+        Returns:
+            Tuple[int, int, int]: Number of nodes, number of edges and CRC32.
+        """
+        known = self._numbering.get(id(graph))
+        if known is None or known[0] is not graph or known[1] != graph.version:
+            if len(self._numbering) >= 2:  # A contraction and its full graph
+                self._numbering.pop(next(iter(self._numbering)))
+            known = (graph, graph.version, (len(graph), graph.num_edges(), graph_fingerprint(graph)))
+            self._numbering[id(graph)] = known
+        return known[2]
+
+    def search(self, goal_id: int = None):
+        """
+        Answer a query from the initial state by looking it up in the shortest-path tree.
+
+        With a contraction in use, a destination it collapsed into a chain is answered
+        from the contracted tree through the chain's super-edges, and one it dropped as a
+        spur from a tree over the full graph.
+
+        Args:
+            goal_id (int): Destination intersection; defaults to the problem's goal state.
+
+        Returns:
+            List[Node]: The path from the initial state to the goal, or None if unreachable.
+        """
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        goal_id = goal_id if goal_id is not None else self.problem.goal_state.id
+        through = None
+        if goal_id not in graph.index:
+            # Contracted away: answered along its chain, or on the full graph for a spur
+            full = self.problem.full_graph
+            through = full._dense(goal_id)
+            if not graph.chains_through(through):
+                graph = full
+        origin = graph.index[self.problem.initial_state.id]
+
+        # Contracted, renumbered and patched graphs each get their own trees
+        tree = self.cache.get(graph, origin, key=(self.json_file_path, *self.numbering(graph)))
+        self.generated_nodes = tree.generated_nodes
+        self.expanded_nodes = tree.expanded_nodes
+        self.execution_time = self.metrics.end("search")
+        with self.metrics.phase("path"):
+            if through is not None and graph is self.problem.graph:
+                solution = tree.nodes_through(through)
+            else:
+                solution = tree.nodes_to(graph.index[goal_id])
+
+        if solution:
+            self.solution_cost = solution[-1].path_cost
+        return solution
+
+    def write_solution_to_file(self, solution, file_path):
+        """Write the solution path and various statistics to a file."""
+        self.write_solution(solution, self.execution_time, file_path)
+
+
+
+# Main block to answer queries from the initial state of a given problem instance
+if __name__ == "__main__":
+    args = parse_arguments("Shortest-path tree queries", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/spt/plaza_isabel_ii_albacete_250_0.txt')
+
+    spt = SPT(args.problem)
+    run_search(spt, args)
+
+    # Further destinations from the same origin are answered from the cached tree
+    reachable = sum(1 for state_id in spt.problem.graph.ids if spt.search(state_id))
+    print(f"Reachable destinations: {reachable}, cache hits: {spt.cache.hits}, misses: {spt.cache.misses}")
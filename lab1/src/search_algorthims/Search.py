@@ -1,9 +1,16 @@
+import copy
 import json
+import os
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
+from utilities.MapPatch import MapPatch, PatchResult
 from utilities.Problem import Problem
 from utilities.State import State
 from utilities.RouteData import RouteData
+from utilities.SearchState import SearchState
+from utilities.Metrics import Metrics
+from utilities.SolutionWriter import SolutionRecord, SolutionWriter, format_text
+from utilities.Stepping import STEP_EXPANSIONS, SearchProgress
 
 # Abstract base class for search algorithms
 class Search(ABC):
@@ -13,8 +20,40 @@ class Search(ABC):
         initial and goal states, and an instance of the Problem to be solved.
         """
         
+        # Per-phase timings and resource peaks of this run
+        self.json_file_path = json_file_path
+        self.metrics = Metrics()
+        self.metrics_format = None  # 'json' or 'prometheus' to write metrics next to solutions
+        self.solution_format = "text"  # 'text', 'jsonl' or 'binary' solution files
+
+        # Load the map and set up the problem with its initial and goal states
+        self.problem = self.load_problem(json_file_path)
+        
+        # Initialize solution and checked nodes tracking
+        self.solution = None
+        self.checked = set()
+        self._search_state = None
+        self.goals_reached = []  # Dense indices of the goals the last search reached
+        self._goals_wanted = 1
+
+        # Optional utilities.Tracing.Tracer receiving expand/generate/goal/prune events
+        self.tracer = None
+
+    def load_problem(self, json_file_path: str) -> Problem:
+        """
+        Load the route data and build the problem to solve, timing the load and index phases.
+        
+        Subclasses that search another form of the map (e.g. TiledSearch) override this.
+        
+        Args:
+            json_file_path (str): Path to the problem JSON.
+            
+        Returns:
+            Problem: The problem, with its dense graph and components built.
+        """
         # Load route data from JSON file, which includes map details and intersections
-        self.route_data = self.load_route_data(json_file_path)
+        with self.metrics.phase("load"):
+            self.route_data = self.load_route_data(json_file_path)
         
         # Extract the initial and goal information from the route data
         initial_info = self.route_data.get_initial_final()
@@ -27,12 +66,13 @@ class Search(ABC):
         initial_state = State(initial_info['initial'], *initial_coords)
         goal_state = State(initial_info['final'], *goal_coords)
         
-        # Initialize the problem instance with initial and goal states and route data
-        self.problem = Problem(initial_state, goal_state, self.route_data)
-        
-        # Initialize solution and checked nodes tracking
-        self.solution = None
-        self.checked = set()
+        # Initialize the problem instance with initial and goal states and route data,
+        # and build the segment index, the dense graph the searches run on and its
+        # strongly connected components
+        with self.metrics.phase("index"):
+            problem = Problem(initial_state, goal_state, self.route_data)
+            problem.graph.components
+        return problem
 
     def load_route_data(self, file_path: str) -> RouteData:
         """
@@ -48,6 +88,401 @@ class Search(ABC):
             json_string = f.read()
         return RouteData(json_string)
 
+    def new_search_state(self) -> SearchState:
+        """
+        Get the array-based search state for a fresh search over the problem graph.
+        
+        The arrays are allocated once per Search instance and reset in O(1) afterwards,
+        so repeated searches do not reallocate per-node bookkeeping.
+        
+        Returns:
+            SearchState: A reset SearchState sized to the problem graph.
+        """
+        if self._search_state is None:
+            self._search_state = SearchState(len(self.problem.graph))
+        else:
+            self._search_state.reset()
+        return self._search_state
+
+    def set_endpoints(self, initial_id: int, goal_id: int):
+        """
+        Search between two other intersections of the same map.
+        
+        Args:
+            initial_id (int): Intersection id to start from.
+            goal_id (int): Intersection id to reach.
+        """
+        graph = self.problem.full_graph
+        self.problem.initial_state = graph.state(graph._dense(initial_id))
+        self.problem.goal_state = graph.state(graph._dense(goal_id))
+        self._endpoints_changed()
+
+    def set_goals(self, goal_ids: List[int], k: int = 1):
+        """
+        Search for the nearest of several intersections, or the k nearest of them, in one search.
+        
+        The search stops once k goals have been reached. The path to the first one is the
+        solution; every goal reached is listed in goals_reached, and goal_solutions()
+        returns the path to each of them.
+        
+        Args:
+            goal_ids (List[int]): Candidate destination intersection ids.
+            k (int): Goals to reach before stopping; 1 stops at the first goal reached.
+        """
+        graph = self.problem.full_graph
+        self.problem.set_goals([graph.state(graph._dense(goal_id)) for goal_id in goal_ids], k)
+        self._endpoints_changed()
+
+    def _endpoints_changed(self):
+        """Rebuild what depends on the initial and goal states after they change."""
+        if self.problem.graph is not self.problem.full_graph:
+            self.use_contraction()  # The kept endpoints changed
+        if hasattr(self, "prepare_heuristic"):
+            with self.metrics.phase("heuristic"):
+                self.prepare_heuristic()
+
+    def use_contraction(self):
+        """
+        Run searches on a graph with dead-end spurs removed and degree-2 chains collapsed.
+        
+        Solutions are unpacked back into the original intersections, so the writers and
+        the rest of the pipeline see full paths.
+        """
+        with self.metrics.phase("index"):
+            graph = self.problem.contract()
+        self._search_state = None  # Sized for the previous graph
+        self.metrics.gauge("contracted_nodes", len(graph))
+        self.metrics.gauge("contracted_edges", graph.num_edges())
+
+    def use_node_order(self, order: str):
+        """
+        Run searches on a graph whose nodes are renumbered for memory locality.
+        
+        Costs are unchanged. Ties between equal-cost frontier entries are broken by dense
+        index, so on maps with equal-cost alternatives the path and the generated and
+        expanded counts can differ from the input order.
+        
+        Args:
+            order (str): One of utilities.NodeOrder.ORDERS.
+        """
+        if order == self.problem.node_order:
+            return
+        contracted = self.problem.graph is not self.problem.full_graph
+        with self.metrics.phase("index"):
+            self.problem.set_node_order(order)
+            self.problem.graph.components
+        self._search_state = None  # Sized and indexed for the previous numbering
+        if contracted:
+            self.use_contraction()
+
+    def apply_patch(self, patch: MapPatch) -> PatchResult:
+        """
+        Change the map in place: intersections and segments added, updated or removed.
+        
+        The graph and the indexes built from it are patched rather than rebuilt (see
+        Problem.apply_patch). Search arrays are reallocated when intersections are added,
+        and the heuristic is prepared again when an endpoint moved. What changed is added
+        to the patch_* gauges and tags of self.metrics.
+        
+        Args:
+            patch (MapPatch): The changes.
+            
+        Returns:
+            PatchResult: What changed, and which derived structures were updated or invalidated.
+        """
+        with self.metrics.phase("index"):
+            result = self.problem.apply_patch(patch)
+        self.metrics.add("patch_segments", result.segments)
+        self.metrics.add("patch_nodes_added", len(result.added_nodes))
+        self.metrics.add("patch_nodes_removed", len(result.removed_nodes))
+        self.metrics.add("patch_nodes_moved", len(result.moved_nodes))
+        self.metrics.tag("patch_updated", result.updated)
+        self.metrics.tag("patch_invalidated", result.invalidated)
+        if result.added_nodes or "contraction" in result.invalidated:
+            self._search_state = None  # Sized for the previous graph
+        endpoints = {self.problem.initial_state.id, *(goal.id for goal in self.problem.goal_states)}
+        if hasattr(self, "prepare_heuristic") and endpoints & result.moved_nodes.keys():
+            with self.metrics.phase("heuristic"):
+                self.prepare_heuristic()
+        return result
+
+    def locate(self, latitude: float, longitude: float) -> State:
+        """
+        Find the intersection closest to a coordinate.
+        
+        Args:
+            latitude (float): Latitude of the point.
+            longitude (float): Longitude of the point.
+            
+        Returns:
+            State: The nearest intersection.
+        """
+        nearest = self.problem.spatial_index.nearest(latitude, longitude)
+        if not nearest:
+            raise ValueError(f"No intersection near ({latitude}, {longitude})")
+        return self.problem.full_graph.state(nearest[0][1])
+
+    def set_endpoints_by_coordinates(self, initial: Tuple[float, float], goal: Tuple[float, float]):
+        """
+        Search between the intersections closest to two (latitude, longitude) points.
+        
+        Args:
+            initial (Tuple[float, float]): Point to start from.
+            goal (Tuple[float, float]): Point to reach.
+        """
+        self.set_endpoints(self.locate(*initial).id, self.locate(*goal).id)
+
+    def goal_reachable(self) -> bool:
+        """
+        Check, in O(1) per goal, whether any goal can be reached from the initial state at all.
+        
+        Searches call this first so that unreachable goals are rejected without exploring
+        everything reachable from the start.
+        
+        Returns:
+            bool: False if no path exists to any goal (or the initial state is not on the map).
+        """
+        graph = self.problem.full_graph
+        start = graph.index.get(self.problem.initial_state.id)
+        if start is None:
+            return False
+        goals = (graph.index.get(goal.id) for goal in self.problem.goal_states)
+        return any(goal is not None and graph.components.reachable(start, goal) for goal in goals)
+
+    def goal_mask(self, graph) -> bytearray:
+        """
+        Mark the goal states of a search over a graph, and forget the goals reached before.
+        
+        Goals the initial state cannot reach are left out, so a search for the k nearest
+        goals stops once every reachable one is found instead of exhausting the map.
+        
+        Args:
+            graph (Graph): The graph the search runs on.
+            
+        Returns:
+            bytearray: 1 for every goal node, indexed by dense node index, so that search
+            loops test for a goal with a single lookup.
+        """
+        full = self.problem.full_graph
+        start = full.index[self.problem.initial_state.id]
+        self.goals_reached = []
+        goals = bytearray(len(graph))
+        for goal in self.problem.goal_states:
+            if goal.id in graph.index and full.components.reachable(start, full.index[goal.id]):
+                goals[graph.index[goal.id]] = 1
+        self._goals_wanted = min(self.problem.goal_count, goals.count(1))
+        return goals
+
+    def goal_reached(self, u: int) -> bool:
+        """
+        Record that a goal node was reached.
+        
+        Args:
+            u (int): Dense index of the goal node.
+            
+        Returns:
+            bool: True once enough goals have been reached for the search to stop.
+        """
+        if u not in self.goals_reached:  # Searches may pop a goal again through a stale entry
+            self.goals_reached.append(u)
+        return len(self.goals_reached) >= self._goals_wanted
+
+    def goal_solutions(self) -> List:
+        """
+        Paths to every goal reached by the last search, in the order they were reached.
+        
+        Returns:
+            List[List[Node]]: One Node chain per goal reached.
+        """
+        graph = self.problem.graph
+        return [self._search_state.nodes(graph, u) for u in self.goals_reached]
+
+    def steps(self, batch: int = STEP_EXPANSIONS):
+        """
+        Run the search a batch of expansions at a time, as a generator.
+
+        Each next() runs the search until batch more nodes have been expanded and yields a
+        SearchProgress; the generator returns (StopIteration.value) what search() would
+        return. Between two steps the search is paused and its time is not counted, so
+        many searches can be interleaved in one thread (see utilities.Stepping), and
+        closing the generator abandons the search. Algorithms without a stepped loop
+        (search_steps) run to the end in their first step.
+
+        Args:
+            batch (int): Expansions per step.
+
+        Returns:
+            Generator[SearchProgress]: The steps of the search.
+        """
+        # The loop is stepped only if the class that defines search() also defines search_steps()
+        owner = next(cls for cls in type(self).__mro__ if "search" in vars(cls))
+        if "search_steps" in vars(owner):
+            return self.search_steps(batch)
+        return self._single_step()
+
+    def _single_step(self):
+        # A generator that runs search() on its first next() and never pauses
+        return self.search()
+        yield
+
+    def run_steps(self, steps):
+        """
+        Run a stepped search to the end.
+
+        Args:
+            steps (Generator): The generator returned by search_steps.
+
+        Returns:
+            The result the generator returns, i.e. what search() returns.
+        """
+        try:
+            while True:
+                next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+    def pause(self, frontier: int, peak_frontier: int, cost: float) -> SearchProgress:
+        """
+        Suspend the search clock and describe the search for a pause of search_steps.
+
+        The stepped loop yields the returned progress and calls resume_search() when it
+        is resumed.
+
+        Args:
+            frontier (int): Current frontier size.
+            peak_frontier (int): Largest frontier size so far.
+            cost (float): Path cost of the last node expanded.
+
+        Returns:
+            SearchProgress: Counts and frontier statistics of the search so far.
+        """
+        self.metrics.suspend("search")
+        return SearchProgress(self.expanded_nodes, self.generated_nodes, frontier, peak_frontier, cost,
+                              self.metrics.elapsed("search"))
+
+    def resume_search(self):
+        """Restart the search clock after a pause."""
+        self.metrics.resume("search")
+
+    def fork(self):
+        """
+        Another search of the same kind over the same map, to run alongside this one.
+
+        The route data, graphs and indexes are shared; endpoints, goals, counters, metrics
+        and search arrays are the fork's own, so forks can be stepped concurrently. Each
+        fork still allocates its own per-node arrays on its first search.
+
+        Returns:
+            Search: The new search, with the same endpoints as this one.
+        """
+        other = copy.copy(self)
+        other.problem = copy.copy(self.problem)
+        other.metrics = Metrics()
+        other.solution = None
+        other.checked = set()
+        other._search_state = None
+        other.goals_reached = []
+        other.tracer = None
+        for counter in ("generated_nodes", "expanded_nodes", "execution_time", "solution_cost"):
+            if hasattr(other, counter):
+                setattr(other, counter, 0)
+        return other
+
+    def active_tracer(self):
+        """
+        Get the tracer to report events to during a search.
+        
+        Returns:
+            Tracer: The tracer, or None when tracing is off, so search loops can skip
+            every hook with a single check.
+        """
+        if self.tracer is not None and self.tracer.enabled:
+            self.tracer.ids = self.problem.graph.ids
+            return self.tracer
+        return None
+
+    def record_search_stats(self, state: SearchState, peak_frontier: int):
+        """
+        Record the peak frontier and visited sizes of a finished search.
+        
+        Args:
+            state (SearchState): The search state the search ran on.
+            peak_frontier (int): Largest frontier size observed during the search.
+        """
+        self.metrics.gauge("peak_frontier", peak_frontier)
+        self.metrics.gauge("visited_nodes", state.closed.count(1))
+
+    def solution_record(self, solution, execution_time: float, label: str = "") -> SolutionRecord:
+        """
+        Collect what a solution file reports about this search.
+        
+        Step costs are the ones the search added along the path, as recorded on each node,
+        so they add up to the path cost even where the search took a later parallel
+        segment or costed steps by the time of day.
+        
+        Args:
+            solution (List[Node]): The solution path, or None if no solution was found.
+            execution_time (float): Search time in seconds.
+            label (str): Name of the run, for files holding many solutions.
+            
+        Returns:
+            SolutionRecord: The record to hand to a SolutionWriter.
+        """
+        ids = [node.state.id for node in solution] if solution else []
+        edge_costs = [node.step_cost for node in solution[1:]] if solution else []
+        cost = solution[-1].path_cost if solution else 0.0
+        return SolutionRecord(ids, edge_costs, cost, self.generated_nodes, self.expanded_nodes, execution_time, label)
+
+    def format_solution_text(self, record: SolutionRecord) -> str:
+        """
+        Render a solution record as text; subclasses override this to keep their own layout.
+        
+        Args:
+            record (SolutionRecord): The solution to render.
+            
+        Returns:
+            str: The text written to the solution file.
+        """
+        return format_text(record)
+
+    def write_solution(self, solution, execution_time: float, file_path: str):
+        """
+        Write a solution file in the selected solution_format, plus metrics if requested.
+        
+        Args:
+            solution (List[Node]): The solution path, or None if no solution was found.
+            execution_time (float): Search time in seconds.
+            file_path (str): Path of the solution file.
+        """
+        with self.metrics.phase("write"), \
+                SolutionWriter(file_path, self.solution_format, layout=self.format_solution_text) as writer:
+            writer.write(self.solution_record(solution, execution_time))
+        self.write_metrics(file_path)
+
+    def write_metrics(self, file_path: str):
+        """
+        Write the run's metrics next to a solution file, if a metrics format is selected.
+        
+        The metrics go to the solution path with its extension replaced by
+        .metrics.json or .prom, depending on metrics_format.
+        
+        Args:
+            file_path (str): Path of the solution file just written.
+        """
+        if self.metrics_format is None:
+            return
+        for name in ("generated_nodes", "expanded_nodes"):
+            if hasattr(self, name):
+                self.metrics.gauge(name, getattr(self, name))
+        labels = {"problem": os.path.basename(self.json_file_path), "algorithm": type(self).__name__}
+        base = os.path.splitext(file_path)[0]
+        if self.metrics_format == "prometheus":
+            with open(base + ".prom", 'w') as f:
+                f.write(self.metrics.to_prometheus(labels))
+        else:
+            with open(base + ".metrics.json", 'w') as f:
+                f.write(self.metrics.to_json(labels))
+
     @abstractmethod
     def search(self):
         """
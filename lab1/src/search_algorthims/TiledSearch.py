@@ -0,0 +1,136 @@
+# Searches over a tiled map that is loaded on demand
+
+import argparse
+import os
+from AStar_geodesic import AStarGeodesic
+from BFS import BFS
+from UCS import UCS
+from utilities.State import State
+from utilities.TiledGraph import TiledGraph, build_tiles, tiles_are_current
+
+
+class TiledProblem:
+    def __init__(self, graph: TiledGraph):
+        """
+        The part of Problem the search engines use, over a TiledGraph.
+
+        The graph is both the searched and the full graph; there is no route data, and
+        the endpoints are the problem's, as recorded in the tile manifest.
+
+        Args:
+            graph (TiledGraph): The tiled map.
+        """
+        self.graph = self.full_graph = graph
+        self.initial_state = graph.state(graph.endpoint("initial"))
+        self.goal_states = [graph.state(graph.endpoint("final"))]
+        self.goal_count = 1
+
+    @property
+    def goal_state(self) -> State:
+        """The goal state."""
+        return self.goal_states[0]
+
+
+class TiledSearch:
+    def __init__(self, tile_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Run a search engine over a TiledGraph instead of a fully loaded map.
+
+        Mixed in before BFS, UCS or AStarGeodesic (TiledBFS, TiledUCS, TiledAStarGeodesic),
+        so their own loops run over the tiles: the tiled graph reads like their CSR arrays,
+        and ties are broken by the same dense indices, so generated/expanded counts, paths
+        and costs match the in-memory searches. Only the adjacency is tiled; per-node
+        bookkeeping is the engines' usual SearchState. An unreachable goal is rejected
+        without searching, from the manifest, like the components let the engines do.
+
+        Args:
+            tile_dir (str): Directory written by utilities.TiledGraph.build_tiles.
+            max_bytes (int): Memory budget for loaded tiles.
+        """
+        self.max_bytes = max_bytes
+        super().__init__(tile_dir)
+
+    def load_problem(self, tile_dir: str) -> TiledProblem:
+        """Open the tiles in place of loading the route data; only the endpoints' tiles are read."""
+        self.route_data = None
+        with self.metrics.phase("load"):
+            return TiledProblem(TiledGraph(tile_dir, self.max_bytes))
+
+    @property
+    def graph(self) -> TiledGraph:
+        """The tiled map."""
+        return self.problem.graph
+
+    def close(self):
+        """Close the tiled graph's files."""
+        self.graph.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def goal_reachable(self) -> bool:
+        # The tiles hold no component index, but the manifest records whether the goal is reachable
+        return bool(self.graph.manifest.get("reachable", True))
+
+    def goal_mask(self, graph) -> bytearray:
+        # Like Search.goal_mask, without the reachability filter
+        self.goals_reached = []
+        goals = bytearray(len(graph))
+        for goal in self.problem.goal_states:
+            if goal.id in graph.index:
+                goals[graph.index[goal.id]] = 1
+        self._goals_wanted = min(self.problem.goal_count, goals.count(1))
+        return goals
+
+    def record_search_stats(self, state, peak_frontier: int):
+        """Record the frontier and visited peaks, plus how the tile cache did."""
+        super().record_search_stats(state, peak_frontier)
+        self.metrics.gauge("tiles_loaded", self.graph.loads)
+        self.metrics.gauge("tiles_touched", len(self.graph.touched))
+        self.metrics.gauge("tile_evictions", self.graph.evictions)
+        self.metrics.gauge("node_index_reads", self.graph.index_reads)
+
+
+class TiledBFS(TiledSearch, BFS):
+    pass
+
+
+class TiledUCS(TiledSearch, UCS):
+    pass
+
+
+class TiledAStarGeodesic(TiledSearch, AStarGeodesic):
+    pass
+
+
+# Algorithms that can run over tiles
+ALGORITHMS = {"breadth": TiledBFS, "uniform_cost": TiledUCS, "a_geodesic": TiledAStarGeodesic}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search a map split into tiles that are loaded on demand.")
+    parser.add_argument("problem", help="problem JSON; it is split into tiles on first use and when it changes")
+    parser.add_argument("output", help="solution file to write")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="a_geodesic")
+    parser.add_argument("--tile-dir", help="tile directory (default: <problem>.tiles)")
+    parser.add_argument("--tile-size", type=float, default=0.01, help="tile side in degrees")
+    parser.add_argument("--budget-mb", type=float, default=64, help="memory budget for loaded tiles")
+    args = parser.parse_args()
+
+    tile_dir = args.tile_dir or os.path.splitext(args.problem)[0] + ".tiles"
+    if not tiles_are_current(args.problem, tile_dir, args.tile_size):
+        build_tiles(args.problem, tile_dir, args.tile_size)
+    with ALGORITHMS[args.algorithm](tile_dir, int(args.budget_mb * 1024 * 1024)) as tiled:
+        result = tiled.search()
+        # AStarGeodesic returns (solution, execution time)
+        solution, execution_time = result if isinstance(result, tuple) else (result, tiled.execution_time)
+        if solution:
+            tiled.write_solution(solution, execution_time, args.output)
+        else:
+            print("No solution found.")
+        graph = tiled.graph
+        print(f"Tiles loaded: {graph.loads} ({len(graph.touched)} of {len(graph.manifest['tiles'])}), "
+              f"evictions: {graph.evictions}")
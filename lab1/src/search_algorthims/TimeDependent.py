@@ -0,0 +1,184 @@
+# Time-dependent UCS and A*: the cost of a segment depends on when it is entered
+
+import heapq
+from decimal import Decimal
+from AStar_geodesic import AStarGeodesic
+from UCS import UCS
+from utilities.CommandLine import parse_arguments, run_search
+
+
+def parse_departure(text: str) -> float:
+    """Turn an HH:MM departure time into seconds since midnight."""
+    hours, _, minutes = text.partition(":")
+    return int(hours) * 3600.0 + int(minutes or 0) * 60.0
+
+
+class TimeDependentUCS(UCS):
+    def __init__(self, json_file_path: str, departure: float = 8 * 3600.0):
+        """
+        UCS where each segment costs its static travel time times its speed profile's
+        factor at the moment it is entered (departure time plus the path cost so far).
+
+        With the FIFO property, checked when the profiles are loaded, the earliest arrival
+        at a node is also the best moment to continue from it, so the usual label-setting
+        search stays exact. Flat profiles give exactly the static UCS costs.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            departure (float): Departure time in seconds since midnight.
+        """
+        super().__init__(json_file_path)
+        self.departure = departure
+
+    def use_contraction(self):
+        # Super-edges would need merged profiles
+        raise ValueError("Time-dependent searches run on the full graph only")
+
+    def search(self):
+        """Perform the time-dependent UCS search."""
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        profiles = self.problem.speed_profiles
+        state = self.new_search_state()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        profile, flat, factor = profiles.profile, profiles.flat, profiles.factor
+        g, parent, step, stamp, closed = state.g, state.parent, state.step, state.stamp, state.closed
+        generation = state.generation
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        departure = self.departure
+
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frontier = [(0.0, start)]  # Priority queue of (arrival time since departure, node)
+        peak_frontier = 1
+
+        while frontier:
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            current_cost, u = heapq.heappop(frontier)
+            self.expanded_nodes += 1
+
+            if goals[u] and self.goal_reached(u):
+                self.execution_time = self.metrics.end("search")
+                u = self.goals_reached[0]
+                self.solution_cost = g[u]
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u)
+
+            closed[u] = 1
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                # The segment is entered when u is reached
+                if flat[profile[k]]:
+                    cost = step_costs[k]
+                else:
+                    cost = step_costs[k] * factor(profile[k], departure + current_cost)
+                new_cost = current_cost + cost
+                if stamp[v] != generation or new_cost < g[v]:
+                    g[v] = new_cost
+                    parent[v] = u
+                    step[v] = cost
+                    stamp[v] = generation
+                    heapq.heappush(frontier, (new_cost, v))
+                    self.generated_nodes += 1
+
+        self.execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None
+
+
+class TimeDependentAStar(AStarGeodesic):
+    def __init__(self, json_file_path: str, departure: float = 8 * 3600.0):
+        """
+        A* (geodesic) with segment costs evaluated at the time each segment is entered.
+
+        The geodesic estimate assumes the static travel time at 120 m/s; it is scaled by the
+        smallest factor of any profile, so it stays a lower bound at every time of day.
+
+        Args:
+            json_file_path (str): Path to the problem JSON file.
+            departure (float): Departure time in seconds since midnight.
+        """
+        super().__init__(json_file_path)
+        self.departure = departure
+
+    def use_contraction(self):
+        # Super-edges would need merged profiles
+        raise ValueError("Time-dependent searches run on the full graph only")
+
+    def search(self):
+        """Perform the time-dependent A* search; returns (solution, execution time) like AStarGeodesic."""
+        self.metrics.begin("search")
+        graph = self.problem.graph
+        profiles = self.problem.speed_profiles
+        state = self.new_search_state()
+        offsets, targets, costs = graph.offsets, graph.targets, graph.costs
+        profile, flat, factor = profiles.profile, profiles.flat, profiles.factor
+        g, stamp, closed = state.g, state.stamp, state.closed
+        generation = state.generation
+        if not self.goal_reachable():
+            execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None, execution_time
+        goals = self.goal_mask(graph)
+        departure = self.departure
+        scale = Decimal(min(profiles.min_factor, 1.0))
+
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frontier = [(scale * self.geodesic_heuristic(self.problem.initial_state), 0.0, start)]
+        peak_frontier = 1
+
+        while frontier:
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            _, _, u = heapq.heappop(frontier)
+            closed[u] = 1
+            self.expanded_nodes += 1
+
+            if goals[u] and self.goal_reached(u):
+                execution_time = self.metrics.end("search")
+                u = self.goals_reached[0]
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u), execution_time
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                if flat[profile[k]]:
+                    cost = costs[k]
+                else:
+                    cost = costs[k] * factor(profile[k], departure + g[u])
+                new_cost = g[u] + cost
+                if stamp[v] != generation or new_cost < g[v]:
+                    state.update(v, new_cost, u, cost)
+                    priority = Decimal(new_cost) + scale * self.geodesic_heuristic(graph.state(v))
+                    heapq.heappush(frontier, (priority, new_cost, v))
+                    self.generated_nodes += 1
+
+        execution_time = self.metrics.end("search")
+        self.record_search_stats(state, peak_frontier)
+        return None, execution_time
+
+
+def time_dependent_options(parser):
+    """Add the departure time, profile file and engine to the command line."""
+    parser.add_argument("--departure", default="08:00", help="departure time, HH:MM (default: 08:00)")
+    parser.add_argument("--profiles", help="speed profiles JSON (default: utilities.SpeedProfiles.DEFAULT_PROFILES)")
+    parser.add_argument("--engine", choices=("ucs", "astar"), default="astar")
+
+
+if __name__ == "__main__":
+    args = parse_arguments("Time-dependent search", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/time_dependent/plaza_isabel_ii_albacete_250_0.txt', time_dependent_options)
+    engine = TimeDependentAStar if args.engine == "astar" else TimeDependentUCS
+    search = engine(args.problem, parse_departure(args.departure))
+    if args.profiles:
+        search.use_node_order(args.node_order)  # Renumbering drops loaded profiles
+        search.problem.load_speed_profiles(args.profiles)
+    run_search(search, args)
@@ -1,8 +1,7 @@
 import heapq
-import time  
 from datetime import timedelta
 from Search import Search
-from utilities.Node import Node
+from utilities.CommandLine import parse_arguments, run_search
 
 
 class UCS(Search):
@@ -14,76 +13,101 @@ class UCS(Search):
 
     def search(self):
         """Perform the UCS search."""
-        start_time = time.time()  # Start tracking time
-        frontier = []  # Priority queue (min-heap)
-        heapq.heappush(frontier, (0, Node(self.problem.initial_state)))  # Add initial state with cost 0
-        self.checked = set()  # Explored nodes
+        return self.run_steps(self.search_steps(None))
 
-        # Cost dictionary to keep track of the lowest cost to reach each state
-        cost_so_far = {self.problem.initial_state: 0}
+    def search_steps(self, batch: int = None):
+        """Generator form of search(): pause every batch expansions (never if None), then return the result."""
+        self.metrics.begin("search")  # Start tracking time
+        # Per-node bookkeeping lives in preallocated arrays indexed by dense node index;
+        # the stamp marks the nodes that have a cost recorded in g for this search
+        graph = self.problem.graph
+        state = self.new_search_state()
+        offsets, targets, step_costs = graph.offsets, graph.targets, graph.step_costs
+        g, parent, step, stamp, closed = state.g, state.parent, state.step, state.stamp, state.closed
+        generation = state.generation
+        # Goals in a component the start cannot reach are rejected without exploring
+        if not self.goal_reachable():
+            self.execution_time = self.metrics.end("search")
+            self.record_search_stats(state, 0)
+            return None
+        goals = self.goal_mask(graph)
+        trace = self.active_tracer()
+
+        start = graph.index[self.problem.initial_state.id]
+        state.update(start, 0.0)
+        frontier = [(0.0, start)]  # Priority queue (min-heap) of (path cost, node)
+        peak_frontier = 1
+        pause_at = self.expanded_nodes + batch if batch else float('inf')
 
         while frontier:
-            current_cost, node = heapq.heappop(frontier)  # Pop the node with the lowest path cost
-            print(f"Exploring: {node.state}")
+            if len(frontier) > peak_frontier:
+                peak_frontier = len(frontier)
+            current_cost, u = heapq.heappop(frontier)  # Pop the node with the lowest path cost
             self.expanded_nodes += 1  # Increment expanded nodes count
+            if trace:
+                trace.on_expand(u, parent[u], current_cost)
 
-            # Check if we've reached the goal
-            if self.problem.is_goal(node.state):
-                end_time = time.time()  # Stop tracking time
-                self.execution_time = end_time - start_time  # Calculate execution time
-                self.solution_cost = current_cost  # Total solution cost
-                print("Goal found!")
-                return node.path()  # Return the path to the goal
+            # Check if we've reached the goal (or enough of the goals)
+            if goals[u] and self.goal_reached(u):
+                self.execution_time = self.metrics.end("search")  # Stop tracking time
+                u = self.goals_reached[0]  # The nearest goal is the solution
+                self.solution_cost = g[u]  # Total solution cost
+                if trace:
+                    trace.on_goal(u, parent[u], g[u])
+                self.record_search_stats(state, peak_frontier)
+                with self.metrics.phase("path"):
+                    return state.nodes(graph, u)  # Return the path to the goal
 
             # Mark the node as explored
-            self.checked.add(node.state)
+            closed[u] = 1
 
             # Expand the node
-            for child in node.expand(self.problem):
-                new_cost = current_cost + self.problem.step_cost(node.state, child.action, child.state)
-                if child.state not in cost_so_far or new_cost < cost_so_far[child.state]:
-                    cost_so_far[child.state] = new_cost
-                    heapq.heappush(frontier, (new_cost, child))  # Add child with its new cost
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                new_cost = current_cost + step_costs[k]
+                if stamp[v] != generation or new_cost < g[v]:
+                    g[v] = new_cost
+                    parent[v] = u
+                    step[v] = step_costs[k]
+                    stamp[v] = generation
+                    heapq.heappush(frontier, (new_cost, v))  # Add node with its new cost
                     self.generated_nodes += 1  # Increment generated nodes count
-                    print(f"Adding to frontier: {child.state}, cost: {new_cost}")
+                    if trace:
+                        trace.on_generate(v, u, new_cost)
+                elif trace:
+                    trace.on_prune(v, u, new_cost)
+
+            # Pause here every batch expansions when stepped (see Search.steps)
+            if self.expanded_nodes >= pause_at:
+                yield self.pause(len(frontier), peak_frontier, current_cost)
+                self.resume_search()
+                pause_at = self.expanded_nodes + batch
 
-        end_time = time.time()  # Stop tracking time
-        self.execution_time = end_time - start_time  # Calculate execution time
-        print("No solution found after exploring all states.")
+        self.execution_time = self.metrics.end("search")  # Stop tracking time
+        self.record_search_stats(state, peak_frontier)
         return None
 
+    def format_solution_text(self, record):
+        """Render the solution with the execution time in seconds and raw step costs."""
+        if not record.found:
+            return "No solution found.\n"
+        ids, costs = record.ids, record.edge_costs
+        steps = ", ".join(f"{ids[i]} → {ids[i + 1]}, {costs[i]}" for i in range(len(costs)))
+        return (f"Generated nodes: {record.generated}\n"
+                f"Expanded nodes: {record.expanded}\n"
+                f"Execution time: {record.execution_time}\n"
+                f"Solution length: {len(ids) - 1}\n"
+                f"Solution cost: {timedelta(seconds=record.cost)}\n"
+                f"Solution: [{steps}]\n")
+
     def write_solution_to_file(self, solution, file_path):
         """Write the solution path and additional information to a text file."""
-        with open(file_path, 'w') as f:
-            if solution:
-                f.write(f"Generated nodes: {self.generated_nodes}\n")
-                f.write(f"Expanded nodes: {self.expanded_nodes}\n")
-                f.write(f"Execution time: {self.execution_time}\n")
-                f.write(f"Solution length: {len(solution) - 1}\n")
-                solution_cost = solution[-1].path_cost
-                formatted_cost = str(timedelta(seconds=solution_cost))
-                f.write(f"Solution cost: {formatted_cost}\n")
-                f.write("Solution: [")
-                
-                for i in range(len(solution) - 1):
-                    current_node = solution[i]
-                    next_node = solution[i + 1]
-                    action, cost = self.problem.get_action_and_cost(current_node.state, next_node.state)
-                    f.write(f"{current_node.state.id} → {next_node.state.id}, {cost}")
-                    if i < len(solution) - 2:
-                        f.write(", ")
-                f.write("]\n")
-            else:
-                f.write("No solution found.\n")
+        self.write_solution(solution, self.execution_time, file_path)
+
 
 
 if __name__ == "__main__":
-    json_file_path = '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json'
-    ucs = UCS(json_file_path)
-    solution = ucs.search()  # Call the search method
-
-    if solution:
-        ucs.write_solution_to_file(solution,
-                                   '/home/gabri/Inteilligent Systems/src/output/huge/ucs/plaza_isabel_ii_albacete_250_0.txt')  # Write solution to file
-    else:
-        print("No solution found.")
+    args = parse_arguments("Uniform Cost Search", '/home/gabri/Inteilligent Systems/src/input/problems/huge/calle_cardenal_tabera_y_araoz_albacete_2000_1.json',
+                           '/home/gabri/Inteilligent Systems/src/output/huge/ucs/plaza_isabel_ii_albacete_250_0.txt')
+    ucs = UCS(args.problem)
+    run_search(ucs, args)  # Search and write solution to file
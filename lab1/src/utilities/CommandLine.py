@@ -0,0 +1,109 @@
+import argparse
+import os
+from utilities.MapPatch import MapPatch
+from utilities.NodeOrder import ORDERS
+from utilities.Profiling import SearchProfiler
+from utilities.Stepping import SearchTask
+from utilities.Tracing import BinaryFileSink, Tracer
+
+
+def parse_arguments(description: str, default_problem: str, default_output: str, configure=None) -> argparse.Namespace:
+    """
+    Parse the command line shared by the search entry points.
+
+    Args:
+        description (str): Name of the algorithm, shown in --help.
+        default_problem (str): Problem JSON used when none is given.
+        default_output (str): Solution file used when none is given.
+        configure (callable): Optional function that adds algorithm-specific options to the parser.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("problem", nargs="?", default=default_problem, help="problem JSON file")
+    parser.add_argument("output", nargs="?", default=default_output, help="solution file to write")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=("cprofile", "sampling"),
+                        help="profile the search only (default mode: cprofile)")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="directory for profiles, saved as <dir>/<algorithm>/<problem>.*")
+    parser.add_argument("--metrics", choices=("json", "prometheus"),
+                        help="write per-phase metrics next to the solution file")
+    parser.add_argument("--trace", metavar="FILE", help="write a binary event trace of the search")
+    parser.add_argument("--node-order", choices=ORDERS, default="input",
+                        help="number intersections along a Hilbert curve, or in BFS or RCM order, for locality")
+    parser.add_argument("--patch", action="append", metavar="FILE",
+                        help="apply a map patch (utilities.MapPatch) before searching; may be repeated")
+    parser.add_argument("--contract", action="store_true",
+                        help="search a graph with dead-end spurs removed and degree-2 chains collapsed")
+    parser.add_argument("--format", choices=("text", "jsonl", "binary"), default="text",
+                        help="solution file format (default: text)")
+    parser.add_argument("--goals", type=int, nargs="+", metavar="ID",
+                        help="search for the nearest of these intersections instead of the problem's goal")
+    parser.add_argument("--nearest", type=int, default=1, metavar="K",
+                        help="with --goals, keep searching until the K nearest goals are reached")
+    parser.add_argument("--progress", type=int, metavar="N",
+                        help="run the search N expansions at a time and print its progress after each step")
+    if configure:
+        configure(parser)
+    return parser.parse_args()
+
+
+def run_search(search, args: argparse.Namespace):
+    """
+    Run a search as configured on the command line and write its solution.
+
+    Args:
+        search (Search): The search to run.
+        args (argparse.Namespace): Options from parse_arguments.
+
+    Returns:
+        The solution path, or None if no solution was found.
+    """
+    search.metrics_format = args.metrics
+    search.solution_format = args.format
+    if args.node_order != "input":
+        search.use_node_order(args.node_order)
+    for patch_file in args.patch or ():
+        search.apply_patch(MapPatch.load(patch_file))
+    if args.contract:
+        search.use_contraction()
+    if args.goals:
+        search.set_goals(args.goals, args.nearest)
+    if args.trace:
+        search.tracer = Tracer(BinaryFileSink(args.trace))
+
+    profiler = SearchProfiler(args.profile) if args.profile else None
+    if profiler:
+        profiler.start()
+    if args.progress:
+        task = SearchTask(search, args.progress)
+        while not task.step():
+            print(task.progress)
+        result = task.result
+    else:
+        result = search.search()
+    if profiler:
+        profiler.stop()
+    if search.tracer:
+        search.tracer.close()
+
+    # Some searches return (solution, execution_time) and take the time in their writer
+    solution = result[0] if isinstance(result, tuple) else result
+    if solution:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        if isinstance(result, tuple):
+            search.write_solution_to_file(solution, result[1], args.output)
+        else:
+            search.write_solution_to_file(solution, args.output)
+    else:
+        print("No solution found.")
+    if args.goals:
+        for path in search.goal_solutions():
+            print(f"Goal {path[-1].state.id}: cost {path[-1].path_cost}, {len(path) - 1} steps")
+
+    if profiler:
+        problem = os.path.splitext(os.path.basename(args.problem))[0]
+        base = profiler.write(args.profile_dir, problem, type(search).__name__)
+        print(f"Profile written to {base}.*")
+    return solution
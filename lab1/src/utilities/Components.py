@@ -0,0 +1,180 @@
+from array import array
+from collections import Counter
+from typing import Dict
+
+# Above this many components the condensation closure is not precomputed (it needs
+# components^2 / 8 bytes); reachability between components then walks the condensation
+CLOSURE_LIMIT = 20000
+
+
+class ComponentIndex:
+    def __init__(self, graph):
+        """
+        Strongly connected components of a graph and reachability between them.
+
+        Components are found with an iterative Tarjan pass over the CSR arrays. Tarjan
+        numbers the components in reverse topological order, so a node can only reach
+        nodes whose component number is not larger than its own. Reachability between
+        components is read from a bitset closure of the condensation, so reachable(u, v)
+        is a couple of array lookups.
+
+        Args:
+            graph: A Graph (or anything with the same offsets/targets arrays).
+        """
+        n = len(graph)
+        offsets, targets = graph.offsets, graph.targets
+        self.component = array('l', [-1]) * n   # Node -> component number
+        order = array('l', [-1]) * n            # Node -> discovery order
+        low = array('l', [0]) * n
+        on_stack = bytearray(n)
+        stack = []
+        counter = 0
+        count = 0
+
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            # Each frame is (node, next edge to look at)
+            work = [(root, offsets[root])]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            while work:
+                u, k = work[-1]
+                if k < offsets[u + 1]:
+                    work[-1] = (u, k + 1)
+                    v = targets[k]
+                    if order[v] == -1:
+                        order[v] = low[v] = counter
+                        counter += 1
+                        stack.append(v)
+                        on_stack[v] = 1
+                        work.append((v, offsets[v]))
+                    elif on_stack[v] and order[v] < low[u]:
+                        low[u] = order[v]
+                    continue
+                work.pop()
+                if work and low[u] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[u]
+                if low[u] == order[u]:
+                    while True:
+                        v = stack.pop()
+                        on_stack[v] = 0
+                        self.component[v] = count
+                        if v == u:
+                            break
+                    count += 1
+
+        self.count = count
+        self.sizes = array('l', [0]) * count
+        for c in self.component:
+            self.sizes[c] += 1
+
+        # Condensation edges between different components
+        self.successors = [set() for _ in range(count)]
+        for u in range(n):
+            cu = self.component[u]
+            for k in range(offsets[u], offsets[u + 1]):
+                cv = self.component[targets[k]]
+                if cv != cu:
+                    self.successors[cu].add(cv)
+
+        # Successors always have smaller numbers, so increasing order visits them first
+        self.closure = None
+        if count <= CLOSURE_LIMIT:
+            self.closure = [0] * count
+            for c in range(count):
+                bits = 1 << c
+                for d in self.successors[c]:
+                    bits |= self.closure[d]
+                self.closure[c] = bits
+
+    def reachable(self, u: int, v: int) -> bool:
+        """
+        Check whether there is a path from node u to node v.
+
+        Args:
+            u (int): Dense index of the origin.
+            v (int): Dense index of the destination.
+
+        Returns:
+            bool: True if v can be reached from u.
+        """
+        cu, cv = self.component[u], self.component[v]
+        if cu == cv:
+            return True
+        if cv > cu:
+            return False  # Reverse topological numbering: cu can only reach smaller numbers
+        if self.closure is not None:
+            return bool(self.closure[cu] >> cv & 1)
+        seen, pending = {cu}, [cu]
+        while pending:
+            for d in self.successors[pending.pop()]:
+                if d == cv:
+                    return True
+                if d > cv and d not in seen:
+                    seen.add(d)
+                    pending.append(d)
+        return False
+
+    def add_node(self):
+        """Give a new node, with no edges yet, a component of its own (numbered last)."""
+        c = self.count
+        self.component.append(c)
+        self.sizes.append(1)
+        self.successors.append(set())
+        if self.closure is not None:
+            self.closure.append(1 << c)
+        self.count += 1
+
+    def add_edge(self, u: int, v: int) -> bool:
+        """
+        Account for a new edge u -> v, when that can be done without recomputing.
+
+        An edge inside a component, or towards a component numbered lower (which the
+        numbering already allows u to reach), leaves every component as it is; only the
+        condensation and the closure of the components reaching u's gain v's component.
+        An edge the other way may close a cycle, so the index has to be rebuilt.
+
+        Returns:
+            bool: True if the index is still exact, False if it must be rebuilt.
+        """
+        cu, cv = self.component[u], self.component[v]
+        if cu == cv or cv in self.successors[cu]:
+            return True
+        if cv > cu:
+            return False
+        self.successors[cu].add(cv)
+        if self.closure is not None and not self.closure[cu] >> cv & 1:
+            gained = self.closure[cv]
+            for c in range(cu, self.count):
+                if self.closure[c] >> cu & 1:
+                    self.closure[c] |= gained
+        return True
+
+    def stats(self) -> Dict:
+        """
+        Component statistics, for checking the connectivity of a map export.
+
+        Returns:
+            Dict: Number of nodes and components, size and share of the largest component,
+            singleton components, components with no way in (sources) or no way out
+            (sinks) other than themselves, and the most common component sizes.
+        """
+        n = len(self.component)
+        largest = max(self.sizes) if self.count else 0
+        has_in = bytearray(self.count)
+        for c in range(self.count):
+            for d in self.successors[c]:
+                has_in[d] = 1
+        return {
+            "nodes": n,
+            "components": self.count,
+            "largest_component": largest,
+            "largest_share": largest / n if n else 0.0,
+            "singletons": sum(1 for size in self.sizes if size == 1),
+            "source_components": self.count - sum(has_in),
+            "sink_components": sum(1 for c in range(self.count) if not self.successors[c]),
+            "size_histogram": dict(Counter(self.sizes).most_common(10)),
+        }
@@ -0,0 +1,187 @@
+from array import array
+from typing import Iterable, List, Tuple
+from utilities.Graph import Graph
+from utilities.State import State
+
+class ContractedGraph:
+    def __init__(self, graph: Graph, keep: Iterable[int] = ()):
+        """
+        Reduced copy of a graph with dead-end spurs removed and degree-2 chains collapsed.
+
+        Two simplifications are applied. First, spurs are removed: a node is dropped,
+        repeatedly, while it touches at most one other node, since a path to the goal can
+        enter it but only leave back the way it came. Second, chains are collapsed: a node
+        is contracted when it is a plain pass-through, i.e. one way in and one way out
+        (a one-way street) or both ways to exactly two neighbours (a two-way street), with
+        no parallel segments or self-loops. Each run of contracted nodes between two kept
+        nodes becomes one super-edge whose cost is the summed travel time.
+
+        The result exposes the same arrays as Graph, so every search runs on it unchanged.
+        unpack_path turns a path found on it back into the original intersections.
+
+        Args:
+            graph (Graph): The full graph.
+            keep (Iterable[int]): Dense indices (in graph) that must survive, e.g. the
+                initial and goal nodes.
+        """
+        self.original = graph
+        self.version = graph.version  # Contractions are rebuilt, not patched
+        n = len(graph)
+        keep = set(keep)
+
+        # Neighbour sets of every node, ignoring self-loops
+        outs = [[] for _ in range(n)]   # Outgoing edge indices per node
+        ins = [[] for _ in range(n)]    # Incoming edge indices per node
+        for k in range(graph.num_edges()):
+            outs[graph.sources[k]].append(k)
+            ins[graph.targets[k]].append(k)
+
+        # Remove spurs, repeatedly, until every remaining node touches two or more others
+        alive = bytearray(b'\x01') * n
+        def neighbours(u):
+            return ({graph.targets[k] for k in outs[u] if alive[graph.targets[k]]}
+                    | {graph.sources[k] for k in ins[u] if alive[graph.sources[k]]}) - {u}
+        pending = [u for u in range(n) if u not in keep]
+        while pending:
+            queued = []
+            for u in pending:
+                if alive[u] and len(neighbours(u)) <= 1:
+                    alive[u] = 0
+                    queued.extend(neighbours(u) - keep)
+            pending = queued
+
+        # Contractible nodes: pass-throughs with no parallel segments or self-loops
+        def live_outs(u):
+            return [k for k in outs[u] if alive[graph.targets[k]]]
+        def live_ins(u):
+            return [k for k in ins[u] if alive[graph.sources[k]]]
+        interior = bytearray(n)
+        for u in range(n):
+            if not alive[u] or u in keep:
+                continue
+            out_targets = [graph.targets[k] for k in live_outs(u)]
+            in_sources = [graph.sources[k] for k in live_ins(u)]
+            if u in out_targets or len(set(out_targets)) != len(out_targets) or len(set(in_sources)) != len(in_sources):
+                continue
+            one_way = len(out_targets) == 1 and len(in_sources) == 1 and out_targets != in_sources
+            two_way = len(out_targets) == 2 and set(out_targets) == set(in_sources)
+            if one_way or two_way:
+                interior[u] = 1
+
+        # Kept nodes, renumbered densely in their original order
+        self.original_index = array('l', (u for u in range(n) if alive[u] and not interior[u]))
+        self.ids = [graph.ids[u] for u in self.original_index]
+        self.index = {state_id: i for i, state_id in enumerate(self.ids)}
+        reduced = {u: i for i, u in enumerate(self.original_index)}
+        self.latitudes = array('d', (graph.latitudes[u] for u in self.original_index))
+        self.longitudes = array('d', (graph.longitudes[u] for u in self.original_index))
+
+        # Follow every outgoing edge of a kept node through interior nodes to the next kept
+        # node. Edges keep the original order within each origin.
+        self.offsets = array('l', [0])
+        self.sources = array('l')
+        self.targets = array('l')
+        self.costs = array('d')
+        self.step_costs = array('d')
+        self.unpack = []  # Super-edge -> original edge indices, in path order
+        self._through = None  # Contracted original node -> (super-edge, chain position), built on first use
+        self._incoming = None  # See Graph.incoming_edges
+        for i, u in enumerate(self.original_index):
+            for k in live_outs(u):
+                chain = [k]
+                cost, step_cost = graph.costs[k], graph.step_costs[k]
+                previous, v = u, graph.targets[k]
+                while interior[v] and len(chain) <= n:
+                    k = next(k for k in live_outs(v) if graph.targets[k] != previous)
+                    chain.append(k)
+                    cost += graph.costs[k]
+                    step_cost += graph.step_costs[k]
+                    previous, v = v, graph.targets[k]
+                self.sources.append(i)
+                self.targets.append(reduced[v])
+                self.costs.append(cost)
+                self.step_costs.append(step_cost)
+                self.unpack.append(chain)
+            self.offsets.append(len(self.targets))
+
+    def __len__(self) -> int:
+        """Number of nodes in the reduced graph."""
+        return len(self.ids)
+
+    def num_edges(self) -> int:
+        """Number of edges (direct and super-edges) in the reduced graph."""
+        return len(self.targets)
+
+    def state(self, u: int) -> State:
+        """Create the State for a reduced node index."""
+        return State(id=self.ids[u], latitude=self.latitudes[u], longitude=self.longitudes[u])
+
+    def edge_cost(self, u: int, v: int) -> float:
+        """Travel cost of the first edge u -> v of the reduced graph, or infinity."""
+        for k in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[k] == v:
+                return self.costs[k]
+        return float('inf')
+
+    def chains_through(self, u: int) -> List[Tuple[int, int]]:
+        """
+        Super-edges whose chain passes through a contracted node of the original graph.
+
+        A node in a two-way chain is passed by one super-edge in each direction. Spur nodes
+        and kept nodes are in no chain.
+
+        Args:
+            u (int): Dense index in the original graph.
+
+        Returns:
+            List[Tuple[int, int]]: (super-edge, position j in its chain), where
+            unpack[super-edge][j] is the original edge into u.
+        """
+        if self._through is None:
+            self._through = {}
+            targets = self.original.targets
+            for e, chain in enumerate(self.unpack):
+                for j, k in enumerate(chain[:-1]):
+                    self._through.setdefault(targets[k], []).append((e, j))
+        return self._through.get(u, [])
+
+    # Same lookups as on Graph, over the reduced arrays
+    step_cost = Graph.step_cost
+    incoming_edges = Graph.incoming_edges
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the reduced arrays and unpacking lists, in bytes."""
+        arrays = (self.latitudes, self.longitudes, self.offsets, self.sources, self.targets,
+                  self.costs, self.step_costs, self.original_index)
+        return sum(a.itemsize * len(a) for a in arrays) + 8 * sum(len(chain) for chain in self.unpack)
+
+    def unpack_path(self, path: List[int], g, step=None) -> List[Tuple[int, float, float]]:
+        """
+        Expand a path on the reduced graph into the original intersections.
+
+        Between two consecutive kept nodes the super-edge is the one whose summed step cost
+        best matches the cost of the step the search recorded (or, without recorded steps,
+        the cost difference), which picks the right chain when two kept nodes are joined
+        by more than one.
+
+        Args:
+            path (List[int]): Reduced node indices from the root to the last node.
+            g: Path cost of every reduced node on the path, indexed by reduced index.
+            step: Cost of the step into every reduced node on the path, if recorded.
+
+        Returns:
+            List[Tuple[int, float, float]]: (original dense index, path cost, step cost)
+            along the full path.
+        """
+        graph = self.original
+        steps = [(self.original_index[path[0]], g[path[0]], 0.0)]
+        for u, v in zip(path, path[1:]):
+            candidates = [k for k in range(self.offsets[u], self.offsets[u + 1]) if self.targets[k] == v]
+            delta = step[v] if step is not None else g[v] - g[u]
+            best = min(candidates, key=lambda k: min(abs(self.costs[k] - delta), abs(self.step_costs[k] - delta)))
+            cost = g[u]
+            for k in self.unpack[best][:-1]:
+                cost += graph.step_costs[k]
+                steps.append((graph.targets[k], cost, graph.step_costs[k]))
+            steps.append((self.original_index[v], g[v], graph.step_costs[self.unpack[best][-1]]))
+        return steps
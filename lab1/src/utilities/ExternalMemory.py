@@ -0,0 +1,508 @@
+import heapq
+import json
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Tuple
+from utilities.Graph import Graph
+from utilities.RouteData import RouteData, source_fingerprint
+
+# Files written by build_external: per-node records, CSR offsets and per-edge records
+MANIFEST = "external.json"
+NODE = struct.Struct("<qdd")    # id, latitude, longitude
+OFFSET = struct.Struct("<q")    # first edge of a node
+EDGE = struct.Struct("<qd")     # target, step cost
+KEY = struct.Struct("<q")       # a node in a sorted run
+
+# Disk blocks read at once by BlockFile, and keys per block of a SortedRun
+BLOCK_BYTES = 64 * 1024
+RUN_BLOCK_KEYS = 128
+# Records buffered by RecordWriter and read_records per read or write
+BUFFER_RECORDS = 4096
+# Sorted runs merged at once by external_sort and kept at once by ExternalHeap
+MAX_FAN_IN = 16
+
+
+class IOStats:
+    def __init__(self):
+        """Bytes and operations moved between memory and disk by the external-memory structures."""
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.reads = 0
+        self.writes = 0
+
+    def read(self, data: bytes) -> bytes:
+        self.bytes_read += len(data)
+        self.reads += 1
+        return data
+
+    def wrote(self, size: int):
+        self.bytes_written += size
+        self.writes += 1
+
+
+def build_external(json_file_path: str, data_dir: str, order: str = "input") -> Dict:
+    """
+    Write a problem's graph to disk in the layout ExternalGraph reads from.
+
+    Nodes keep their dense index from Graph, and the edges of each node are stored in
+    Graph's order, sorted by source, so external searches break ties exactly like the
+    in-memory ones and a scan over nodes in increasing order reads the edge file front
+    to back. Only step costs are stored; BFS and UCS need nothing else. Whether the goal
+    can be reached at all is decided once here, with the SCC index, and kept in the manifest.
+    A locality-preserving node order puts the edges a search follows next to each other
+    on disk, so fewer blocks are read.
+
+    Args:
+        json_file_path (str): Problem JSON in the RouteData schema.
+        data_dir (str): Directory for the graph files and the manifest.
+        order (str): Node numbering, one of utilities.NodeOrder.ORDERS.
+
+    Returns:
+        Dict: The manifest written to <data_dir>/external.json.
+    """
+    with open(json_file_path, 'r') as f:
+        route_data = RouteData(f.read())
+    graph = Graph(route_data, order)
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "nodes.bin"), 'wb') as f:
+        for u in range(len(graph)):
+            f.write(NODE.pack(graph.ids[u], graph.latitudes[u], graph.longitudes[u]))
+    with open(os.path.join(data_dir, "offsets.bin"), 'wb') as f:
+        array('q', graph.offsets).tofile(f)
+    with open(os.path.join(data_dir, "edges.bin"), 'wb') as f:
+        for k in range(graph.num_edges()):
+            f.write(EDGE.pack(graph.targets[k], graph.step_costs[k]))
+
+    initial_final = route_data.get_initial_final()
+    start, goal = graph.index.get(initial_final["initial"]), graph.index.get(initial_final["final"])
+    # The component index is only needed here; searches read the answer from the manifest
+    reachable = start is not None and goal is not None and graph.components.reachable(start, goal)
+    manifest = {"address": route_data.get_address(), "nodes": len(graph), "edges": graph.num_edges(),
+                "initial": initial_final["initial"], "final": initial_final["final"],
+                "initial_node": start, "final_node": goal, "reachable": reachable, "order": order,
+                "source": source_fingerprint(json_file_path)}
+    with open(os.path.join(data_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def external_is_current(json_file_path: str, data_dir: str, order: str = "input") -> bool:
+    """
+    Check whether a directory written by build_external still matches its problem file.
+
+    Returns:
+        bool: False if the directory is missing, was written in another node order or
+        from another version of the file (or before manifests recorded their source).
+    """
+    try:
+        with open(os.path.join(data_dir, MANIFEST), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest.get("order") == order and manifest.get("source") == source_fingerprint(json_file_path)
+
+
+class BlockFile:
+    def __init__(self, file_path: str, io: IOStats, cache_blocks: int = 16, block_bytes: int = BLOCK_BYTES):
+        """
+        Read-only file accessed in fixed-size blocks, with an LRU cache of recent blocks.
+
+        Args:
+            file_path (str): File to read.
+            io (IOStats): Counter for the bytes read from disk.
+            cache_blocks (int): Blocks kept in memory.
+            block_bytes (int): Size of a block.
+        """
+        self.file = open(file_path, 'rb')
+        self.io = io
+        self.cache_blocks = max(1, cache_blocks)
+        self.block_bytes = block_bytes
+        self.blocks = OrderedDict()  # Block number -> bytes, least recently used first
+
+    def block(self, number: int) -> bytes:
+        data = self.blocks.get(number)
+        if data is not None:
+            self.blocks.move_to_end(number)
+            return data
+        self.file.seek(number * self.block_bytes)
+        data = self.io.read(self.file.read(self.block_bytes))
+        self.blocks[number] = data
+        if len(self.blocks) > self.cache_blocks:
+            self.blocks.popitem(last=False)
+        return data
+
+    def read(self, position: int, size: int) -> bytes:
+        """Bytes [position, position + size) of the file, through the block cache."""
+        parts = []
+        while size > 0:
+            number, start = divmod(position, self.block_bytes)
+            data = self.block(number)[start:start + size]
+            parts.append(data)
+            position += len(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def close(self):
+        self.file.close()
+
+
+class ExternalGraph:
+    def __init__(self, data_dir: str, io: IOStats, cache_blocks: int = 64):
+        """
+        Graph written by build_external, read from disk a block at a time.
+
+        Only a bounded number of blocks of each file is held in memory, so the graph can be
+        larger than RAM. Successors of nodes visited in increasing index order are read
+        sequentially; in any other order each lookup may cost a block read.
+
+        Args:
+            data_dir (str): Directory written by build_external.
+            io (IOStats): Counter for the bytes read from disk.
+            cache_blocks (int): Blocks of each file kept in memory.
+        """
+        with open(os.path.join(data_dir, MANIFEST), 'r') as f:
+            self.manifest = json.load(f)
+        self.nodes = BlockFile(os.path.join(data_dir, "nodes.bin"), io, cache_blocks)
+        self.offsets = BlockFile(os.path.join(data_dir, "offsets.bin"), io, cache_blocks)
+        self.edges = BlockFile(os.path.join(data_dir, "edges.bin"), io, cache_blocks)
+
+    def __len__(self) -> int:
+        """Number of nodes in the whole map."""
+        return self.manifest["nodes"]
+
+    def endpoint(self, name: str) -> int:
+        """Dense index of the problem's 'initial' or 'final' intersection."""
+        u = self.manifest[f"{name}_node"]
+        if u is None:
+            raise ValueError(f"No intersection data found for state ID: {self.manifest[name]}")
+        return u
+
+    def node(self, u: int) -> Tuple[int, float, float]:
+        """(id, latitude, longitude) of a node."""
+        return NODE.unpack(self.nodes.read(u * NODE.size, NODE.size))
+
+    def successors(self, u: int) -> List[Tuple[int, float]]:
+        """
+        Outgoing edges of a node, in the same order as in Graph.
+
+        Returns:
+            List[Tuple[int, float]]: (target, step cost) per edge.
+        """
+        first, last = struct.unpack("<qq", self.offsets.read(u * OFFSET.size, 2 * OFFSET.size))
+        return list(EDGE.iter_unpack(self.edges.read(first * EDGE.size, (last - first) * EDGE.size)))
+
+    def edge_cost(self, u: int, v: int) -> float:
+        """Step cost of the first edge u -> v, like Graph.edge_cost."""
+        return next(step_cost for target, step_cost in self.successors(u) if target == v)
+
+    def close(self):
+        for f in (self.nodes, self.offsets, self.edges):
+            f.close()
+
+
+class RecordWriter:
+    def __init__(self, file_path: str, record: struct.Struct, io: IOStats):
+        """
+        Append fixed-size records to a file through a buffer of BUFFER_RECORDS records.
+
+        Args:
+            file_path (str): File to create.
+            record (struct.Struct): Layout of one record.
+            io (IOStats): Counter for the bytes written.
+        """
+        self.path = file_path
+        self.file = open(file_path, 'wb')
+        self.record = record
+        self.io = io
+        self.buffer = []
+        self.count = 0
+
+    def write(self, values: Tuple):
+        self.buffer.append(self.record.pack(*values))
+        self.count += 1
+        if len(self.buffer) >= BUFFER_RECORDS:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            data = b"".join(self.buffer)
+            self.file.write(data)
+            self.io.wrote(len(data))
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_records(file_path: str, record: struct.Struct, io: IOStats, remove: bool = False) -> Iterator[Tuple]:
+    """
+    Stream the records of a file front to back, BUFFER_RECORDS at a time.
+
+    Args:
+        file_path (str): File written by RecordWriter.
+        record (struct.Struct): Layout of one record.
+        io (IOStats): Counter for the bytes read.
+        remove (bool): Delete the file once it has been read to the end.
+    """
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(BUFFER_RECORDS * record.size)
+            if not data:
+                break
+            yield from record.iter_unpack(io.read(data))
+    if remove:
+        os.remove(file_path)
+
+
+def read_records_backward(file_path: str, record: struct.Struct, io: IOStats) -> Iterator[Tuple]:
+    """Stream the records of a file back to front, BUFFER_RECORDS at a time."""
+    with open(file_path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - BUFFER_RECORDS * record.size)
+            f.seek(start)
+            data = io.read(f.read(end - start))
+            yield from reversed(list(record.iter_unpack(data)))
+            end = start
+
+
+class ScratchFiles:
+    def __init__(self, directory: str):
+        """Numbered temporary files in a directory, for runs and search levels."""
+        self.directory = directory
+        self.count = 0
+
+    def new(self, name: str) -> str:
+        self.count += 1
+        return os.path.join(self.directory, f"{name}_{self.count}.bin")
+
+
+def write_run(records: Iterable[Tuple], record: struct.Struct, scratch: ScratchFiles, io: IOStats) -> str:
+    """Write records (already sorted) to a new scratch file and return its path."""
+    writer = RecordWriter(scratch.new("run"), record, io)
+    for values in records:
+        writer.write(values)
+    writer.close()
+    return writer.path
+
+
+def merge_runs(paths: List[str], record: struct.Struct, scratch: ScratchFiles, io: IOStats) -> Iterator[Tuple]:
+    """Merge sorted runs into one sorted stream, in passes of at most MAX_FAN_IN runs; the runs are deleted."""
+    while len(paths) > MAX_FAN_IN:
+        group, paths = paths[:MAX_FAN_IN], paths[MAX_FAN_IN:]
+        paths.append(write_run(heapq.merge(*(read_records(p, record, io, True) for p in group)), record, scratch, io))
+    return heapq.merge(*(read_records(p, record, io, True) for p in paths))
+
+
+def external_sort(records: Iterable[Tuple], record: struct.Struct, memory_records: int, scratch: ScratchFiles,
+                  io: IOStats) -> Iterator[Tuple]:
+    """
+    Sort records (as tuples) holding at most memory_records of them in memory.
+
+    The input is consumed before this returns: it is cut into sorted runs of
+    memory_records records, written to disk, and the runs are merged as the result is
+    read. Input that fits in memory is sorted there and never touches the disk.
+
+    Args:
+        records (Iterable[Tuple]): Records to sort.
+        record (struct.Struct): Layout of one record, for the runs.
+        memory_records (int): Records held in memory at once.
+        scratch (ScratchFiles): Where runs are written.
+        io (IOStats): Counter for the bytes moved.
+
+    Returns:
+        Iterator[Tuple]: The records in increasing order.
+    """
+    runs, buffer = [], []
+    for values in records:
+        buffer.append(values)
+        if len(buffer) >= memory_records:
+            buffer.sort()
+            runs.append(write_run(buffer, record, scratch, io))
+            buffer = []
+    buffer.sort()
+    if not runs:
+        return iter(buffer)
+    if buffer:
+        runs.append(write_run(buffer, record, scratch, io))
+    return merge_runs(runs, record, scratch, io)
+
+
+class SortedRun:
+    def __init__(self, file_path: str, keys: Iterable[int], io: IOStats):
+        """
+        Sorted node indices on disk, with the first key of every block kept in memory.
+
+        The fence keys find the one block that can hold a key, so a lookup reads at most
+        one block, and a sorted stream of lookups reads each block at most once.
+
+        Args:
+            file_path (str): File to create.
+            keys (Iterable[int]): Distinct keys in increasing order.
+            io (IOStats): Counter for the bytes moved.
+        """
+        self.io = io
+        self.fences = array('q')
+        self.last = -1
+        writer = RecordWriter(file_path, KEY, io)
+        for key in keys:
+            if writer.count % RUN_BLOCK_KEYS == 0:
+                self.fences.append(key)
+            writer.write((key,))
+            self.last = key
+        writer.close()
+        self.path = file_path
+        self.count = writer.count
+        self.file = open(file_path, 'rb')
+        self.cached = (-1, array('q'))  # Last block read
+
+    def block(self, number: int) -> array:
+        if self.cached[0] != number:
+            self.file.seek(number * RUN_BLOCK_KEYS * KEY.size)
+            keys = array('q')
+            keys.frombytes(self.io.read(self.file.read(RUN_BLOCK_KEYS * KEY.size)))
+            self.cached = (number, keys)
+        return self.cached[1]
+
+    def __contains__(self, key: int) -> bool:
+        if key > self.last:
+            return False
+        number = bisect_right(self.fences, key) - 1
+        if number < 0:
+            return False
+        keys = self.block(number)
+        i = bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+    def keys(self) -> Iterator[int]:
+        return (key for key, in read_records(self.path, KEY, self.io))
+
+    def remove(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+class RunSet:
+    def __init__(self, scratch: ScratchFiles, io: IOStats, memory_keys: int):
+        """
+        Set of node indices that spills to disk: recent keys in memory, the rest in SortedRuns.
+
+        When memory_keys keys are held in memory they are sorted and written as a run.
+        Runs are merged like a binary counter (a run is merged into the previous one
+        while it is at least half its size), so there are O(log n) runs at any time.
+
+        Args:
+            scratch (ScratchFiles): Where runs are written.
+            io (IOStats): Counter for the bytes moved.
+            memory_keys (int): Keys held in memory before spilling.
+        """
+        self.scratch = scratch
+        self.io = io
+        self.memory_keys = memory_keys
+        self.recent = set()
+        self.runs = []
+        self.count = 0
+
+    def add(self, key: int):
+        self.recent.add(key)
+        self.count += 1
+        if len(self.recent) >= self.memory_keys:
+            self.spill()
+
+    def spill(self):
+        self.runs.append(SortedRun(self.scratch.new("set"), sorted(self.recent), self.io))
+        self.recent = set()
+        while len(self.runs) > 1 and 2 * self.runs[-1].count >= self.runs[-2].count:
+            last, previous = self.runs.pop(), self.runs.pop()
+            self.runs.append(SortedRun(self.scratch.new("set"), heapq.merge(previous.keys(), last.keys()), self.io))
+            previous.remove()
+            last.remove()
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.recent or any(key in run for run in self.runs)
+
+    def difference(self, records: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Records, sorted by their first field, whose first field is not in the set."""
+        recent, runs = self.recent, self.runs
+        for values in records:
+            key = values[0]
+            if key not in recent and not any(key in run for run in runs):
+                yield values
+
+
+class ExternalHeap:
+    def __init__(self, record: struct.Struct, memory_records: int, scratch: ScratchFiles, io: IOStats):
+        """
+        Priority queue of records (as tuples) that keeps at most memory_records of them in memory.
+
+        When the in-memory heap overflows, its larger half is sorted and written to disk as
+        a run; popping compares the heap's minimum with the first unread record of every
+        run. Runs are merged into one when there are more than MAX_FAN_IN, so only a
+        bounded number of read buffers is open.
+
+        Args:
+            record (struct.Struct): Layout of one record, for the runs.
+            memory_records (int): Records held in the in-memory heap.
+            scratch (ScratchFiles): Where runs are written.
+            io (IOStats): Counter for the bytes moved.
+        """
+        self.record = record
+        self.memory_records = max(2, memory_records)
+        self.scratch = scratch
+        self.io = io
+        self.heap = []
+        self.runs = []  # Heap of (first unread record, run number, reader)
+        self.run_count = 0
+        self.count = 0
+        self.spills = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, values: Tuple):
+        heapq.heappush(self.heap, values)
+        self.count += 1
+        if len(self.heap) > self.memory_records:
+            self.spill()
+
+    def spill(self):
+        # A sorted list is a valid heap, so the smaller half stays in memory as is
+        self.heap.sort()
+        half = len(self.heap) // 2
+        self.add_run(write_run(self.heap[half:], self.record, self.scratch, self.io))
+        del self.heap[half:]
+        self.spills += 1
+        if len(self.runs) > MAX_FAN_IN:
+            readers = [chain_first(first, reader) for first, _, reader in self.runs]
+            self.runs = []
+            self.add_run(write_run(heapq.merge(*readers), self.record, self.scratch, self.io))
+
+    def add_run(self, path: str):
+        reader = read_records(path, self.record, self.io, True)
+        first = next(reader, None)
+        if first is not None:
+            self.run_count += 1
+            heapq.heappush(self.runs, (first, self.run_count, reader))
+
+    def pop(self) -> Tuple:
+        heap, runs = self.heap, self.runs
+        self.count -= 1
+        if runs and (not heap or runs[0][0] < heap[0]):
+            first, number, reader = runs[0]
+            following = next(reader, None)
+            if following is None:
+                heapq.heappop(runs)
+            else:
+                heapq.heapreplace(runs, (following, number, reader))
+            return first
+        return heapq.heappop(heap)
+
+
+def chain_first(first: Tuple, reader: Iterator[Tuple]) -> Iterator[Tuple]:
+    """A run reader with its already-read first record put back in front."""
+    yield first
+    yield from reader
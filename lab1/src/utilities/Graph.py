@@ -0,0 +1,280 @@
+import zlib
+from array import array
+from typing import Dict, Iterable, List, Set, Tuple
+from utilities.Components import ComponentIndex
+from utilities.NodeOrder import node_order
+from utilities.RouteData import RouteData
+from utilities.State import State
+
+class Graph:
+    def __init__(self, route_data: RouteData, order: str = "input"):
+        """
+        Build a compact adjacency (CSR) view of the route data with dense node indices.
+
+        Intersections are numbered 0..n-1 in the order they appear in the JSON, or in one
+        of the locality-preserving orders of utilities.NodeOrder (a Hilbert curve over the
+        coordinates, BFS, or reverse Cuthill-McKee), so that intersections joined by a
+        segment sit close together in every per-node array. Identifiers are only kept in
+        ids, for output. The outgoing edges of node u are stored in
+        targets[offsets[u]:offsets[u + 1]], sorted by destination identifier exactly like
+        Problem._sort_segments, so that searches over the graph visit successors in the
+        same order as Problem.get_successors whatever the numbering.
+
+        Args:
+            route_data (RouteData): Data about routes, intersections, and segments.
+            order (str): Node numbering, one of utilities.NodeOrder.ORDERS.
+        """
+        self.order = order
+        self.ids = list(route_data.intersections.keys())
+        self.latitudes = array('d', (i["latitude"] for i in route_data.intersections.values()))
+        self.longitudes = array('d', (i["longitude"] for i in route_data.intersections.values()))
+        if order != "input":
+            position = {state_id: i for i, state_id in enumerate(self.ids)}
+            edges = ((position[s["origin"]], position[s["destination"]]) for s in route_data.segments
+                     if s["origin"] in position and s["destination"] in position)
+            permutation = node_order(order, self.latitudes, self.longitudes, edges)
+            self.ids = [self.ids[i] for i in permutation]
+            self.latitudes = array('d', (self.latitudes[i] for i in permutation))
+            self.longitudes = array('d', (self.longitudes[i] for i in permutation))
+        self.index = {state_id: i for i, state_id in enumerate(self.ids)}
+
+        buckets = [[] for _ in self.ids]
+        for segment in route_data.segments:
+            buckets[self._dense(segment["origin"])].append(segment)
+
+        # costs holds each segment's own travel time. step_costs holds what Problem.step_cost
+        # reports for the same pair, which is the first of any parallel segments. distances
+        # holds each segment's length in metres, for searches that weigh it too.
+        self.offsets = array('l', [0])
+        self.sources = array('l')
+        self.targets = array('l')
+        self.costs = array('d')
+        self.step_costs = array('d')
+        self.distances = array('d')
+        for origin, bucket in enumerate(buckets):
+            targets, costs, step_costs, distances = self._edges(bucket)
+            self.sources.extend([origin] * len(targets))
+            self.targets.extend(targets)
+            self.costs.extend(costs)
+            self.step_costs.extend(step_costs)
+            self.distances.extend(distances)
+            self.offsets.append(len(self.targets))
+        self.version = 0  # Bumped by every in-place change (see utilities.MapPatch)
+        self._components = None
+        self._incoming = None  # (version, in_offsets, incoming), built on first use
+
+    def _edges(self, segments: List[Dict]):
+        """Targets, costs, step costs and distances of one origin's segments, sorted by destination id."""
+        targets, costs, step_costs, distances = [], [], [], []
+        first_cost = {}
+        for segment in sorted(segments, key=lambda s: s["destination"]):
+            destination = self._dense(segment["destination"])
+            cost = (segment["distance"] / segment["speed"]) * 3.6
+            targets.append(destination)
+            costs.append(cost)
+            step_costs.append(first_cost.setdefault(destination, cost))
+            distances.append(segment["distance"])
+        return targets, costs, step_costs, distances
+
+    @property
+    def components(self) -> ComponentIndex:
+        """
+        Strongly connected components and reachability index, built on first use.
+
+        Returns:
+            ComponentIndex: Answers whether one node can reach another in O(1).
+        """
+        if self._components is None:
+            self._components = ComponentIndex(self)
+        return self._components
+
+    def _dense(self, state_id: int) -> int:
+        """Map an intersection identifier to its dense index."""
+        try:
+            return self.index[state_id]
+        except KeyError:
+            raise ValueError(f"No intersection data found for state ID: {state_id}")
+
+    def __len__(self) -> int:
+        """Number of nodes in the graph."""
+        return len(self.ids)
+
+    def num_edges(self) -> int:
+        """Number of directed edges in the graph."""
+        return len(self.targets)
+
+    def edge_cost(self, u: int, v: int) -> float:
+        """
+        Get the travel cost of the edge u -> v.
+
+        Args:
+            u (int): Dense index of the origin.
+            v (int): Dense index of the destination.
+
+        Returns:
+            float: The travel cost, or infinity if there is no such edge.
+        """
+        for k in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[k] == v:
+                return self.costs[k]
+        return float('inf')
+
+    def step_cost(self, u: int, v: int) -> float:
+        """
+        Get the step cost of the edge u -> v, which is what UCS adds for it.
+
+        Args:
+            u (int): Dense index of the origin.
+            v (int): Dense index of the destination.
+
+        Returns:
+            float: The step cost, or infinity if there is no such edge.
+        """
+        for k in range(self.offsets[u], self.offsets[u + 1]):
+            if self.targets[k] == v:
+                return self.step_costs[k]
+        return float('inf')
+
+    def incoming_edges(self) -> Tuple[array, array]:
+        """
+        Incoming edges of every node, as a CSR over the edge indices.
+
+        Built on first use and kept until the graph's version changes.
+
+        Returns:
+            Tuple[array, array]: in_offsets and incoming; the edges into v are
+            incoming[in_offsets[v]:in_offsets[v + 1]].
+        """
+        if self._incoming is None or self._incoming[0] != self.version:
+            n, targets = len(self), self.targets
+            in_offsets = array('l', [0]) * (n + 1)
+            for v in targets:
+                in_offsets[v + 1] += 1
+            for v in range(n):
+                in_offsets[v + 1] += in_offsets[v]
+            incoming = array('l', [0]) * len(targets)
+            fill = in_offsets[:-1]
+            for k in range(len(targets)):
+                incoming[fill[targets[k]]] = k
+                fill[targets[k]] += 1
+            self._incoming = (self.version, in_offsets, incoming)
+        return self._incoming[1], self._incoming[2]
+
+    def state(self, u: int) -> State:
+        """Create the State for a dense node index."""
+        return State(id=self.ids[u], latitude=self.latitudes[u], longitude=self.longitudes[u])
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the adjacency arrays, in bytes."""
+        arrays = (self.latitudes, self.longitudes, self.offsets, self.sources, self.targets,
+                  self.costs, self.step_costs, self.distances)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def add_node(self, state_id: int, latitude: float, longitude: float) -> int:
+        """
+        Append an intersection with no segments yet.
+
+        Returns:
+            int: Its dense index, after every existing node whatever the numbering.
+        """
+        u = len(self.ids)
+        self.ids.append(state_id)
+        self.index[state_id] = u
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.offsets.append(self.offsets[-1])
+        return u
+
+    def remove_node(self, u: int):
+        """
+        Forget the identifier of a node whose segments have all been removed.
+
+        The dense index stays allocated (renumbering would touch every array), as an
+        isolated node that no search can reach or start from.
+        """
+        if self.offsets[u] != self.offsets[u + 1]:
+            raise ValueError(f"Intersection {self.ids[u]} still has outgoing segments")
+        del self.index[self.ids[u]]
+
+    def set_edges(self, segments: Dict[int, List[Dict]]) -> Dict[int, List[int]]:
+        """
+        Replace the outgoing edges of some nodes in place.
+
+        Each node's block of the edge arrays is rebuilt from its segments. Blocks that keep
+        their length are overwritten where they are; otherwise every edge array is rebuilt
+        once from the unchanged runs and the new blocks, and the offsets after each changed
+        block are shifted, so the cost is a few copies of the arrays in C, not a rebuild.
+
+        Args:
+            segments (Dict[int, List[Dict]]): Dense origin -> all of its segments now.
+
+        Returns:
+            Dict[int, List[int]]: Dense origin -> the targets its edges had before.
+        """
+        arrays = (self.sources, self.targets, self.costs, self.step_costs, self.distances)
+        old_targets, blocks = {}, []
+        for u in sorted(segments):
+            a, b = self.offsets[u], self.offsets[u + 1]
+            old_targets[u] = self.targets[a:b].tolist()
+            targets, costs, step_costs, distances = self._edges(segments[u])
+            blocks.append((u, a, b, ([u] * len(targets), targets, costs, step_costs, distances)))
+        if all(len(block[0]) == b - a for _, a, b, block in blocks):
+            for _, a, b, block in blocks:
+                for values, new in zip(arrays, block):
+                    values[a:b] = array(values.typecode, new)
+            return old_targets
+
+        rebuilt = [array(values.typecode) for values in arrays]
+        copied = 0  # End of the last run copied
+        for _, a, b, block in blocks:
+            for values, new, out in zip(arrays, block, rebuilt):
+                out.extend(values[copied:a])
+                out.extend(new)
+            copied = b
+        for values, out in zip(arrays, rebuilt):
+            out.extend(values[copied:])
+            values[:] = out  # In place, for anything holding the arrays
+
+        shift = 0
+        for i, (u, a, b, block) in enumerate(blocks):
+            shift += len(block[0]) - (b - a)
+            end = blocks[i + 1][0] + 1 if i + 1 < len(blocks) else len(self.offsets)
+            if shift:
+                self.offsets[u + 1:end] = array('l', map(shift.__add__, self.offsets[u + 1:end]))
+        return old_targets
+
+    def predecessors(self, nodes: Iterable[int]) -> Set[int]:
+        """
+        Nodes with an edge into any of some nodes.
+
+        Each node is found with array.index, which scans the targets in C, so a handful
+        of nodes costs a handful of passes over memory rather than a loop over every edge.
+        """
+        found = set()
+        for v in nodes:
+            k = -1
+            while True:
+                try:
+                    k = self.targets.index(v, k + 1)
+                except ValueError:
+                    break
+                found.add(self.sources[k])
+        return found
+
+    def path_ids(self, path: List[int]) -> List[int]:
+        """Translate a path of dense indices back to intersection identifiers."""
+        return [self.ids[u] for u in path]
+
+
+def graph_fingerprint(graph) -> int:
+    """
+    CRC32 of a graph's numbering, edges and step costs.
+
+    Works for a Graph or a ContractedGraph. Files and caches derived from a graph (the
+    distance oracle, shortest-path trees) are keyed by it, so they are never reused for
+    a graph that was renumbered, contracted differently or patched.
+    """
+    crc = zlib.crc32(array('q', graph.ids).tobytes())
+    crc = zlib.crc32(array('q', graph.targets).tobytes(), crc)
+    crc = zlib.crc32(array('q', graph.offsets).tobytes(), crc)
+    return zlib.crc32(array('d', graph.step_costs).tobytes(), crc)
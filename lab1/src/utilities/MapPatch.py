@@ -0,0 +1,215 @@
+import json
+from itertools import compress
+from operator import not_
+from typing import Dict, Iterable, List, Set, Tuple
+from utilities.RouteData import RouteData
+
+# Operations of a patch, per kind of map element
+OPERATIONS = ("add", "update", "remove")
+
+
+class PatchResult:
+    def __init__(self):
+        """What a patch changed, for updating the structures derived from the route data."""
+        self.added_nodes: List[int] = []     # Intersection ids, in the order they were added
+        self.removed_nodes: Dict[int, Tuple[float, float]] = {}  # Id -> its (latitude, longitude)
+        self.moved_nodes: Dict[int, Tuple[float, float]] = {}    # Id -> (latitude, longitude) before
+        self.origins: Set[int] = set()       # Ids whose outgoing segments changed
+        self.added_edges: List[Tuple[int, int]] = []    # (origin, destination) ids
+        self.removed_edges: List[Tuple[int, int]] = []
+        self.segments = 0                    # Segments added, updated or removed
+        self.invalidated: List[str] = []     # Derived structures dropped or rebuilt
+        self.updated: List[str] = []         # Derived structures updated in place
+
+    def __repr__(self):
+        return (f"PatchResult(segments={self.segments}, nodes=+{len(self.added_nodes)}/-{len(self.removed_nodes)}"
+                f"/~{len(self.moved_nodes)}, updated={self.updated}, invalidated={self.invalidated})")
+
+
+class MapPatch:
+    def __init__(self, changes: Dict):
+        """
+        A set of changes to a map: intersections and segments added, updated or removed.
+
+        The layout mirrors the problem JSON:
+
+            {"intersections": {"add": [{"identifier": 7, "latitude": 38.99, "longitude": -1.85}],
+                               "update": [{"identifier": 8, "latitude": 38.98}],
+                               "remove": [9]},
+             "segments": {"add": [{"origin": 7, "destination": 8, "distance": 42.0, "speed": 30}],
+                          "update": [{"origin": 1, "destination": 2, "speed": 20}],
+                          "remove": [{"origin": 3, "destination": 4}]}}
+
+        Segments are identified by origin and destination; an update or removal applies to
+        every parallel segment between the two. Removing an intersection removes its
+        segments too. Every section is optional.
+
+        Args:
+            changes (Dict): The patch, in the layout above.
+
+        Raises:
+            ValueError: If the patch is malformed.
+        """
+        for kind in changes:
+            if kind not in ("intersections", "segments"):
+                raise ValueError(f"Unknown patch section: {kind}")
+            for operation in changes[kind]:
+                if operation not in OPERATIONS:
+                    raise ValueError(f"Unknown {kind} operation: {operation}")
+        intersections, segments = changes.get("intersections", {}), changes.get("segments", {})
+        self.add_nodes = list(intersections.get("add", []))
+        self.update_nodes = list(intersections.get("update", []))
+        self.remove_nodes = list(intersections.get("remove", []))
+        self.add_segments = list(segments.get("add", []))
+        self.update_segments = list(segments.get("update", []))
+        self.remove_segments = list(segments.get("remove", []))
+
+    @staticmethod
+    def load(file_path: str) -> "MapPatch":
+        """Read a patch from a JSON file."""
+        with open(file_path, 'r') as f:
+            return MapPatch(json.load(f))
+
+    def __len__(self) -> int:
+        """Number of changes in the patch."""
+        return (len(self.add_nodes) + len(self.update_nodes) + len(self.remove_nodes) + len(self.add_segments)
+                + len(self.update_segments) + len(self.remove_segments))
+
+    def check(self, route_data: RouteData, by_origin: Dict[int, List[Dict]]):
+        """
+        Check that the patch applies to a map, before anything is changed.
+
+        Args:
+            route_data (RouteData): The map.
+            by_origin (Dict[int, List[Dict]]): Its segments by origin (Problem.sorted_segments).
+
+        Raises:
+            ValueError: If the patch refers to missing elements, adds existing ones,
+                leaves a segment without one of its intersections or updates a
+                segment it also removes.
+        """
+        intersections = route_data.intersections
+        added = set()
+        for node in self.add_nodes:
+            if not {"identifier", "latitude", "longitude"} <= node.keys():
+                raise ValueError(f"Added intersections need an identifier, latitude and longitude: {node}")
+            if node["identifier"] in intersections or node["identifier"] in added:
+                raise ValueError(f"Intersection {node['identifier']} already exists")
+            added.add(node["identifier"])
+        for node in self.update_nodes:
+            if node.get("identifier") not in intersections:
+                raise ValueError(f"No intersection data found for state ID: {node.get('identifier')}")
+        removed = set(self.remove_nodes)
+        for state_id in removed:
+            if state_id not in intersections:
+                raise ValueError(f"No intersection data found for state ID: {state_id}")
+        for segment in self.update_segments + self.remove_segments:
+            pair = (segment.get("origin"), segment.get("destination"))
+            if not any(s["destination"] == pair[1] for s in by_origin.get(pair[0], ())):
+                raise ValueError(f"No segment from {pair[0]} to {pair[1]}")
+        # An update to a segment the same patch removes, directly or with one of its
+        # intersections, would be lost or fail half-way through apply
+        dropped = {(segment.get("origin"), segment.get("destination")) for segment in self.remove_segments}
+        for segment in self.update_segments:
+            pair = (segment["origin"], segment["destination"])
+            if pair in dropped or pair[0] in removed or pair[1] in removed:
+                raise ValueError(f"Segment from {pair[0]} to {pair[1]} is both updated and removed")
+        for segment in self.add_segments:
+            if not {"origin", "destination", "distance", "speed"} <= segment.keys():
+                raise ValueError(f"Added segments need an origin, destination, distance and speed: {segment}")
+            for state_id in (segment["origin"], segment["destination"]):
+                if state_id in removed or (state_id not in intersections and state_id not in added):
+                    raise ValueError(f"No intersection data found for state ID: {state_id}")
+        for segment in self.add_segments + self.update_segments:
+            if segment.get("speed", 1) <= 0 or segment.get("distance", 0) < 0:
+                raise ValueError(f"Segments need a positive speed and a non-negative distance: {segment}")
+
+    def apply(self, route_data: RouteData, by_origin: Dict[int, List[Dict]],
+              into_removed: Iterable[int] = None) -> PatchResult:
+        """
+        Apply the patch to a map in place.
+
+        The segment lists of the origins that change are kept sorted by destination, like
+        Problem.sorted_segments. The whole segment list is only filtered when segments
+        are removed, and scanned for the segments into an intersection only when
+        intersections are removed and into_removed is not given.
+
+        Args:
+            route_data (RouteData): The map; its intersections and segments are updated.
+            by_origin (Dict[int, List[Dict]]): Its segments by origin, updated too.
+            into_removed (Iterable[int]): Ids of every intersection with a segment into a
+                removed one, if the caller knows them (e.g. from Graph.predecessors).
+
+        Returns:
+            PatchResult: What changed.
+        """
+        self.check(route_data, by_origin)
+        result = PatchResult()
+        intersections = route_data.intersections
+        route_data.data["segments"] = route_data.segments  # So the patched data can be written back
+
+        for node in self.add_nodes:
+            node = dict(node)
+            intersections[node["identifier"]] = node
+            route_data.data.setdefault("intersections", []).append(node)
+            result.added_nodes.append(node["identifier"])
+        for node in self.update_nodes:
+            current = intersections[node["identifier"]]
+            if ("latitude" in node and node["latitude"] != current["latitude"]) or \
+                    ("longitude" in node and node["longitude"] != current["longitude"]):
+                result.moved_nodes.setdefault(node["identifier"], (current["latitude"], current["longitude"]))
+            current.update(node)
+
+        # Segments to drop, by identity: explicit removals, and every segment of a removed intersection
+        dropped = {}
+        for segment in self.remove_segments:
+            for s in by_origin[segment["origin"]]:
+                if s["destination"] == segment["destination"]:
+                    dropped[id(s)] = s
+        removed = set(self.remove_nodes)
+        if removed:
+            if into_removed is None:
+                into_removed = {s["origin"] for s in route_data.segments if s["destination"] in removed}
+            for origin in removed | set(into_removed):
+                for s in by_origin.get(origin, ()):
+                    if s["origin"] in removed or s["destination"] in removed:
+                        dropped[id(s)] = s
+        if dropped:
+            # One pass over the segment list in C; it is the same list as route_data.data["segments"]
+            segments = route_data.segments
+            segments[:] = compress(segments, map(not_, map(dropped.__contains__, map(id, segments))))
+            for s in dropped.values():
+                result.origins.add(s["origin"])
+                result.removed_edges.append((s["origin"], s["destination"]))
+            for origin in {origin for origin, _ in result.removed_edges}:
+                by_origin[origin] = [s for s in by_origin[origin] if id(s) not in dropped]
+                if not by_origin[origin]:
+                    del by_origin[origin]
+
+        for segment in self.update_segments:
+            fields = {key: value for key, value in segment.items() if key not in ("origin", "destination")}
+            for s in by_origin[segment["origin"]]:
+                if s["destination"] == segment["destination"]:
+                    s.update(fields)
+            result.origins.add(segment["origin"])
+        for segment in self.add_segments:
+            segment = dict(segment)
+            route_data.segments.append(segment)
+            by_origin.setdefault(segment["origin"], []).append(segment)
+            result.origins.add(segment["origin"])
+            result.added_edges.append((segment["origin"], segment["destination"]))
+        for origin in result.origins:
+            if origin in by_origin:
+                by_origin[origin].sort(key=lambda x: x["destination"])
+
+        if removed:
+            nodes = {}
+            for state_id in self.remove_nodes:
+                node = intersections.pop(state_id)
+                nodes[id(node)] = node
+                result.removed_nodes[state_id] = (node["latitude"], node["longitude"])
+            listed = route_data.data["intersections"]
+            listed[:] = compress(listed, map(not_, map(nodes.__contains__, map(id, listed))))
+        result.origins -= removed
+        result.segments = len(result.removed_edges) + len(self.update_segments) + len(self.add_segments)
+        return result
@@ -0,0 +1,141 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Phases reported for every run, in pipeline order
+PHASES = ("load", "index", "heuristic", "search", "path", "write")
+
+
+class Metrics:
+    def __init__(self, trace_memory: bool = False):
+        """
+        Per-phase wall and CPU time plus peak resource usage of a search run.
+
+        Wall time is measured with time.perf_counter and CPU time with time.process_time.
+        A phase that runs several times (e.g. repeated searches) accumulates.
+
+        Args:
+            trace_memory (bool): Also record the peak Python heap with tracemalloc. This is
+                exact but slows the run down noticeably, so it is off by default; the peak
+                resident set size of the process is always recorded.
+        """
+        self.trace_memory = trace_memory
+        self.wall = {}     # phase -> seconds
+        self.cpu = {}      # phase -> seconds
+        self.gauges = {}   # name -> peak value
+        self.tags = {}     # name -> set of strings, e.g. the structures a map patch updated
+        self._started = {}
+        self._suspended = {}  # phase -> (wall, cpu) run so far of a suspended phase
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, phase: str):
+        """Start timing a phase."""
+        self._suspended.pop(phase, None)  # Left over from a run that was abandoned while suspended
+        self._started[phase] = (time.perf_counter(), time.process_time())
+
+    def end(self, phase: str) -> float:
+        """
+        Stop timing a phase.
+
+        Returns:
+            float: Wall time of this run of the phase, in seconds.
+        """
+        wall_start, cpu_start = self._started.pop(phase)
+        wall_before, cpu_before = self._suspended.pop(phase, (0.0, 0.0))
+        wall = wall_before + time.perf_counter() - wall_start
+        self.wall[phase] = self.wall.get(phase, 0.0) + wall
+        self.cpu[phase] = self.cpu.get(phase, 0.0) + cpu_before + time.process_time() - cpu_start
+        return wall
+
+    def suspend(self, phase: str):
+        """Stop the clock of a running phase without ending it, e.g. while a stepped search is paused."""
+        wall_start, cpu_start = self._started.pop(phase)
+        wall_before, cpu_before = self._suspended.get(phase, (0.0, 0.0))
+        self._suspended[phase] = (wall_before + time.perf_counter() - wall_start,
+                                  cpu_before + time.process_time() - cpu_start)
+
+    def resume(self, phase: str):
+        """Restart the clock of a suspended phase; end() then reports the time of every run of it."""
+        self._started[phase] = (time.perf_counter(), time.process_time())
+
+    def elapsed(self, phase: str) -> float:
+        """Wall time of the current run of a phase so far, in seconds, running or suspended."""
+        wall = self._suspended.get(phase, (0.0, 0.0))[0]
+        if phase in self._started:
+            wall += time.perf_counter() - self._started[phase][0]
+        return wall
+
+    @contextmanager
+    def phase(self, phase: str):
+        """Time the enclosed block as a phase."""
+        self.begin(phase)
+        try:
+            yield
+        finally:
+            self.end(phase)
+
+    def gauge(self, name: str, value):
+        """Record a value, keeping the peak seen so far."""
+        if name not in self.gauges or value > self.gauges[name]:
+            self.gauges[name] = value
+
+    def add(self, name: str, value):
+        """Add to a recorded value, e.g. a count that accumulates over repeated runs."""
+        self.gauges[name] = self.gauges.get(name, 0) + value
+
+    def tag(self, name: str, values: Iterable[str]):
+        """Record names under a tag, keeping every name recorded so far."""
+        self.tags.setdefault(name, set()).update(values)
+
+    def snapshot(self) -> Dict:
+        """
+        Collect everything recorded so far.
+
+        Returns:
+            Dict: Phase timings, gauges and memory peaks, plus tags if any were recorded.
+        """
+        gauges = dict(self.gauges)
+        if resource is not None:
+            # ru_maxrss is reported in KiB on Linux
+            gauges["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        if self.trace_memory and tracemalloc.is_tracing():
+            gauges["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        snapshot = {
+            "phases": {p: {"wall_seconds": self.wall[p], "cpu_seconds": self.cpu[p]}
+                       for p in PHASES + tuple(p for p in self.wall if p not in PHASES) if p in self.wall},
+            "gauges": gauges,
+        }
+        if self.tags:
+            snapshot["tags"] = {name: sorted(values) for name, values in self.tags.items()}
+        return snapshot
+
+    def to_json(self, labels: Dict[str, str]) -> str:
+        """Render the snapshot as a JSON document, with labels such as problem and algorithm."""
+        return json.dumps({**labels, **self.snapshot()}, indent=2)
+
+    def to_prometheus(self, labels: Dict[str, str]) -> str:
+        """Render the snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        lines = ["# TYPE search_phase_wall_seconds gauge"]
+        for p, times in snapshot["phases"].items():
+            lines.append(f'search_phase_wall_seconds{{{label_text},phase="{p}"}} {times["wall_seconds"]}')
+        lines.append("# TYPE search_phase_cpu_seconds gauge")
+        for p, times in snapshot["phases"].items():
+            lines.append(f'search_phase_cpu_seconds{{{label_text},phase="{p}"}} {times["cpu_seconds"]}')
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"# TYPE search_{name} gauge")
+            lines.append(f"search_{name}{{{label_text}}} {value}")
+        for name, values in snapshot.get("tags", {}).items():
+            lines.append(f"# TYPE search_{name} gauge")
+            for value in values:
+                lines.append(f'search_{name}{{{label_text},name="{value}"}} 1')
+        return "\n".join(lines) + "\n"
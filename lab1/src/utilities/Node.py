@@ -1,5 +1,5 @@
 class Node:
-    def __init__(self, state, parent=None, action=None, path_cost=0, depth=0):
+    def __init__(self, state, parent=None, action=None, path_cost=0, depth=0, step_cost=0):
         """
         Initialize a node with state, parent, action, path cost, and depth information.
         
@@ -9,12 +9,14 @@ class Node:
             action (Action): The action leading to this node.
             path_cost (float): The cumulative path cost to reach this node.
             depth (int): The depth of this node in the search tree.
+            step_cost (float): The cost of the action leading to this node.
         """
         self.state = state
         self.parent = parent
         self.action = action
         self.path_cost = path_cost
         self.depth = depth
+        self.step_cost = step_cost
 
     def expand(self, problem):
         """
@@ -26,13 +28,15 @@ class Node:
         Returns:
             List[Node]: A list of child nodes.
         """
-        return [
-            Node(next_state,
-                 parent=self,
-                 action=action,
-                 path_cost=self.path_cost + problem.step_cost(self.state, action, next_state))
-            for action, next_state in problem.get_successors(self.state)
-        ]
+        children = []
+        for action, next_state in problem.get_successors(self.state):
+            step_cost = problem.step_cost(self.state, action, next_state)
+            children.append(Node(next_state,
+                                 parent=self,
+                                 action=action,
+                                 path_cost=self.path_cost + step_cost,
+                                 step_cost=step_cost))
+        return children
 
     def path(self):
         """
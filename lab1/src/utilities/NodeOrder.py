@@ -0,0 +1,170 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# Node orders Graph can number intersections in; "input" keeps the JSON order
+ORDERS = ("input", "hilbert", "bfs", "rcm")
+
+
+def hilbert_key(x: int, y: int, bits: int) -> int:
+    """
+    Position of a grid cell along a Hilbert curve over a 2^bits x 2^bits grid.
+
+    Args:
+        x (int): Column, in [0, 2^bits).
+        y (int): Row, in [0, 2^bits).
+        bits (int): Bits per coordinate.
+
+    Returns:
+        int: Distance of the cell from the start of the curve.
+    """
+    n = 1 << bits
+    d = 0
+    s = n >> 1
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve inside it starts where the previous one ended
+        if ry == 0:
+            if rx == 1:
+                x, y = n - 1 - x, n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+
+def hilbert_order(latitudes, longitudes, bits: int = 16) -> List[int]:
+    """
+    Nodes sorted along a Hilbert curve over their bounding box.
+
+    Nearby intersections get nearby positions, and unlike a row-by-row order the curve
+    never jumps across the map, so most road segments join nodes close in the order.
+
+    Args:
+        latitudes: Latitude of every node.
+        longitudes: Longitude of every node.
+        bits (int): Grid resolution per axis (16 bits is under 1 m on a city map).
+
+    Returns:
+        List[int]: Old node numbers in their new order.
+    """
+    if not latitudes:
+        return []
+    cells = (1 << bits) - 1
+    south, west = min(latitudes), min(longitudes)
+    height = (max(latitudes) - south) or 1.0
+    width = (max(longitudes) - west) or 1.0
+    keys = [hilbert_key(int((lon - west) / width * cells), int((lat - south) / height * cells), bits)
+            for lat, lon in zip(latitudes, longitudes)]
+    return sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def neighbour_lists(n: int, edges: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    """Sorted undirected neighbours of every node, ignoring direction and parallel segments."""
+    neighbours = [set() for _ in range(n)]
+    for u, v in edges:
+        if u != v:
+            neighbours[u].add(v)
+            neighbours[v].add(u)
+    return [sorted(vs) for vs in neighbours]
+
+
+def bfs_order(neighbours: List[List[int]]) -> List[int]:
+    """
+    Nodes in breadth-first order, one connected component after another.
+
+    Args:
+        neighbours (List[List[int]]): Undirected neighbours of every node.
+
+    Returns:
+        List[int]: Old node numbers in their new order.
+    """
+    order, seen = [], bytearray(len(neighbours))
+    for root in range(len(neighbours)):
+        if seen[root]:
+            continue
+        seen[root] = 1
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            for v in neighbours[u]:
+                if not seen[v]:
+                    seen[v] = 1
+                    queue.append(v)
+    return order
+
+
+def rcm_order(neighbours: List[List[int]]) -> List[int]:
+    """
+    Reverse Cuthill-McKee order: small bandwidth for the adjacency matrix.
+
+    Each component is searched breadth-first from a node of lowest degree, visiting
+    neighbours by increasing degree, and the whole order is reversed at the end.
+
+    Args:
+        neighbours (List[List[int]]): Undirected neighbours of every node.
+
+    Returns:
+        List[int]: Old node numbers in their new order.
+    """
+    degree = [len(vs) for vs in neighbours]
+    order, seen = [], bytearray(len(neighbours))
+    for root in sorted(range(len(neighbours)), key=degree.__getitem__):
+        if seen[root]:
+            continue
+        seen[root] = 1
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            for v in sorted(neighbours[u], key=degree.__getitem__):
+                if not seen[v]:
+                    seen[v] = 1
+                    queue.append(v)
+    order.reverse()
+    return order
+
+
+def node_order(order: str, latitudes, longitudes, edges: Iterable[Tuple[int, int]]) -> List[int]:
+    """
+    Permutation of the nodes for one of ORDERS.
+
+    Args:
+        order (str): One of ORDERS.
+        latitudes: Latitude of every node, in input order.
+        longitudes: Longitude of every node, in input order.
+        edges (Iterable[Tuple[int, int]]): (origin, destination) of every segment, in input numbering.
+
+    Returns:
+        List[int]: Input numbers of the nodes in their new order.
+    """
+    if order == "input":
+        return list(range(len(latitudes)))
+    if order == "hilbert":
+        return hilbert_order(latitudes, longitudes)
+    if order == "bfs":
+        return bfs_order(neighbour_lists(len(latitudes), edges))
+    if order == "rcm":
+        return rcm_order(neighbour_lists(len(latitudes), edges))
+    raise ValueError(f"Unknown node order: {order}")
+
+
+def locality(graph, block: int = 64) -> Dict[str, float]:
+    """
+    How close the two ends of every edge are in a graph's numbering.
+
+    Args:
+        graph (Graph): The graph to measure.
+        block (int): Nodes per block, e.g. the entries of an array that share a page.
+
+    Returns:
+        Dict[str, float]: Mean and median index distance between the ends of an edge,
+            the share of edges whose ends fall in the same block, and the bandwidth.
+    """
+    gaps = sorted(abs(u - v) for u, v in zip(graph.sources, graph.targets))
+    if not gaps:
+        return {"mean_gap": 0.0, "median_gap": 0.0, "same_block": 1.0, "bandwidth": 0}
+    same = sum(1 for u, v in zip(graph.sources, graph.targets) if u // block == v // block)
+    return {"mean_gap": sum(gaps) / len(gaps), "median_gap": float(gaps[len(gaps) // 2]),
+            "same_block": same / len(gaps), "bandwidth": gaps[-1]}
@@ -1,6 +1,11 @@
 from typing import Dict, List, Tuple
 from utilities.State import State
 from utilities.RouteData import RouteData
+from utilities.Contraction import ContractedGraph
+from utilities.Graph import Graph
+from utilities.MapPatch import MapPatch, PatchResult
+from utilities.SpatialIndex import SpatialIndex
+from utilities.SpeedProfiles import SpeedProfiles
 
 class Problem:
     def __init__(self, initial_state: State, goal_state: State, route_data: RouteData):
@@ -13,9 +18,215 @@ class Problem:
             route_data (RouteData): Data about routes, intersections, and segments.
         """
         self.initial_state = initial_state
-        self.goal_state = goal_state
+        self.goal_states = [goal_state]  # Candidate destinations; goal_state is the first
+        self.goal_count = 1              # Goals to reach before a search stops
         self.route_data = route_data
         self.sorted_segments = self._sort_segments()
+        self._graph = None
+        self._full_graph = None
+        self._spatial_index = None
+        self._speed_profiles = None
+        self.node_order = "input"  # Numbering of the dense graph (utilities.NodeOrder.ORDERS)
+
+    @property
+    def goal_state(self) -> State:
+        """The (first) goal state; assigning it makes the problem single-goal again."""
+        return self.goal_states[0]
+
+    @goal_state.setter
+    def goal_state(self, state: State):
+        self.set_goals([state])
+
+    def set_goals(self, goal_states: List[State], k: int = 1):
+        """
+        Search for the nearest of several goal states, or the k nearest of them.
+        
+        Args:
+            goal_states (List[State]): Candidate destinations.
+            k (int): Goals to reach before stopping; 1 stops at the first goal reached.
+        """
+        if not goal_states:
+            raise ValueError("At least one goal state is required")
+        self.goal_states = list(goal_states)
+        self.goal_count = max(1, min(k, len(self.goal_states)))
+
+    @property
+    def graph(self) -> Graph:
+        """
+        Compact dense-index view of the route data, built on first use.
+        
+        Returns:
+            Graph: The CSR adjacency shared by the array-based search engines.
+        """
+        if self._graph is None:
+            self._graph = self.full_graph
+        return self._graph
+
+    @property
+    def full_graph(self) -> Graph:
+        """
+        Dense-index view of every intersection and segment, even after contract().
+        
+        Returns:
+            Graph: The CSR adjacency built from the route data.
+        """
+        if self._full_graph is None:
+            self._full_graph = Graph(self.route_data, self.node_order)
+        return self._full_graph
+
+    def set_node_order(self, order: str) -> Graph:
+        """
+        Renumber the dense graph, e.g. along a Hilbert curve, for better memory locality.
+        
+        Everything indexed by dense node (the graph, its contraction, the spatial index
+        and the speed profiles) is dropped and rebuilt on next use; profiles loaded from a
+        file have to be loaded again.
+        
+        Args:
+            order (str): One of utilities.NodeOrder.ORDERS.
+            
+        Returns:
+            Graph: The renumbered full graph.
+        """
+        self.node_order = order
+        self._graph = self._full_graph = None
+        self._spatial_index = None
+        self._speed_profiles = None
+        return self.full_graph
+
+    def contract(self) -> ContractedGraph:
+        """
+        Make searches run on a contracted copy of the graph that keeps the initial and goal states.
+        
+        Returns:
+            ContractedGraph: The reduced graph, now returned by the graph property.
+        """
+        full = self.full_graph
+        keep = [full.index[s.id] for s in [self.initial_state, *self.goal_states] if s.id in full.index]
+        self._graph = ContractedGraph(full, keep)
+        return self._graph
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        Grid index over the graph's intersections and segments, built on first use.
+        
+        Returns:
+            SpatialIndex: Nearest, radius and segment-snapping queries by coordinate.
+        """
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex(self.full_graph)
+        return self._spatial_index
+
+    @property
+    def speed_profiles(self) -> SpeedProfiles:
+        """
+        Time-of-day travel-time profiles of the full graph's edges, the defaults unless loaded.
+        
+        Returns:
+            SpeedProfiles: One profile per edge, checked for FIFO.
+        """
+        if self._speed_profiles is None:
+            self._speed_profiles = SpeedProfiles(self.full_graph, self.route_data)
+        return self._speed_profiles
+
+    def load_speed_profiles(self, file_path: str) -> SpeedProfiles:
+        """
+        Use the speed profiles of a JSON file instead of the defaults.
+        
+        Args:
+            file_path (str): Profiles in the SpeedProfiles.DEFAULT_PROFILES layout.
+            
+        Returns:
+            SpeedProfiles: The loaded profiles.
+        """
+        self._speed_profiles = SpeedProfiles.load(file_path, self.full_graph, self.route_data)
+        return self._speed_profiles
+
+    def apply_patch(self, patch: MapPatch) -> PatchResult:
+        """
+        Apply a map patch in place, to the route data and to whatever has been built from it.
+        
+        Only the parts touching the changed intersections and segments are updated: the
+        changed origins' blocks of the full graph, their spatial index cells and their
+        speed profiles. Components survive cost changes and new segments that cannot
+        close a cycle, and are dropped (rebuilt on next use) otherwise; a contraction is
+        rebuilt. Structures not built yet are simply built from the patched data later.
+        Removed intersections keep their dense index, isolated and no longer in graph.index.
+        
+        Args:
+            patch (MapPatch): The changes.
+            
+        Returns:
+            PatchResult: What changed, and which derived structures were updated or invalidated.
+        
+        Raises:
+            ValueError: If the patch does not apply, or removes the initial or a goal state.
+        """
+        for state in [self.initial_state, *self.goal_states]:
+            if state.id in patch.remove_nodes:
+                raise ValueError(f"Cannot remove intersection {state.id}: it is an endpoint of the problem")
+        full, spatial = self._full_graph, self._spatial_index
+        if full is None:
+            return patch.apply(self.route_data, self.sorted_segments)
+
+        # Segments leaving the changed origins, or reaching a moved or removed intersection,
+        # change their cells: take them out of the spatial index while the graph still has them
+        patch.check(self.route_data, self.sorted_segments)
+        moved = {full.index[update["identifier"]] for update in patch.update_nodes
+                 if "latitude" in update or "longitude" in update}
+        gone = {full.index[state_id] for state_id in patch.remove_nodes}
+        into_removed = full.predecessors(gone)
+        reindexed = set()
+        if spatial is not None:
+            reindexed = {full.index[s["origin"]] for s in patch.update_segments + patch.remove_segments}
+            reindexed |= {full.index[s["origin"]] for s in patch.add_segments if s["origin"] in full.index}
+            reindexed |= moved | gone | into_removed | full.predecessors(moved)
+            spatial.unindex_edges(reindexed)
+
+        result = patch.apply(self.route_data, self.sorted_segments, [full.ids[u] for u in into_removed])
+        for state_id in result.added_nodes:
+            node = self.route_data.intersections[state_id]
+            full.add_node(state_id, node["latitude"], node["longitude"])
+            if full._components is not None:
+                full._components.add_node()
+        for state_id in result.moved_nodes:
+            node, u = self.route_data.intersections[state_id], full.index[state_id]
+            full.latitudes[u], full.longitudes[u] = node["latitude"], node["longitude"]
+        origins = {full.index[state_id]: self.sorted_segments.get(state_id, []) for state_id in result.origins}
+        origins.update({full.index[state_id]: [] for state_id in result.removed_nodes})
+        old_targets = full.set_edges(origins)
+        for u in gone:
+            full.remove_node(u)
+        full.version += 1
+        result.updated.append("graph")
+
+        if full._components is not None:
+            exact = not result.removed_edges and all(
+                full._components.add_edge(full.index[o], full.index[d]) for o, d in result.added_edges)
+            if exact:
+                result.updated.append("components")
+            else:
+                full._components = None
+                result.invalidated.append("components")
+        if spatial is not None:
+            spatial.place_nodes([full.index[state_id] for state_id in result.added_nodes] + sorted(moved))
+            for u in gone:
+                spatial.remove_node(u)
+            spatial.index_edges((reindexed | origins.keys()) - gone)
+            result.updated.append("spatial_index")
+        if self._speed_profiles is not None:
+            self._speed_profiles.set_edges(full, origins, {u: len(old_targets[u]) for u in origins})
+            result.updated.append("speed_profiles")
+
+        # Endpoint states carry coordinates that the heuristics read
+        if self.initial_state.id in full.index:
+            self.initial_state = full.state(full.index[self.initial_state.id])
+        self.goal_states = [full.state(full.index[s.id]) if s.id in full.index else s for s in self.goal_states]
+        if self._graph is not full:
+            self.contract()
+            result.invalidated.append("contraction")
+        return result
 
     def _sort_segments(self) -> Dict[int, List[Dict]]:
         """
@@ -98,12 +309,12 @@ class Problem:
 
     def is_goal(self, state: State) -> bool:
         """
-        Check if a state is the goal state.
+        Check if a state is one of the goal states.
         
         Args:
             state (State): The state to check.
             
         Returns:
-            bool: True if state is the goal state, False otherwise.
+            bool: True if state is a goal state, False otherwise.
         """
-        return state.id == self.goal_state.id
+        return any(state.id == goal.id for goal in self.goal_states)
@@ -0,0 +1,157 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Functions that are always listed in the hot-function table, even when they are not in
+# the top entries, so runs of different algorithms can be compared side by side. They are
+# matched as substrings of the labels, which hold the class name only in sampling mode.
+WATCHED = ("heappush", "heappop", "geodesic_heuristic", "update (SearchState.py)", "nodes (SearchState.py)",
+           "goal_reached (Search.py)")
+
+
+class SearchProfiler:
+    def __init__(self, mode: str = "cprofile", interval: float = 0.001):
+        """
+        Profile a search run, either deterministically with cProfile or by sampling stacks.
+
+        Args:
+            mode (str): 'cprofile' for deterministic profiling, 'sampling' for a stack
+                sampler thread with much lower overhead.
+            interval (float): Sampling period in seconds (sampling mode only).
+        """
+        if mode not in ("cprofile", "sampling"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.profile = None
+        self.samples = Counter()  # Collapsed stack -> number of samples
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Start profiling the calling thread."""
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        else:
+            self._running = True
+            target = threading.get_ident()
+            self._thread = threading.Thread(target=self._sample, args=(target,), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop profiling."""
+        if self.mode == "cprofile":
+            self.profile.disable()
+        else:
+            self._running = False
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _sample(self, target: int):
+        """Sampler thread: record the target thread's stack every interval."""
+        while self._running:
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def collapsed_stacks(self) -> Dict[str, int]:
+        """
+        Stacks in the collapsed format read by flamegraph.pl and speedscope.
+
+        In sampling mode these are full stacks weighted by sample count. cProfile only keeps
+        caller/callee pairs, so in that mode each entry is a two-frame stack weighted by the
+        callee's own time in microseconds.
+
+        Returns:
+            Dict[str, int]: Semicolon-separated stack -> weight.
+        """
+        if self.mode == "sampling":
+            return dict(self.samples)
+        stacks = {}
+        for func, (_, _, _, _, callers) in pstats.Stats(self.profile).stats.items():
+            for caller, (_, _, tottime, _) in callers.items():
+                weight = int(tottime * 1e6)
+                if weight:
+                    stacks[f"{_pstats_label(caller)};{_pstats_label(func)}"] = weight
+        return stacks
+
+    def hot_functions(self, limit: int = 25) -> List[Tuple[str, int, float, float]]:
+        """
+        Rank functions by their own time, always including the WATCHED functions.
+
+        Returns:
+            List[Tuple[str, int, float, float]]: (function, calls, self time, total time).
+            In sampling mode calls are unknown (0) and times are sample counts times interval.
+        """
+        if self.mode == "cprofile":
+            rows = [(_pstats_label(func), nc, tt, ct)
+                    for func, (_, nc, tt, ct, _) in pstats.Stats(self.profile).stats.items()]
+        else:
+            own, total = Counter(), Counter()
+            for stack, count in self.samples.items():
+                frames = stack.split(";")
+                own[frames[-1]] += count
+                for label in set(frames):
+                    total[label] += count
+            rows = [(label, 0, own[label] * self.interval, total[label] * self.interval) for label in total]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        top = rows[:limit]
+        top += [row for row in rows[limit:] if any(name in row[0] for name in WATCHED)]
+        return top
+
+    def write(self, directory: str, problem: str, algorithm: str) -> str:
+        """
+        Save the profile as <directory>/<algorithm>/<problem>.{collapsed,txt[,pstats]}.
+
+        Args:
+            directory (str): Root directory for profiles.
+            problem (str): Problem name, usually the JSON file name without extension.
+            algorithm (str): Algorithm name.
+
+        Returns:
+            str: Path prefix of the written files.
+        """
+        base = os.path.join(directory, algorithm, problem)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        with open(base + ".collapsed", 'w') as f:
+            for stack, weight in sorted(self.collapsed_stacks().items()):
+                f.write(f"{stack} {weight}\n")
+        with open(base + ".txt", 'w') as f:
+            f.write(f"Profile mode: {self.mode}\n")
+            f.write(f"{'function':<60} {'calls':>10} {'self (s)':>12} {'total (s)':>12}\n")
+            for label, calls, own, total in self.hot_functions():
+                f.write(f"{label:<60} {calls:>10} {own:>12.6f} {total:>12.6f}\n")
+        if self.mode == "cprofile":
+            self.profile.dump_stats(base + ".pstats")
+        return base
+
+
+def _frame_label(code) -> str:
+    """Readable label for a code object, e.g. 'Problem.get_successors (Problem.py)'."""
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)})"
+
+
+def _pstats_label(func) -> str:
+    """Readable label for a pstats function key (file, line, name)."""
+    file_name, _, name = func
+    if file_name == "~":
+        return name  # Built-in, e.g. <built-in method _heapq.heappush>
+    return f"{name} ({os.path.basename(file_name)})"
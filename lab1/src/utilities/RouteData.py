@@ -1,7 +1,24 @@
 import json
+import os
+import zlib
 from utilities.State import State
 from typing import Any, Dict, List
 
+
+def source_fingerprint(file_path: str) -> Dict[str, int]:
+    """
+    Size and CRC32 of a problem file.
+
+    Structures written to disk from a problem (external graphs, tiles) keep it in their
+    manifest, so they are rebuilt when the file changes instead of silently reused.
+    """
+    crc = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            crc = zlib.crc32(chunk, crc)
+    return {"size": os.path.getsize(file_path), "crc32": crc}
+
+
 class RouteData:
     def __init__(self, json_string):
         """
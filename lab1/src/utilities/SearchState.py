@@ -0,0 +1,107 @@
+from array import array
+from typing import List, Tuple
+from utilities.Contraction import ContractedGraph
+from utilities.Graph import Graph
+from utilities.Node import Node
+
+class SearchState:
+    def __init__(self, size: int):
+        """
+        Preallocated per-node search bookkeeping, indexed by dense node index.
+
+        Instead of a Node object per generated successor, a search records the best known
+        cost and the predecessor of every node in flat arrays. An entry is only valid while
+        its stamp equals the current generation, so reset() starts a new search in O(1)
+        for g and parent; only the one-byte-per-node closed map is cleared. The cost of the
+        step into each node is kept too, so a solution reports the costs the search added.
+
+        Args:
+            size (int): Number of nodes in the graph being searched.
+        """
+        self.size = size
+        self.g = array('d', [float('inf')]) * size   # Best known path cost
+        self.parent = array('l', [-1]) * size         # Predecessor on the best known path
+        self.step = array('d', [0.0]) * size          # Cost of the last step on that path
+        self.stamp = array('L', [0]) * size           # Generation that last wrote g/parent/step
+        self.closed = bytearray(size)                 # 1 once a node has been expanded
+        self.generation = 1
+
+    def reset(self):
+        """Invalidate every entry so the arrays can be reused for a new search."""
+        self.generation += 1
+        self.closed = bytearray(self.size)
+
+    def seen(self, u: int) -> bool:
+        """Check whether a node has been reached in the current search."""
+        return self.stamp[u] == self.generation
+
+    def cost(self, u: int) -> float:
+        """Best known cost of a node, or infinity if it has not been reached."""
+        return self.g[u] if self.stamp[u] == self.generation else float('inf')
+
+    def update(self, u: int, cost: float, parent: int = -1, step: float = 0.0):
+        """Record a (better) path to a node, arriving from parent by a step costing step."""
+        self.g[u] = cost
+        self.parent[u] = parent
+        self.step[u] = step
+        self.stamp[u] = self.generation
+
+    def nbytes(self) -> int:
+        """Memory held by the state arrays, in bytes."""
+        return sum(a.itemsize * len(a) for a in (self.g, self.parent, self.step, self.stamp)) + len(self.closed)
+
+    def path(self, u: int) -> List[int]:
+        """
+        Rebuild the path to a node from the predecessor array.
+
+        Args:
+            u (int): Dense index of the last node on the path.
+
+        Returns:
+            List[int]: Dense indices from the root to the node.
+        """
+        path = [u]
+        while self.parent[path[-1]] != -1:
+            path.append(self.parent[path[-1]])
+        path.reverse()
+        return path
+
+    def nodes(self, graph: Graph, u: int) -> List[Node]:
+        """
+        Build the Node chain for the path to a node, matching what Node.path() returns.
+
+        Only the nodes on the solution are allocated, so the existing solution writers
+        can be used unchanged. On a ContractedGraph the path is unpacked first, so the
+        chain lists every original intersection.
+
+        Args:
+            graph (Graph): The graph the search ran on.
+            u (int): Dense index of the last node on the path.
+
+        Returns:
+            List[Node]: Nodes from the root to the node.
+        """
+        if isinstance(graph, ContractedGraph):
+            return self.step_nodes(graph.original, graph.unpack_path(self.path(u), self.g, self.step))
+        return self.step_nodes(graph, [(v, self.g[v], self.step[v]) for v in self.path(u)])
+
+    @staticmethod
+    def step_nodes(graph: Graph, steps: List[Tuple[int, float, float]]) -> List[Node]:
+        """
+        Build the Node chain for a path given as (dense index, path cost, step cost) steps.
+
+        Args:
+            graph (Graph): The graph the indices belong to.
+            steps (List[Tuple[int, float, float]]): The path from the root, with the cost of
+                each node and of the step into it (ignored for the root).
+
+        Returns:
+            List[Node]: Nodes from the root to the last step.
+        """
+        nodes = []
+        for depth, (v, cost, step) in enumerate(steps):
+            state = graph.state(v)
+            parent = nodes[-1] if nodes else None
+            action = f"move to {state.id}" if parent else None
+            nodes.append(Node(state, parent, action, cost, depth, step if parent else 0.0))
+        return nodes
@@ -0,0 +1,167 @@
+import json
+import struct
+from array import array
+from datetime import timedelta
+from typing import Callable, Iterator, List
+
+# Output formats accepted by SolutionWriter
+FORMATS = ("text", "jsonl", "binary")
+
+# Binary solution record header: magic, found flag, generated, expanded, execution time,
+# cost, number of path nodes, label length. The header is followed by the UTF-8 label, the
+# path ids (int64) and the edge costs (float64, one fewer than the ids).
+MAGIC = b"SOL1"
+HEADER = struct.Struct("<4sBqqddIH")
+
+
+class SolutionRecord:
+    def __init__(self, ids: List[int], edge_costs: List[float], cost: float, generated: int, expanded: int,
+                 execution_time: float, label: str = ""):
+        """
+        Everything a solution file reports about one search, independent of its format.
+
+        Args:
+            ids (List[int]): Intersection ids on the path, from initial to goal; empty if no
+                solution was found.
+            edge_costs (List[float]): Cost of each step of the path, one fewer than ids.
+            cost (float): Total path cost.
+            generated (int): Number of generated nodes.
+            expanded (int): Number of expanded nodes.
+            execution_time (float): Search time in seconds.
+            label (str): Name of the run (e.g. problem and algorithm) for batch files.
+        """
+        self.ids = ids
+        self.edge_costs = edge_costs
+        self.cost = cost
+        self.generated = generated
+        self.expanded = expanded
+        self.execution_time = execution_time
+        self.label = label
+
+    @property
+    def found(self) -> bool:
+        """Whether the record holds a solution."""
+        return bool(self.ids)
+
+
+def format_text(record: SolutionRecord) -> str:
+    """
+    Render a record in the solution text format shared by the search scripts.
+
+    Returns:
+        str: The whole record, built in one piece so it is written with a single call.
+    """
+    if not record.found:
+        return "No solution found.\n"
+    ids, costs = record.ids, record.edge_costs
+    steps = ", ".join(f"{ids[i]} → {ids[i + 1]} ({costs[i]:.6f})" for i in range(len(costs)))
+    return (f"Generated nodes: {record.generated}\n"
+            f"Expanded nodes: {record.expanded}\n"
+            f"Execution time: {timedelta(seconds=record.execution_time)}\n"
+            f"Solution length: {len(ids) - 1}\n"
+            f"Solution cost: {timedelta(seconds=record.cost)}\n"
+            f"Solution: [{steps}]\n")
+
+
+class SolutionWriter:
+    def __init__(self, file_path: str, fmt: str = "text", append: bool = False,
+                 layout: Callable[[SolutionRecord], str] = format_text, buffer_size: int = 1 << 20):
+        """
+        Buffered writer for one or many solutions in text, JSONL or binary form.
+
+        Each record is rendered in memory and written with a single call, through a large
+        file buffer, so long paths and batch runs do not pay per-edge I/O. Keep the writer
+        open to put many solutions in one file; text records are then separated by a
+        blank line and preceded by their label.
+
+        Args:
+            file_path (str): Output path.
+            fmt (str): 'text', 'jsonl' or 'binary'.
+            append (bool): Append to the file instead of overwriting it.
+            layout (Callable): Renders a record as text (text format only).
+            buffer_size (int): File buffer size in bytes.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown solution format: {fmt}")
+        self.fmt = fmt
+        self.layout = layout
+        self.count = 0  # Records written so far
+        mode = ('a' if append else 'w') + ('b' if fmt == "binary" else '')
+        encoding = None if fmt == "binary" else "utf-8"
+        self.file = open(file_path, mode, buffering=buffer_size, encoding=encoding)
+
+    def write(self, record: SolutionRecord):
+        """Write one solution record."""
+        if self.fmt == "text":
+            text = self.layout(record)
+            if record.label:
+                text = f"Problem: {record.label}\n" + text
+            if self.file.tell():
+                text = "\n" + text
+            self.file.write(text)
+        elif self.fmt == "jsonl":
+            self.file.write(json.dumps({
+                "label": record.label, "found": record.found,
+                "generated": record.generated, "expanded": record.expanded,
+                "execution_time": record.execution_time, "length": max(len(record.ids) - 1, 0),
+                "cost": record.cost, "path": record.ids, "edge_costs": record.edge_costs,
+            }) + "\n")
+        else:
+            label = record.label.encode("utf-8")
+            self.file.write(HEADER.pack(MAGIC, record.found, record.generated, record.expanded,
+                                        record.execution_time, record.cost, len(record.ids), len(label)))
+            self.file.write(label)
+            self.file.write(array('q', record.ids).tobytes())
+            self.file.write(array('d', record.edge_costs).tobytes())
+        self.count += 1
+
+    def close(self):
+        """Flush and close the file."""
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_binary_solutions(file_path: str) -> Iterator[SolutionRecord]:
+    """
+    Decode the records of a binary solution file.
+
+    Args:
+        file_path (str): Path of a file written by SolutionWriter in binary format.
+
+    Yields:
+        SolutionRecord: The records, in the order they were written.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        magic, _, generated, expanded, execution_time, cost, n, label_length = HEADER.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError(f"Not a solution record at byte {offset} of {file_path}")
+        offset += HEADER.size
+        label = data[offset:offset + label_length].decode("utf-8")
+        offset += label_length
+        ids = array('q', data[offset:offset + 8 * n]).tolist()
+        offset += 8 * n
+        edges = max(n - 1, 0)
+        edge_costs = array('d', data[offset:offset + 8 * edges]).tolist()
+        offset += 8 * edges
+        yield SolutionRecord(ids, edge_costs, cost, generated, expanded, execution_time, label)
+
+
+def read_jsonl_solutions(file_path: str) -> Iterator[dict]:
+    """
+    Read the records of a JSONL solution file.
+
+    Yields:
+        dict: One decoded record per line.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,241 @@
+import math
+from typing import Dict, List, Tuple
+from utilities.Graph import Graph
+
+# Mean Earth radius in meters, for the local projection
+EARTH_RADIUS = 6371000.0
+
+
+class SpatialIndex:
+    def __init__(self, graph: Graph, cell_size: float = 100.0):
+        """
+        Uniform grid over the intersections and segments of a graph, for coordinate lookups.
+
+        Coordinates are projected to meters with an equirectangular projection centered on
+        the map, which is accurate to well under a meter at city scale. Each intersection
+        goes in the cell that holds it. Each segment goes in every cell its bounding box
+        touches, under its origin, so segments can be changed one origin at a time (see
+        unindex_edges, place_nodes and index_edges). Queries scan rings of cells outward
+        from the query point and stop once no unscanned cell can hold anything closer.
+
+        Args:
+            graph (Graph): The graph to index.
+            cell_size (float): Side of a grid cell in meters.
+        """
+        self.graph = graph
+        self.cell_size = cell_size
+        n = len(graph)
+        self.lat0 = math.radians(sum(graph.latitudes) / n) if n else 0.0
+        self.cos_lat0 = math.cos(self.lat0)
+
+        self.xs, self.ys = [], []
+        for lat, lon in zip(graph.latitudes, graph.longitudes):
+            x, y = self.project(lat, lon)
+            self.xs.append(x)
+            self.ys.append(y)
+
+        self.node_cells: Dict[Tuple[int, int], List[int]] = {}
+        for u in range(n):
+            self.node_cells.setdefault(self._cell(self.xs[u], self.ys[u]), []).append(u)
+
+        # Cells list the origins of the segments touching them, so a change to one node's
+        # segments only touches the cells of that node
+        self.edge_cells: Dict[Tuple[int, int], List[int]] = {}
+        for k in range(graph.num_edges()):
+            u = graph.sources[k]
+            for cell in self._segment_cells(u, graph.targets[k]):
+                origins = self.edge_cells.setdefault(cell, [])
+                if not origins or origins[-1] != u:
+                    origins.append(u)
+
+        # Rings beyond this radius cannot reach any occupied cell
+        cells = list(self.node_cells) or [(0, 0)]
+        self._bounds = (min(c[0] for c in cells), max(c[0] for c in cells),
+                        min(c[1] for c in cells), max(c[1] for c in cells))
+
+    def _segment_cells(self, u: int, v: int):
+        """Cells touched by the bounding box of the segment u -> v."""
+        (cx1, cy1), (cx2, cy2) = self._cell(self.xs[u], self.ys[u]), self._cell(self.xs[v], self.ys[v])
+        for cx in range(min(cx1, cx2), max(cx1, cx2) + 1):
+            for cy in range(min(cy1, cy2), max(cy1, cy2) + 1):
+                yield cx, cy
+
+    def _origin_cells(self, u: int):
+        """Cells touched by any outgoing segment of u, as the graph holds them now."""
+        graph = self.graph
+        return {cell for k in range(graph.offsets[u], graph.offsets[u + 1])
+                for cell in self._segment_cells(u, graph.targets[k])}
+
+    def unindex_edges(self, nodes):
+        """
+        Take the outgoing segments of some nodes out of the index.
+
+        Call it before their segments or the positions of their targets change, then
+        index_edges once the graph has been updated.
+        """
+        for u in nodes:
+            for cell in self._origin_cells(u):
+                origins = self.edge_cells[cell]
+                origins.remove(u)
+                if not origins:
+                    del self.edge_cells[cell]
+
+    def index_edges(self, nodes):
+        """Put the outgoing segments of some nodes (back) into the index."""
+        for u in nodes:
+            for cell in self._origin_cells(u):
+                self.edge_cells.setdefault(cell, []).append(u)
+
+    def place_nodes(self, nodes):
+        """
+        Index nodes added to the graph or moved since the index was built.
+
+        Args:
+            nodes: Dense indices; new nodes must come in increasing order.
+        """
+        graph = self.graph
+        min_x, max_x, min_y, max_y = self._bounds
+        for u in nodes:
+            if u < len(self.xs):
+                self.remove_node(u)
+            x, y = self.project(graph.latitudes[u], graph.longitudes[u])
+            if u < len(self.xs):
+                self.xs[u], self.ys[u] = x, y
+            else:
+                self.xs.append(x)
+                self.ys.append(y)
+            cx, cy = self._cell(x, y)
+            self.node_cells.setdefault((cx, cy), []).append(u)
+            min_x, max_x, min_y, max_y = min(min_x, cx), max(max_x, cx), min(min_y, cy), max(max_y, cy)
+        self._bounds = (min_x, max_x, min_y, max_y)
+
+    def remove_node(self, u: int):
+        """Take a node out of the nearest and radius queries."""
+        cell = self._cell(self.xs[u], self.ys[u])
+        members = self.node_cells.get(cell, [])
+        if u in members:
+            members.remove(u)
+            if not members:
+                del self.node_cells[cell]
+
+    def project(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        """Project a coordinate to local planar meters (x east, y north)."""
+        return (EARTH_RADIUS * math.radians(longitude) * self.cos_lat0,
+                EARTH_RADIUS * math.radians(latitude))
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        """Grid cell holding a projected point."""
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        """Ring radius around a cell beyond which every cell is empty."""
+        min_x, max_x, min_y, max_y = self._bounds
+        return max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+
+    def _ring(self, cx: int, cy: int, r: int):
+        """Cells at Chebyshev distance exactly r from a cell."""
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1) -> List[Tuple[float, int]]:
+        """
+        Find the k intersections closest to a coordinate.
+
+        Args:
+            latitude (float): Query latitude.
+            longitude (float): Query longitude.
+            k (int): Number of intersections to return.
+
+        Returns:
+            List[Tuple[float, int]]: (distance in meters, dense node index), nearest first.
+        """
+        x, y = self.project(latitude, longitude)
+        cx, cy = self._cell(x, y)
+        found = []
+        max_ring = self._max_ring(cx, cy)
+        r = 0
+        while r <= max_ring:
+            for cell in self._ring(cx, cy, r):
+                for u in self.node_cells.get(cell, ()):
+                    found.append((math.hypot(self.xs[u] - x, self.ys[u] - y), u))
+            # Anything in ring r + 1 or beyond is more than r cells away
+            if len(found) >= k and sorted(found)[k - 1][0] <= r * self.cell_size:
+                break
+            r += 1
+        found.sort()
+        return found[:k]
+
+    def within(self, latitude: float, longitude: float, radius: float) -> List[Tuple[float, int]]:
+        """
+        Find every intersection within a radius of a coordinate.
+
+        Args:
+            latitude (float): Query latitude.
+            longitude (float): Query longitude.
+            radius (float): Search radius in meters.
+
+        Returns:
+            List[Tuple[float, int]]: (distance in meters, dense node index), nearest first.
+        """
+        x, y = self.project(latitude, longitude)
+        cx, cy = self._cell(x, y)
+        found = []
+        for r in range(min(math.ceil(radius / self.cell_size), self._max_ring(cx, cy)) + 1):
+            for cell in self._ring(cx, cy, r):
+                for u in self.node_cells.get(cell, ()):
+                    d = math.hypot(self.xs[u] - x, self.ys[u] - y)
+                    if d <= radius:
+                        found.append((d, u))
+        found.sort()
+        return found
+
+    def snap(self, latitude: float, longitude: float) -> Tuple[int, float, float]:
+        """
+        Snap a coordinate to the closest point on any segment.
+
+        Args:
+            latitude (float): Query latitude.
+            longitude (float): Query longitude.
+
+        Returns:
+            Tuple[int, float, float]: Edge index into the graph's CSR arrays (-1 if the
+            graph has no segments), fractional position along the edge from its source
+            (0.0) to its target (1.0), and distance in meters to the snapped point.
+        """
+        x, y = self.project(latitude, longitude)
+        cx, cy = self._cell(x, y)
+        best = (float('inf'), -1, 0.0)
+        seen = set()
+        max_ring = self._max_ring(cx, cy)
+        r = 0
+        while r <= max_ring:
+            for cell in self._ring(cx, cy, r):
+                for u in self.edge_cells.get(cell, ()):
+                    if u in seen:
+                        continue
+                    seen.add(u)
+                    for k in range(self.graph.offsets[u], self.graph.offsets[u + 1]):
+                        d, t = self._segment_distance(k, x, y)
+                        if (d, k) < best[:2]:
+                            best = (d, k, t)
+            if best[0] <= r * self.cell_size:
+                break
+            r += 1
+        d, k, t = best
+        return k, t, d
+
+    def _segment_distance(self, k: int, x: float, y: float) -> Tuple[float, float]:
+        """Distance from a projected point to edge k, and the fraction of the closest point."""
+        u, v = self.graph.sources[k], self.graph.targets[k]
+        ux, uy = self.xs[u], self.ys[u]
+        dx, dy = self.xs[v] - ux, self.ys[v] - uy
+        length2 = dx * dx + dy * dy
+        t = 0.0 if length2 == 0 else min(1.0, max(0.0, ((x - ux) * dx + (y - uy) * dy) / length2))
+        return math.hypot(ux + t * dx - x, uy + t * dy - y), t
@@ -0,0 +1,195 @@
+import json
+from array import array
+from bisect import bisect_right
+from typing import Dict, List
+from utilities.Graph import Graph
+from utilities.RouteData import RouteData
+
+# Seconds in the day the profiles repeat over
+DAY = 86400.0
+
+# Default profiles: travel-time factors by hour of the day, applied to each segment's
+# free-flow time. Segments get a profile by speed limit (km/h): the class with the highest
+# threshold not above the segment's speed. Faster roads see the strongest rush hours.
+DEFAULT_PROFILES = {
+    "profiles": {
+        "residential": [[0, 1.0], [7, 1.0], [8.5, 1.15], [10, 1.0], [17, 1.0], [18.5, 1.15], [20, 1.0]],
+        "urban": [[0, 1.0], [6.5, 1.0], [8.5, 1.4], [10, 1.1], [14, 1.2], [15, 1.1], [17, 1.1], [18.5, 1.45],
+                  [20.5, 1.0]],
+        "arterial": [[0, 1.0], [6.5, 1.0], [8.25, 1.7], [10, 1.15], [14, 1.3], [15, 1.15], [17, 1.2],
+                     [18.5, 1.75], [21, 1.0]],
+        "highway": [[0, 1.0], [6.5, 1.0], [8, 1.9], [9.5, 1.2], [17, 1.2], [18.5, 2.0], [20.5, 1.0]],
+    },
+    "classes": [[0, "residential"], [30, "urban"], [40, "arterial"], [70, "highway"]],
+}
+
+
+class SpeedProfiles:
+    def __init__(self, graph: Graph, route_data: RouteData, spec: Dict = None):
+        """
+        Piecewise-linear, time-of-day travel-time profiles for the edges of a graph.
+
+        A profile is a list of (hour, factor) breakpoints over one day; between breakpoints
+        the factor is interpolated linearly, and after the last one it runs back to the first
+        at midnight. The travel time of an edge entered at time t is its static cost times the
+        factor at t. Profiles are shared: each edge only stores a one-byte profile number, so
+        a whole map costs one byte per edge plus a few hundred bytes of breakpoints.
+
+        The FIFO property (entering an edge later never gets you out earlier) is checked
+        for every edge when the profiles are loaded, since time-dependent Dijkstra and A*
+        are only exact under it.
+
+        Args:
+            graph (Graph): The full graph, whose edges get a profile each.
+            route_data (RouteData): The segments, for their speed limits.
+            spec (Dict): Profiles and speed classes in the DEFAULT_PROFILES layout, plus an
+                optional "segments" map from "origin,destination" to a profile name.
+
+        Raises:
+            ValueError: If a profile is malformed or an edge would violate FIFO.
+        """
+        spec = spec or DEFAULT_PROFILES
+        self.names = list(spec["profiles"])
+        if len(self.names) > 255:
+            raise ValueError("At most 255 speed profiles are supported")
+        number = {name: i for i, name in enumerate(self.names)}
+        self.times, self.factors = [], []
+        for name in self.names:
+            times, factors = self._breakpoints(name, spec["profiles"][name])
+            self.times.append(times)
+            self.factors.append(factors)
+        # Profiles that are 1.0 all day need no lookup at all
+        self.flat = bytearray(all(f == 1.0 for f in factors) for factors in self.factors)
+        self.min_factor = min(min(factors) for factors in self.factors)
+
+        # Speed of every edge, in the edge order Graph uses (by origin, then destination id)
+        self.classes = sorted((threshold, number[name]) for threshold, name in spec["classes"])
+        self.overrides = {tuple(int(i) for i in key.split(",")): number[name]
+                          for key, name in spec.get("segments", {}).items()}
+        buckets = [[] for _ in range(len(graph))]
+        for segment in route_data.segments:
+            buckets[graph.index[segment["origin"]]].append((segment["destination"], self.profile_of(segment)))
+        self.profile = array('B')
+        for bucket in buckets:
+            bucket.sort(key=lambda edge: edge[0])
+            self.profile.extend(profile for _, profile in bucket)
+
+        self.check_fifo(graph.costs)
+
+    def profile_of(self, segment: Dict) -> int:
+        """Profile number of a segment: its override, or the class of its speed limit."""
+        profile = self.overrides.get((segment["origin"], segment["destination"]))
+        if profile is None:
+            profile = self.classes[0][1]
+            for threshold, candidate in self.classes:
+                if segment["speed"] >= threshold:
+                    profile = candidate
+        return profile
+
+    def set_edges(self, graph: Graph, segments: Dict[int, List[Dict]], old_counts: Dict[int, int]):
+        """
+        Follow Graph.set_edges: give the new edges of some nodes their profiles in place.
+
+        Args:
+            graph (Graph): The full graph, already updated.
+            segments (Dict[int, List[Dict]]): Dense origin -> all of its segments now.
+            old_counts (Dict[int, int]): Dense origin -> number of edges it had before.
+
+        Raises:
+            ValueError: If a new edge would violate FIFO.
+        """
+        edges = []
+        # In increasing order the blocks before u already have their new length, so u's
+        # block starts where the graph's offsets say
+        for u in sorted(segments):
+            start = graph.offsets[u]
+            profiles = [self.profile_of(segment) for segment in sorted(segments[u], key=lambda s: s["destination"])]
+            self.profile[start:start + old_counts[u]] = array('B', profiles)
+            edges.extend(range(start, start + len(profiles)))
+        self.check_fifo(graph.costs, edges)
+
+    def _breakpoints(self, name: str, points: List) -> tuple:
+        """Validate a profile and return its breakpoints in seconds, closed at midnight."""
+        if not points:
+            raise ValueError(f"Speed profile '{name}' has no breakpoints")
+        times = array('d', (hour * 3600.0 for hour, _ in points))
+        factors = array('d', (factor for _, factor in points))
+        if any(b <= a for a, b in zip(times, times[1:])) or times[0] < 0 or times[-1] >= DAY:
+            raise ValueError(f"Speed profile '{name}' needs increasing hours within one day")
+        if min(factors) <= 0:
+            raise ValueError(f"Speed profile '{name}' has a non-positive factor")
+        # Wrap around: the value at midnight is interpolated between the last and first points
+        span = times[0] + DAY - times[-1]
+        midnight = factors[-1] + (factors[0] - factors[-1]) * (DAY - times[-1]) / span
+        if times[0] > 0:
+            times.insert(0, 0.0)
+            factors.insert(0, midnight)
+        times.append(DAY)
+        factors.append(factors[0])
+        return times, factors
+
+    def factor(self, profile: int, t: float) -> float:
+        """
+        Travel-time factor of a profile at a time of day.
+
+        Args:
+            profile (int): Profile number.
+            t (float): Time in seconds since midnight (any day).
+
+        Returns:
+            float: The factor to multiply the static cost by.
+        """
+        if self.flat[profile]:
+            return 1.0
+        times, factors = self.times[profile], self.factors[profile]
+        t %= DAY
+        i = bisect_right(times, t) - 1
+        return factors[i] + (factors[i + 1] - factors[i]) * (t - times[i]) / (times[i + 1] - times[i])
+
+    def check_fifo(self, costs, edges=None):
+        """
+        Check that no edge can be left earlier by entering it later.
+
+        The arrival time t + c * f(t) is non-decreasing in t when every segment of the
+        profile has slope c * df/dt >= -1, so only the steepest descent of each profile
+        and the most expensive edge using it need to be compared.
+
+        Args:
+            costs: Static cost of every edge.
+            edges: Indices of the edges to check (default: all of them).
+
+        Raises:
+            ValueError: If some edge violates FIFO.
+        """
+        steepest = [min(0.0, min((f[i + 1] - f[i]) / (t[i + 1] - t[i]) for i in range(len(t) - 1)))
+                    for t, f in zip(self.times, self.factors)]
+        longest = [0.0] * len(self.names)
+        for k in range(len(self.profile)) if edges is None else edges:
+            profile = self.profile[k]
+            if costs[k] > longest[profile]:
+                longest[profile] = costs[k]
+        for profile, name in enumerate(self.names):
+            if steepest[profile] * longest[profile] < -1.0:
+                raise ValueError(f"Speed profile '{name}' violates FIFO on edges costing {longest[profile]:.1f} s; "
+                                 f"its factor may fall by at most {1.0 / longest[profile]:.2e} per second")
+
+    def nbytes(self) -> int:
+        """Memory used by the per-edge profile numbers and the shared breakpoints, in bytes."""
+        shared = sum(t.itemsize * len(t) + f.itemsize * len(f) for t, f in zip(self.times, self.factors))
+        return self.profile.itemsize * len(self.profile) + shared + len(self.flat)
+
+    @staticmethod
+    def load(file_path: str, graph: Graph, route_data: RouteData) -> "SpeedProfiles":
+        """
+        Read profiles from a JSON file in the DEFAULT_PROFILES layout.
+
+        Args:
+            file_path (str): Path of the profiles file.
+            graph (Graph): The full graph.
+            route_data (RouteData): The segments, for their speed limits.
+
+        Returns:
+            SpeedProfiles: The profiles, checked for FIFO.
+        """
+        with open(file_path, 'r') as f:
+            return SpeedProfiles(graph, route_data, json.load(f))
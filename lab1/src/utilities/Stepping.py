@@ -0,0 +1,152 @@
+from collections import deque
+from typing import Callable, List
+
+# Expansions a stepped search runs before it pauses and reports its progress
+STEP_EXPANSIONS = 1000
+
+
+class SearchProgress:
+    def __init__(self, expanded: int, generated: int, frontier: int, peak_frontier: int, cost: float,
+                 elapsed: float):
+        """
+        Where a stepped search stands when it pauses.
+
+        Args:
+            expanded (int): Nodes expanded so far.
+            generated (int): Nodes generated so far.
+            frontier (int): Entries on the frontier now (queue, heap or stack frames).
+            peak_frontier (int): Largest frontier seen so far.
+            cost (float): Path cost of the last node expanded; for UCS every node cheaper
+                than this has been settled.
+            elapsed (float): Search time so far in seconds, not counting the pauses.
+        """
+        self.expanded = expanded
+        self.generated = generated
+        self.frontier = frontier
+        self.peak_frontier = peak_frontier
+        self.cost = cost
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return (f"SearchProgress(expanded={self.expanded}, generated={self.generated}, frontier={self.frontier}, "
+                f"cost={self.cost:.1f}, elapsed={self.elapsed:.4f}s)")
+
+
+class SearchTask:
+    def __init__(self, search, batch: int = STEP_EXPANSIONS):
+        """
+        One in-flight search that runs a batch of expansions at a time.
+
+        The task wraps Search.steps: step() runs the search until its next pause, and the
+        search can be left suspended for as long as needed or abandoned halfway. A search
+        instance runs one search at a time, so concurrent queries each need their own
+        instance (Search.fork shares the map between them).
+
+        Args:
+            search (Search): The search to run, with its endpoints already set.
+            batch (int): Expansions per step.
+        """
+        self.search = search
+        self.batch = batch
+        self.progress = None    # SearchProgress of the last pause
+        self.result = None      # What search() returns, once done
+        self.done = False
+        self.abandoned = False
+        self.suspended = False  # Skipped by RoundRobin until resumed
+        self._steps = None
+
+    def step(self) -> bool:
+        """
+        Run the search until it pauses again or finishes.
+
+        Returns:
+            bool: True if the search finished in this step.
+        """
+        if self.done or self.abandoned:
+            return self.done
+        if self._steps is None:
+            self._steps = self.search.steps(self.batch)
+        try:
+            self.progress = next(self._steps)
+        except StopIteration as stop:
+            self.result = stop.value
+            self.done = True
+            self._steps = None
+        return self.done
+
+    def run(self):
+        """Run the search to the end and return its result."""
+        while not self.step() and not self.abandoned:
+            pass
+        return self.result
+
+    def suspend(self):
+        """Keep the task paused, e.g. while its client is away."""
+        self.suspended = True
+
+    def resume(self):
+        """Let a suspended task run again."""
+        self.suspended = False
+
+    def abandon(self):
+        """Stop the search for good and release its frontier."""
+        if self._steps is not None:
+            self._steps.close()
+            self._steps = None
+        self.abandoned = True
+
+    @property
+    def solution(self):
+        """The solution path once done, for searches that return (solution, time) as well."""
+        return self.result[0] if isinstance(self.result, tuple) else self.result
+
+
+class RoundRobin:
+    def __init__(self):
+        """Cooperative scheduler running one step of every task in turn, in one thread."""
+        self.tasks = deque()
+
+    def add(self, task: SearchTask) -> SearchTask:
+        """Queue a task; it runs from the next round on."""
+        self.tasks.append(task)
+        return task
+
+    def run(self, on_progress: Callable = None, on_done: Callable = None, rounds: int = None) -> List[SearchTask]:
+        """
+        Step the tasks in turn until none can run.
+
+        Suspended tasks are skipped but kept, and abandoned ones are dropped. Run stops
+        when every remaining task is suspended, or after the given number of rounds.
+
+        Args:
+            on_progress (callable): Called with (task, progress) after every step that paused.
+            on_done (callable): Called with the task when its search finishes.
+            rounds (int): Most rounds to run (default: until no task can run).
+
+        Returns:
+            List[SearchTask]: The tasks that finished during this call, in finishing order.
+        """
+        finished = []
+        while self.tasks and (rounds is None or rounds > 0):
+            ran = False
+            for _ in range(len(self.tasks)):
+                task = self.tasks.popleft()
+                if task.abandoned:
+                    continue
+                if task.suspended:
+                    self.tasks.append(task)
+                    continue
+                ran = True
+                if task.step():
+                    finished.append(task)
+                    if on_done:
+                        on_done(task)
+                else:
+                    self.tasks.append(task)
+                    if on_progress:
+                        on_progress(task, task.progress)
+            if not ran:
+                break
+            if rounds is not None:
+                rounds -= 1
+        return finished
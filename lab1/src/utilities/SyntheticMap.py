@@ -0,0 +1,159 @@
+import json
+import math
+import random
+from collections import deque
+from typing import List, Tuple
+
+# Mean Earth radius in meters, for segment lengths
+EARTH_RADIUS = 6371000.0
+
+# Speeds in km/h, in the same units as the real problem files
+LOCAL_SPEED = 30
+ARTERIAL_SPEED = 50
+
+
+class SyntheticMap:
+    def __init__(self, nodes: int, seed: int = 0, block: float = 90.0, arterial_every: int = 8,
+                 one_way: float = 0.5, missing: float = 0.08, center: Tuple[float, float] = (38.9943, -1.8585)):
+        """
+        Seeded, road-like map in the RouteData schema, for scaling benchmarks.
+
+        The map is a jittered grid of intersections around a city center. Every
+        arterial_every-th row and column is a two-way arterial at ARTERIAL_SPEED. The other
+        streets are local at LOCAL_SPEED, and a share of them are one-way, alternating
+        direction from street to street like a downtown grid. A few local segments are
+        removed so that blocks are not all the same shape. The complete two-way arterials
+        keep most of the map mutually reachable.
+
+        Args:
+            nodes (int): Approximate number of intersections; the grid is the closest square.
+            seed (int): Random seed; the same arguments always give the same map.
+            block (float): Mean block length in meters.
+            arterial_every (int): Spacing of arterial rows and columns, in blocks.
+            one_way (float): Fraction of local streets that are one-way.
+            missing (float): Fraction of local segments that are removed.
+            center (Tuple[float, float]): Latitude and longitude of the map center.
+        """
+        self.side = max(2, round(math.sqrt(nodes)))
+        self.seed = seed
+        self.block = block
+        self.arterial_every = arterial_every
+        self.one_way = one_way
+        self.missing = missing
+        self.center = center
+        self.rng = random.Random(seed)
+        self.ids = []          # Grid position (row * side + column) -> intersection id
+        self.coordinates = []  # Grid position -> (latitude, longitude)
+        self.segments = []     # (origin position, destination position, speed)
+        self._build()
+
+    def _build(self):
+        """Place the intersections and lay out the streets."""
+        side, rng = self.side, self.rng
+        self.ids = rng.sample(range(10 ** 8, 10 ** 10), side * side)
+
+        # Degrees per meter around the center
+        lat0, lon0 = self.center
+        dlat = 1 / 111320.0
+        dlon = 1 / (111320.0 * math.cos(math.radians(lat0)))
+        half = (side - 1) * self.block / 2
+        for row in range(side):
+            for col in range(side):
+                north = row * self.block - half + rng.gauss(0, self.block * 0.15)
+                east = col * self.block - half + rng.gauss(0, self.block * 0.15)
+                self.coordinates.append((lat0 + north * dlat, lon0 + east * dlon))
+
+        # Rows run east-west and columns north-south; each street is one row or column
+        for horizontal in (True, False):
+            for street in range(side):
+                arterial = street % self.arterial_every == 0 or street == side - 1
+                speed = ARTERIAL_SPEED if arterial else LOCAL_SPEED
+                # One-way streets alternate direction, like a downtown grid
+                direction = 0
+                if not arterial and rng.random() < self.one_way:
+                    direction = 1 if street % 2 else -1
+                for step in range(side - 1):
+                    a = street * side + step if horizontal else step * side + street
+                    b = a + 1 if horizontal else a + side
+                    if not arterial and rng.random() < self.missing:
+                        continue
+                    if direction >= 0:
+                        self.segments.append((a, b, speed))
+                    if direction <= 0:
+                        self.segments.append((b, a, speed))
+
+    def distance(self, a: int, b: int) -> float:
+        """Great-circle length in meters between two grid positions."""
+        (lat1, lon1), (lat2, lon2) = self.coordinates[a], self.coordinates[b]
+        phi1, phi2 = math.radians(lat1), math.radians(lat2)
+        h = (math.sin((phi2 - phi1) / 2) ** 2
+             + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS * math.asin(math.sqrt(h))
+
+    def reachable(self, origin: int) -> List[int]:
+        """
+        Grid positions reachable from an origin, in breadth-first order.
+
+        Args:
+            origin (int): Grid position to start from.
+
+        Returns:
+            List[int]: Reachable positions, nearest (in hops) first.
+        """
+        adjacency = [[] for _ in self.ids]
+        for a, b, _ in self.segments:
+            adjacency[a].append(b)
+        seen = bytearray(len(self.ids))
+        seen[origin] = 1
+        order, queue = [], deque([origin])
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            for v in adjacency[u]:
+                if not seen[v]:
+                    seen[v] = 1
+                    queue.append(v)
+        return order
+
+    def endpoints(self, problem: int = 0) -> Tuple[int, int]:
+        """
+        Pick a reachable (initial, final) pair for the n-th problem on this map.
+
+        The final intersection is drawn from the farthest quarter of the intersections
+        reachable from the initial one, so that every problem has a solution and needs a
+        search across a good part of the map.
+
+        Returns:
+            Tuple[int, int]: Initial and final grid positions.
+        """
+        rng = random.Random(f"{self.seed}:{problem}")
+        initial = rng.randrange(len(self.ids))
+        order = self.reachable(initial)
+        final = rng.choice(order[len(order) * 3 // 4:]) if len(order) > 1 else initial
+        return initial, final
+
+    def write(self, file_path: str, initial: int, final: int):
+        """
+        Write the problem as JSON in the RouteData schema.
+
+        Records are written one at a time, so maps with millions of segments do not need
+        the whole document in memory.
+
+        Args:
+            file_path (str): Output JSON path.
+            initial (int): Grid position of the initial intersection.
+            final (int): Grid position of the final intersection.
+        """
+        with open(file_path, 'w') as f:
+            f.write('{"address": %s, "distance": %d, "initial": %d, "final": %d,\n"intersections": [\n'
+                    % (json.dumps(f"Synthetic grid {self.side}x{self.side}, seed {self.seed}"),
+                       round((self.side - 1) * self.block), self.ids[initial], self.ids[final]))
+            for p, (lat, lon) in enumerate(self.coordinates):
+                f.write(('' if p == 0 else ',\n')
+                        + json.dumps({"identifier": self.ids[p], "longitude": lon, "latitude": lat}))
+            f.write('],\n"segments": [\n')
+            for k, (a, b, speed) in enumerate(self.segments):
+                f.write(('' if k == 0 else ',\n')
+                        + json.dumps({"origin": self.ids[a], "destination": self.ids[b],
+                                      "distance": round(self.distance(a, b), 3), "speed": speed}))
+            f.write(']}\n')
@@ -0,0 +1,434 @@
+import json
+import math
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from utilities.Graph import Graph
+from utilities.MapPatch import PatchResult
+from utilities.RouteData import RouteData, source_fingerprint
+from utilities.State import State
+
+# Tile file header: magic, number of nodes, number of edges
+MAGIC = b"TIL1"
+HEADER = struct.Struct("<4sII")
+MANIFEST = "tiles.json"
+
+# Tile of every node by dense index, as (column, row), so a search can find a node's tile
+# without keeping the whole map's node -> tile table in memory
+NODE_INDEX = "nodes.tiles"
+NODE_TILE = struct.Struct("<ii")
+
+
+def tile_key(latitude: float, longitude: float, tile_size: float) -> Tuple[int, int]:
+    """Tile holding a coordinate, as (column, row) in a grid of tile_size degrees."""
+    return math.floor(longitude / tile_size), math.floor(latitude / tile_size)
+
+
+def build_tiles(json_file_path: str, tile_dir: str, tile_size: float = 0.01) -> Dict:
+    """
+    Split a problem JSON into geographic tiles that TiledGraph loads on demand.
+
+    Every node keeps its dense index from Graph (its position in the JSON), so searches
+    over the tiles break ties exactly like searches over the fully loaded graph. Each
+    tile holds its nodes and their outgoing edges. Each edge records the tile of its
+    target, so a search can follow edges across tile borders without a global index;
+    the tile of every node is also written to a small index file, for the nodes a search
+    reaches before it has read an edge into them. The manifest records the size and
+    CRC32 of the problem file, so tiles_are_current can tell when it has changed.
+
+    Args:
+        json_file_path (str): Problem JSON in the RouteData schema.
+        tile_dir (str): Directory for the tile files and the manifest.
+        tile_size (float): Tile side in degrees (0.01 is roughly 1 km).
+
+    Returns:
+        Dict: The manifest written to <tile_dir>/tiles.json.
+    """
+    with open(json_file_path, 'r') as f:
+        route_data = RouteData(f.read())
+    graph = Graph(route_data)
+    keys = [tile_key(graph.latitudes[u], graph.longitudes[u], tile_size) for u in range(len(graph))]
+    members = {}
+    for u, key in enumerate(keys):
+        members.setdefault(key, []).append(u)
+
+    os.makedirs(tile_dir, exist_ok=True)
+    tiles = {}
+    for key, nodes in members.items():
+        tiles[f"{key[0]}_{key[1]}"] = write_tile(tile_dir, key, nodes, graph, keys)
+    with open(os.path.join(tile_dir, NODE_INDEX), 'wb') as f:
+        for key in keys:
+            f.write(NODE_TILE.pack(*key))
+
+    initial_final = route_data.get_initial_final()
+    manifest = {"address": route_data.get_address(), "tile_size": tile_size,
+                "nodes": len(graph), "edges": graph.num_edges(),
+                "initial": initial_final["initial"], "final": initial_final["final"],
+                "initial_node": None, "final_node": None, "tiles": tiles,
+                "source": source_fingerprint(json_file_path)}
+    _write_manifest(tile_dir, manifest, graph)
+    return manifest
+
+
+def tiles_are_current(json_file_path: str, tile_dir: str, tile_size: float) -> bool:
+    """
+    Check whether a directory written by build_tiles still matches its problem file.
+
+    Returns:
+        bool: False if the directory is missing, has another tile size or was written
+        from another version of the file (or before manifests recorded their source).
+    """
+    try:
+        with open(os.path.join(tile_dir, MANIFEST), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return manifest.get("tile_size") == tile_size and manifest.get("source") == source_fingerprint(json_file_path)
+
+
+def write_tile(tile_dir: str, key: Tuple[int, int], nodes: List[int], graph: Graph, keys) -> int:
+    """
+    Write one tile file: some nodes of a graph and their outgoing edges.
+
+    Args:
+        tile_dir (str): Directory of the tiles.
+        key (Tuple[int, int]): The tile's (column, row).
+        nodes (List[int]): Dense indices of its nodes, in increasing order.
+        graph (Graph): The full graph, numbered in input order.
+        keys: Tile key of any dense index, by subscript.
+
+    Returns:
+        int: Size of the tile file in bytes.
+    """
+    offsets, targets, columns, rows = array('q', [0]), array('q'), array('i'), array('i')
+    costs, step_costs = array('d'), array('d')
+    for u in nodes:
+        for k in range(graph.offsets[u], graph.offsets[u + 1]):
+            v = graph.targets[k]
+            targets.append(v)
+            columns.append(keys[v][0])
+            rows.append(keys[v][1])
+            costs.append(graph.costs[k])
+            step_costs.append(graph.step_costs[k])
+        offsets.append(len(targets))
+    path = os.path.join(tile_dir, f"{key[0]}_{key[1]}.tile")
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(nodes), len(targets)))
+        for values in (array('q', nodes), array('q', (graph.ids[u] for u in nodes)),
+                       array('d', (graph.latitudes[u] for u in nodes)),
+                       array('d', (graph.longitudes[u] for u in nodes)),
+                       offsets, targets, columns, rows, costs, step_costs):
+            values.tofile(f)
+    return os.path.getsize(path)
+
+
+def _write_manifest(tile_dir: str, manifest: Dict, graph: Graph):
+    """Locate the endpoints of the manifest in the graph, record whether one reaches the other, and write it."""
+    for name in ("initial", "final"):
+        u = graph.index.get(manifest[name])
+        manifest[f"{name}_node"] = None if u is None else [
+            u, *tile_key(graph.latitudes[u], graph.longitudes[u], manifest["tile_size"])]
+    ends = [manifest[f"{name}_node"] for name in ("initial", "final")]
+    manifest["reachable"] = None not in ends and graph.components.reachable(ends[0][0], ends[1][0])
+    with open(os.path.join(tile_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+
+class _TileKeys:
+    # Tile key of a dense index, computed when asked for instead of for every node
+    def __init__(self, graph: Graph, tile_size: float):
+        self.graph, self.tile_size = graph, tile_size
+
+    def __getitem__(self, u: int) -> Tuple[int, int]:
+        return tile_key(self.graph.latitudes[u], self.graph.longitudes[u], self.tile_size)
+
+
+def patch_tiles(tile_dir: str, graph: Graph, result: PatchResult, json_file_path: str = None) -> List[str]:
+    """
+    Bring tiles written by build_tiles up to date with a map patch, rewriting only the tiles it touches.
+
+    Those are the tiles of the intersections the patch added, removed or moved (before
+    and after the move), of the intersections whose segments changed, and of the
+    intersections with a segment into a moved one, since edges record their target's
+    tile. Every other tile file is left as it is. The manifest records json_file_path as
+    its source if the patched map has been written there, and no source otherwise, so
+    tiles_are_current no longer matches the unpatched file.
+
+    Args:
+        tile_dir (str): Directory written by build_tiles from the unpatched map.
+        graph (Graph): The full graph of the map, numbered in input order, already patched
+            (Problem.apply_patch).
+        result (PatchResult): What the patch changed.
+        json_file_path (str): Where the patched map was written, if it was.
+
+    Returns:
+        List[str]: Names of the tiles rewritten or deleted.
+    """
+    if graph.order != "input":
+        raise ValueError("Tiles are numbered in input order")
+    with open(os.path.join(tile_dir, MANIFEST), 'r') as f:
+        manifest = json.load(f)
+    tile_size = manifest["tile_size"]
+    keys = _TileKeys(graph, tile_size)
+
+    changed = {graph.index[state_id] for state_id in [*result.origins, *result.added_nodes, *result.moved_nodes]}
+    moved = {graph.index[state_id] for state_id in result.moved_nodes}
+    changed |= graph.predecessors(moved)
+    affected = {keys[u] for u in changed}
+    affected |= {tile_key(latitude, longitude, tile_size)
+                 for latitude, longitude in [*result.moved_nodes.values(), *result.removed_nodes.values()]}
+
+    rewritten = []
+    for key in affected:
+        name = f"{key[0]}_{key[1]}"
+        # Nodes still in the tile, plus the changed ones that are in it now
+        nodes = set(Tile(os.path.join(tile_dir, f"{name}.tile")).nodes) if name in manifest["tiles"] else set()
+        nodes = {u for u in nodes | changed if graph.index.get(graph.ids[u]) == u and keys[u] == key}
+        if nodes:
+            manifest["tiles"][name] = write_tile(tile_dir, key, sorted(nodes), graph, keys)
+        elif name in manifest["tiles"]:
+            os.remove(os.path.join(tile_dir, f"{name}.tile"))
+            del manifest["tiles"][name]
+        else:
+            continue
+        rewritten.append(name)
+    with open(os.path.join(tile_dir, NODE_INDEX), 'r+b') as f:
+        for u in sorted(changed):
+            f.seek(u * NODE_TILE.size)
+            f.write(NODE_TILE.pack(*keys[u]))
+    manifest["nodes"], manifest["edges"] = len(graph), graph.num_edges()
+    manifest["source"] = source_fingerprint(json_file_path) if json_file_path else None
+    _write_manifest(tile_dir, manifest, graph)
+    return rewritten
+
+
+class Tile:
+    def __init__(self, file_path: str):
+        """
+        One loaded tile: its nodes and their outgoing edges in CSR form.
+
+        Args:
+            file_path (str): Path of a tile written by build_tiles.
+        """
+        with open(file_path, 'rb') as f:
+            magic, n, m = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a tile file: {file_path}")
+            self.nodes = self._read(f, 'q', n)
+            self.ids = self._read(f, 'q', n)
+            self.latitudes = self._read(f, 'd', n)
+            self.longitudes = self._read(f, 'd', n)
+            self.offsets = self._read(f, 'q', n + 1)
+            self.targets = self._read(f, 'q', m)
+            self.columns = self._read(f, 'i', m)
+            self.rows = self._read(f, 'i', m)
+            self.costs = self._read(f, 'd', m)
+            self.step_costs = self._read(f, 'd', m)
+        self.local = {u: i for i, u in enumerate(self.nodes)}  # Dense index -> position in tile
+        self.nbytes = HEADER.size + sum(a.itemsize * len(a) for a in (
+            self.nodes, self.ids, self.latitudes, self.longitudes, self.offsets, self.targets,
+            self.columns, self.rows, self.costs, self.step_costs))
+
+    @staticmethod
+    def _read(f, typecode: str, count: int) -> array:
+        values = array(typecode)
+        values.fromfile(f, count)
+        return values
+
+
+class _TileOffsets:
+    # offsets[u] locates u and makes its tile the one the edge views read; the offsets[u + 1]
+    # that follows gives the end of u's edges in that tile, as in range(offsets[u], offsets[u + 1])
+    def __init__(self, graph: "TiledGraph"):
+        self.graph = graph
+        self.after = -1  # u + 1 of the node last located, until its end is asked for
+        self.end = 0
+
+    def __getitem__(self, u: int) -> int:
+        if u == self.after:
+            self.after = -1
+            return self.end
+        tile, i = self.graph._locate(u)
+        self.graph.cursor = tile
+        self.after, self.end = u + 1, tile.offsets[i + 1]
+        return tile.offsets[i]
+
+
+class _TileEdges:
+    # One edge array of the tile the offsets view located last, by position in that tile
+    def __init__(self, graph: "TiledGraph", name: str):
+        self.graph, self.name = graph, name
+
+    def __getitem__(self, k):
+        return getattr(self.graph.cursor, self.name)[k]
+
+
+class _TileTargets(_TileEdges):
+    # Targets also teach the graph the tile of every node they lead to
+    def __init__(self, graph: "TiledGraph"):
+        super().__init__(graph, "targets")
+
+    def __getitem__(self, k):
+        tile = self.graph.cursor
+        if isinstance(k, slice):
+            return tile.targets[k]
+        v = tile.targets[k]
+        if v not in self.graph.node_tile:
+            self.graph._learn(v, (tile.columns[k], tile.rows[k]))
+        return v
+
+
+class _TileIds:
+    # Intersection id of a dense index, read from its tile
+    def __init__(self, graph: "TiledGraph"):
+        self.graph = graph
+
+    def __getitem__(self, u: int) -> int:
+        return self.graph.node(u)[0]
+
+
+class TiledGraph:
+    def __init__(self, tile_dir: str, max_bytes: int = 64 * 1024 * 1024, max_node_tiles: int = 65536):
+        """
+        Graph whose tiles are loaded when a search first touches them.
+
+        Loaded tiles are kept in an LRU cache. When the tiles in memory exceed max_bytes,
+        the least recently used ones are dropped and read again if a search comes back to
+        them. Nodes are addressed by the same dense index as in Graph. The tile of a node
+        is learned from the edges into it as they are read, and kept in a second LRU
+        cache of max_node_tiles entries; a node that has fallen out of it is looked up in
+        the node index file, so memory stays bounded however much of the map is searched.
+
+        offsets, targets, costs, step_costs and ids read like the arrays of Graph, so the
+        array-based engines (BFS, UCS, AStarGeodesic) run on tiles unchanged: offsets[u]
+        loads the tile of u, and edge positions up to offsets[u + 1] index that tile's
+        edges. index only holds the problem's endpoints. Call close() when done.
+
+        Args:
+            tile_dir (str): Directory written by build_tiles.
+            max_bytes (int): Memory budget for loaded tiles.
+            max_node_tiles (int): Node -> tile entries kept in memory.
+        """
+        with open(os.path.join(tile_dir, MANIFEST), 'r') as f:
+            self.manifest = json.load(f)
+        self.tile_dir = tile_dir
+        self.tile_size = self.manifest["tile_size"]
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict()  # Tile key -> Tile, least recently used first
+        self.bytes = 0
+        self.max_node_tiles = max(1, max_node_tiles)
+        self.node_tile = OrderedDict()  # Dense index -> tile key, least recently used first
+        self.node_index = open(os.path.join(tile_dir, NODE_INDEX), 'rb')
+        self.index_reads = 0        # Node tiles read back from the node index file
+        for name in ("initial_node", "final_node"):
+            if self.manifest[name] is not None:
+                u, column, row = self.manifest[name]
+                self._learn(u, (column, row))
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.touched = set()        # Keys of every tile loaded at least once
+        self.cursor = None          # Tile whose edges the edge views read
+        self.offsets = _TileOffsets(self)
+        self.targets = _TileTargets(self)
+        self.costs = _TileEdges(self, "costs")
+        self.step_costs = _TileEdges(self, "step_costs")
+        self.ids = _TileIds(self)
+        self.index = {self.manifest[name]: self.manifest[f"{name}_node"][0]
+                      for name in ("initial", "final") if self.manifest[f"{name}_node"] is not None}
+
+    def close(self):
+        """Close the node index file; tiles already loaded stay readable."""
+        self.node_index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of nodes in the whole map."""
+        return self.manifest["nodes"]
+
+    def endpoint(self, name: str) -> int:
+        """Dense index of the problem's 'initial' or 'final' intersection."""
+        node = self.manifest[f"{name}_node"]
+        if node is None:
+            raise ValueError(f"No intersection data found for state ID: {self.manifest[name]}")
+        return node[0]
+
+    def tile(self, key: Tuple[int, int]) -> Tile:
+        """Get a tile, loading it (and evicting others) if it is not in memory."""
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.hits += 1
+            self.tiles.move_to_end(key)
+            return tile
+        tile = Tile(os.path.join(self.tile_dir, f"{key[0]}_{key[1]}.tile"))
+        self.loads += 1
+        self.touched.add(key)
+        self.tiles[key] = tile
+        self.bytes += tile.nbytes
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.bytes -= evicted.nbytes
+            self.evictions += 1
+        return tile
+
+    def _learn(self, u: int, key: Tuple[int, int]):
+        """Remember the tile of a node, forgetting the least recently used ones over the limit."""
+        self.node_tile[u] = key
+        if len(self.node_tile) > self.max_node_tiles:
+            self.node_tile.popitem(last=False)
+
+    def tile_of(self, u: int) -> Tuple[int, int]:
+        """Tile key of a node, from memory or from the node index file."""
+        key = self.node_tile.get(u)
+        if key is not None:
+            self.node_tile.move_to_end(u)
+            return key
+        self.node_index.seek(u * NODE_TILE.size)
+        key = NODE_TILE.unpack(self.node_index.read(NODE_TILE.size))
+        self.index_reads += 1
+        self._learn(u, key)
+        return key
+
+    def _locate(self, u: int) -> Tuple[Tile, int]:
+        """Tile and in-tile position of a node."""
+        tile = self.tile(self.tile_of(u))
+        return tile, tile.local[u]
+
+    def successors(self, u: int) -> List[Tuple[int, float, float]]:
+        """
+        Outgoing edges of a node, in the same order as in Graph.
+
+        Returns:
+            List[Tuple[int, float, float]]: (target, cost, step cost) per edge.
+        """
+        tile, i = self._locate(u)
+        edges = []
+        for k in range(tile.offsets[i], tile.offsets[i + 1]):
+            v = tile.targets[k]
+            if v not in self.node_tile:
+                self._learn(v, (tile.columns[k], tile.rows[k]))
+            edges.append((v, tile.costs[k], tile.step_costs[k]))
+        return edges
+
+    def edge_cost(self, u: int, v: int) -> float:
+        """Cost of the first edge u -> v, like Graph.edge_cost."""
+        for w, cost, _ in self.successors(u):
+            if w == v:
+                return cost
+        return float('inf')
+
+    def node(self, u: int) -> Tuple[int, float, float]:
+        """Intersection id, latitude and longitude of a node."""
+        tile, i = self._locate(u)
+        return tile.ids[i], tile.latitudes[i], tile.longitudes[i]
+
+    def state(self, u: int) -> State:
+        """Create the State for a dense node index."""
+        return State(*self.node(u))
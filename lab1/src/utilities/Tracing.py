@@ -0,0 +1,146 @@
+import struct
+from collections import deque
+
+# Event codes shared by every sink
+EXPAND, GENERATE, GOAL, PRUNE = range(4)
+EVENT_NAMES = ("expand", "generate", "goal", "prune")
+
+# Binary trace record: event code, node id, parent id (-1 for none), path cost
+RECORD = struct.Struct("<Bqqd")
+
+
+class NullSink:
+    """Discards every event. A tracer with this sink is treated as disabled."""
+
+    def record(self, event, node, parent, cost):
+        pass
+
+    def close(self):
+        pass
+
+
+class PrintSink:
+    """Prints one line per event, like the per-node prints the searches used to make."""
+
+    def record(self, event, node, parent, cost):
+        print(f"{EVENT_NAMES[event]}: {node} (parent: {parent}, cost: {cost})")
+
+    def close(self):
+        pass
+
+
+class SampledSink:
+    def __init__(self, sink, every: int = 100):
+        """
+        Forward only every n-th event to another sink.
+
+        Args:
+            sink: The sink receiving the sampled events.
+            every (int): Sampling period, in events.
+        """
+        self.sink = sink
+        self.every = every
+        self.seen = 0
+
+    def record(self, event, node, parent, cost):
+        self.seen += 1
+        if self.seen % self.every == 0:
+            self.sink.record(event, node, parent, cost)
+
+    def close(self):
+        self.sink.close()
+
+
+class RingBufferSink:
+    def __init__(self, capacity: int = 10000):
+        """
+        Keep the most recent events in memory.
+
+        Args:
+            capacity (int): Maximum number of events retained.
+        """
+        self.events = deque(maxlen=capacity)
+
+    def record(self, event, node, parent, cost):
+        self.events.append((event, node, parent, cost))
+
+    def close(self):
+        pass
+
+
+class BinaryFileSink:
+    def __init__(self, file_path: str):
+        """
+        Append fixed-size binary records to a file; decode them with read_binary_trace.
+
+        Args:
+            file_path (str): Path of the trace file, overwritten if it exists.
+        """
+        self.file = open(file_path, 'wb')
+
+    def record(self, event, node, parent, cost):
+        self.file.write(RECORD.pack(event, node, parent, cost))
+
+    def close(self):
+        self.file.close()
+
+
+def read_binary_trace(file_path: str):
+    """
+    Decode a trace written by BinaryFileSink.
+
+    Args:
+        file_path (str): Path of the trace file.
+
+    Yields:
+        Tuple[str, int, int, float]: Event name, node id, parent id and path cost.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    for event, node, parent, cost in RECORD.iter_unpack(data):
+        yield EVENT_NAMES[event], node, parent, cost
+
+
+class Tracer:
+    def __init__(self, sink=None):
+        """
+        Structured search events, delivered to a sink.
+
+        Searches look the tracer up once per run and skip every hook when it is missing or
+        disabled, so tracing costs nothing unless it is switched on. Hooks take dense node
+        indices (-1 for no parent); sinks receive intersection identifiers.
+
+        Args:
+            sink: Where events go; NullSink (disabled) by default.
+        """
+        self.sink = sink if sink is not None else NullSink()
+        self.ids = []  # Dense index -> intersection id, bound by Search.active_tracer
+
+    def _id(self, u: int) -> int:
+        """Translate a dense index to an intersection id, keeping -1 for no node."""
+        return self.ids[u] if u >= 0 else -1
+
+    @property
+    def enabled(self) -> bool:
+        """Whether events are recorded at all."""
+        return not isinstance(self.sink, NullSink)
+
+    def on_expand(self, node: int, parent: int, cost: float):
+        """A node was taken off the frontier and expanded."""
+        self.sink.record(EXPAND, self._id(node), self._id(parent), cost)
+
+    def on_generate(self, node: int, parent: int, cost: float):
+        """A successor was added to the frontier."""
+        self.sink.record(GENERATE, self._id(node), self._id(parent), cost)
+
+    def on_goal(self, node: int, parent: int, cost: float):
+        """The goal was reached."""
+        self.sink.record(GOAL, self._id(node), self._id(parent), cost)
+
+    def on_prune(self, node: int, parent: int, cost: float):
+        """A successor or frontier entry was discarded (already seen, or not cheaper)."""
+        self.sink.record(PRUNE, self._id(node), self._id(parent), cost)
+
+    def close(self):
+        """Flush and release the sink."""
+        self.sink.close()